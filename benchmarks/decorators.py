@@ -0,0 +1,226 @@
+# -*- coding: utf-8 -*-
+"""
+    Measures the per-request overhead of the caching decorators.
+
+    Drives an in-process Quart app through its ASGI interface, without any
+    network, and compares undecorated views with cache_for, cache and
+    dont_cache, with and without vary, with each only_if evaluator and with
+    and without the CacheControl extension, and with the same policies
+    applied by CacheControlMiddleware instead.
+
+    Reports mean ns/request, latency percentiles and the peak memory
+    traced by tracemalloc per request. Results can be saved as JSON and
+    compared against an earlier run, e.g. of another commit or Quart version.
+
+    Usage: python benchmarks/decorators.py [--requests N] [--output FILE] [--compare FILE]
+"""
+import argparse
+import asyncio
+import json
+import platform
+import subprocess
+import sys
+import time
+import tracemalloc
+from importlib.metadata import version
+
+from quart import Quart
+
+from quart_cachecontrol import Always, CacheControl, ResponseIsSuccessful, ResponseIsSuccessfulOrRedirect
+from quart_cachecontrol import CacheControlMiddleware, CacheRule, RequestMethodIn, ResponseStatusIn
+from quart_cachecontrol import cache, cache_for, dont_cache
+
+VARY = ['Accept-Language', 'User-Agent']
+
+DECORATORS = {
+    'cache_for': cache_for(minutes=5),
+    'cache_for_vary': cache_for(minutes=5, vary=VARY),
+    'cache_for_always': cache_for(minutes=5, only_if=Always),
+    'cache_for_on_success': cache_for(minutes=5, only_if=ResponseIsSuccessful),
+    'cache_for_on_success_or_redirect': cache_for(minutes=5, only_if=ResponseIsSuccessfulOrRedirect),
+    'cache_for_status_in': cache_for(minutes=5, only_if=ResponseStatusIn(range(200, 300), 404)),
+    'cache_for_combined': cache_for(minutes=5, only_if=ResponseIsSuccessful & RequestMethodIn('GET')),
+    'cache': cache(max_age=300, public=True),
+    'cache_vary': cache(max_age=300, public=True, vary=VARY),
+    'cache_always': cache(max_age=300, public=True, only_if=Always),
+    'cache_on_success_or_redirect': cache(max_age=300, public=True, only_if=ResponseIsSuccessfulOrRedirect),
+    'dont_cache': dont_cache(),
+    'dont_cache_always': dont_cache(only_if=Always),
+}
+
+
+# only_if checking the request, which the middleware does not support
+REQUEST_DEPENDENT = frozenset(('cache_for_combined',))
+
+
+def create_app(mode):
+    app = Quart(__name__)
+
+    async def undecorated():
+        return 'ok'
+    app.add_url_rule('/undecorated', 'undecorated', undecorated)
+
+    for name, decorator in DECORATORS.items():
+        async def view():
+            return 'ok'
+        app.add_url_rule('/' + name, name, decorator(view) if mode != 'middleware' else view)
+
+    if mode == 'extension':
+        CacheControl(app)
+    elif mode == 'middleware':
+        # the same policies, applied to undecorated views at the ASGI layer
+        app.asgi_app = CacheControlMiddleware(
+            app.asgi_app, [
+                CacheRule(decorator, glob='/' + name) for name, decorator in DECORATORS.items()
+                if name not in REQUEST_DEPENDENT])
+    return app
+
+
+class ASGIRequest(object):
+    """
+    A single GET request sent to an ASGI app.
+    """
+    def __init__(self, path):
+        self.scope = {
+            'type': 'http',
+            'asgi': {'version': '3.0'},
+            'http_version': '1.1',
+            'method': 'GET',
+            'scheme': 'http',
+            'path': path,
+            'raw_path': path.encode(),
+            'query_string': b'',
+            'root_path': '',
+            'headers': [
+                (b'host', b'localhost'),
+                (b'accept-language', b'en'),
+                (b'user-agent', b'benchmark'),
+            ],
+            'client': ('127.0.0.1', 50000),
+            'server': ('localhost', 80),
+            'extensions': {},
+        }
+
+    async def __call__(self, app):
+        done = asyncio.Event()
+        received = []
+
+        async def receive():
+            if not received:
+                received.append(True)
+                return {'type': 'http.request', 'body': b'', 'more_body': False}
+            await done.wait()
+            return {'type': 'http.disconnect'}
+
+        status = []
+
+        async def send(message):
+            if message['type'] == 'http.response.start':
+                status.append(message['status'])
+            elif not message.get('more_body', False):
+                done.set()
+
+        await app(self.scope, receive, send)
+        return status[0]
+
+
+def percentile(sorted_values, fraction):
+    return sorted_values[min(int(len(sorted_values) * fraction), len(sorted_values) - 1)]
+
+
+async def measure(app, path, requests, warmup):
+    request = ASGIRequest(path)
+    for _ in range(warmup):
+        assert await request(app) == 200
+    timings = []
+    for _ in range(requests):
+        started = time.perf_counter_ns()
+        await request(app)
+        timings.append(time.perf_counter_ns() - started)
+    timings.sort()
+
+    # measured separately, as tracing slows down the requests
+    tracemalloc.start()
+    peaks = []
+    for _ in range(max(requests // 10, 1)):
+        tracemalloc.reset_peak()
+        baseline = tracemalloc.get_traced_memory()[0]
+        await request(app)
+        peaks.append(tracemalloc.get_traced_memory()[1] - baseline)
+    tracemalloc.stop()
+
+    return {
+        'ns_per_request': sum(timings) // len(timings),
+        'p50_ns': percentile(timings, 0.5),
+        'p90_ns': percentile(timings, 0.9),
+        'p99_ns': percentile(timings, 0.99),
+        'peak_bytes_per_request': sum(peaks) // len(peaks),
+    }
+
+
+async def run(requests, warmup):
+    results = {}
+    for mode in (None, 'extension', 'middleware'):
+        app = create_app(mode)
+        await app.startup()
+        try:
+            for name in ['undecorated'] + list(DECORATORS):
+                if mode == 'middleware' and name in REQUEST_DEPENDENT:
+                    continue
+                key = name + ('+' + mode if mode else '')
+                results[key] = await measure(app, '/' + name, requests, warmup)
+        finally:
+            await app.shutdown()
+    return results
+
+
+def environment():
+    try:
+        commit = subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {
+        'commit': commit,
+        'python': platform.python_version(),
+        'quart': version('quart'),
+        'werkzeug': version('werkzeug'),
+        'timestamp': int(time.time()),
+    }
+
+
+def print_results(results, baseline=None):
+    print('{:<42} {:>10} {:>10} {:>10} {:>10} {:>10}'.format(
+        'case', 'ns/req', 'p50', 'p90', 'p99', 'peak B'))
+    for name, result in results.items():
+        line = '{:<42} {:>10} {:>10} {:>10} {:>10} {:>10}'.format(
+            name, result['ns_per_request'], result['p50_ns'], result['p90_ns'], result['p99_ns'],
+            result['peak_bytes_per_request'])
+        if baseline is not None and name in baseline:
+            change = result['ns_per_request'] / baseline[name]['ns_per_request'] - 1
+            line += ' {:>+8.1%}'.format(change)
+        print(line)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0].strip())
+    parser.add_argument('--requests', type=int, default=2000)
+    parser.add_argument('--warmup', type=int, default=200)
+    parser.add_argument('--output', help='save results as JSON')
+    parser.add_argument('--compare', help='JSON results of an earlier run to compare with')
+    args = parser.parse_args()
+
+    results = asyncio.run(run(args.requests, args.warmup))
+    baseline = None
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)['results']
+    print_results(results, baseline)
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump({'environment': environment(), 'results': results}, f, indent=2)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
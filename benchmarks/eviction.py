@@ -0,0 +1,78 @@
+# -*- coding: utf-8 -*-
+"""
+    Compares the eviction policies of MemoryStore on a synthetic workload.
+
+    Keys are requested following a Zipf distribution, with response sizes
+    drawn log-uniformly between 200 bytes and several megabytes. Reports
+    hit ratio, byte hit ratio and throughput for each policy.
+
+    Usage: python benchmarks/eviction.py [--keys N] [--requests N] [--max-bytes N] [--zipf S]
+"""
+import argparse
+import json
+import math
+import random
+import time
+from itertools import accumulate
+
+from quart_cachecontrol.eviction import LRUPolicy, TinyLFUPolicy
+from quart_cachecontrol.store import MemoryStore, StoredResponse
+
+POLICIES = {
+    'lru': LRUPolicy,
+    'tinylfu': TinyLFUPolicy,
+}
+
+
+def workload(keys, requests, zipf, seed):
+    rng = random.Random(seed)
+    sizes = [int(math.exp(rng.uniform(math.log(200), math.log(4 << 20)))) for _ in range(keys)]
+    cum_weights = list(accumulate(1 / (rank + 1) ** zipf for rank in range(keys)))
+    # shuffle popularity, so it does not correlate with the key order
+    ranks = list(range(keys))
+    rng.shuffle(ranks)
+    trace = [ranks[rank] for rank in rng.choices(range(keys), cum_weights=cum_weights, k=requests)]
+    return sizes, trace
+
+
+def run(policy_name, sizes, trace, max_bytes):
+    store = MemoryStore(max_bytes=max_bytes, eviction=POLICIES[policy_name]())
+    bodies = {}
+    hit_bytes = total_bytes = 0
+    started = time.perf_counter()
+    for key in trace:
+        size = sizes[key]
+        total_bytes += size
+        if store.get(key, 0) is not None:
+            hit_bytes += size
+            continue
+        body = bodies.get(size)
+        if body is None:
+            body = bodies[size] = bytes(size)
+        store.set(key, StoredResponse(200, [], body, 0, math.inf))
+    elapsed = time.perf_counter() - started
+    stats = store.stats()
+    return {
+        'policy': policy_name,
+        'hit_ratio': stats['hits'] / len(trace),
+        'byte_hit_ratio': hit_bytes / total_bytes,
+        'evictions': stats['evictions'],
+        'ops_per_second': len(trace) / elapsed,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0].strip())
+    parser.add_argument('--keys', type=int, default=20000)
+    parser.add_argument('--requests', type=int, default=200000)
+    parser.add_argument('--max-bytes', type=int, default=256 << 20)
+    parser.add_argument('--zipf', type=float, default=0.9)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+    sizes, trace = workload(args.keys, args.requests, args.zipf, args.seed)
+    results = [run(name, sizes, trace, args.max_bytes) for name in POLICIES]
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == '__main__':
+    main()
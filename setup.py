@@ -28,7 +28,7 @@ setup(
     install_requires=[
         'Quart',
     ],
-    extras_require={'test': testing_dependencies},
+    extras_require={'test': testing_dependencies, 'brotli': ['brotli']},
     test_requires=testing_dependencies,
     python_requires='>=3.4',
     classifiers=[
@@ -8,19 +8,37 @@
     cache_for, cache, or dont_cache decorators. Makes use of
     Quart response.cache_control.
 
-    This extension does not provide any caching of its own. Its sole
-    purpose is to set Cache-Control and related HTTP headers on the
-    response, so that clients, intermediary proxies or reverse proxies
+    By default, this extension does not provide any caching of its own.
+    Its main purpose is to set Cache-Control and related HTTP headers on
+    the response, so that clients, intermediary proxies or reverse proxies
     in your jurisdiction which evaluate Cache-Control headers, such as
-    Varnish Cache, do the caching for you.
+    Varnish Cache, do the caching for you. Optionally, responses can be
+    kept in an in-process store for as long as the policy declares them
+    fresh.
 
     :copyright: (c) 2015 by Thomas Wiebe.
     :copyright: (c) 2023 by Luckydonald.
     :license: BSD, see LICENSE for more details.
 """
 
+from .analyzer import HyperLogLog, VaryAnalyzer
+from .coalesce import SingleFlight
+from .compress import Compressor
 from .decorate import cache, cache_for, dont_cache
-from .evaluator import Always, ResponseIsSuccessful, ResponseIsSuccessfulOrRedirect
-from .error import QuartCacheControlError, CacheControlAttributeInvalidError
+from .memoize import memoize_for
+from .extension import CacheControl, invalidate_tags
+from .metrics import CacheMetrics
+from .purge import PurgeDispatcher, HTTPPurgeTransport
+from .middleware import CacheControlMiddleware
+from .normalize import Normalizer, AcceptLanguage, accept_encoding, device_class, normalized_header
+from .rules import CacheRule, CacheRules
+from .evaluator import Always, ResponseIsSuccessful, ResponseIsSuccessfulOrRedirect, Condition, ResponseStatusIn, \
+    RequestMethodIn, RequestHasHeader, ResponseMimetypeIn, ResponseContentLengthAtMost
+from .error import QuartCacheControlError, CacheControlAttributeInvalidError, CacheControlPolicyInvalidError, \
+    PurgeError
+from .store import MemoryStore
+from .shared import SharedMemoryStore
+from .static import StaticAssets
+from .warmer import CacheWarmer, WarmTarget
 
 __version__ = '0.3.0'
@@ -0,0 +1,136 @@
+# -*- coding: utf-8 -*-
+"""
+    quart_cachecontrol.analyzer
+    ~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+    :copyright: (c) 2015 by Thomas Wiebe.
+    :copyright: (c) 2023 by Luckydonald.
+    :license: BSD, see LICENSE for more details.
+"""
+from hashlib import blake2b
+from math import log
+
+import quart
+
+# stands in for request headers not sent
+_ABSENT = b'\x00'
+
+
+class HyperLogLog(object):
+    """
+    Estimates the number of distinct values added, in 2 ** precision
+    bytes, with a standard error of about 1.04 / sqrt(2 ** precision).
+    """
+    def __init__(self, precision=10):
+        self.precision = precision
+        self._registers = bytearray(1 << precision)
+        self._rest_bits = 64 - precision
+        self._rest_mask = (1 << self._rest_bits) - 1
+
+    def add(self, value):
+        hashed = int.from_bytes(blake2b(value, digest_size=8).digest(), 'big')
+        index = hashed >> self._rest_bits
+        # position of the leftmost 1-bit in the remaining bits
+        rank = self._rest_bits - (hashed & self._rest_mask).bit_length() + 1
+        if rank > self._registers[index]:
+            self._registers[index] = rank
+
+    def estimate(self):
+        registers = self._registers
+        size = len(registers)
+        alpha = 0.7213 / (1 + 1.079 / size)
+        estimate = alpha * size * size / sum(2.0 ** -register for register in registers)
+        zeros = registers.count(0)
+        if estimate <= 2.5 * size and zeros:
+            # linear counting is more accurate for small cardinalities
+            estimate = size * log(size / zeros)
+        return int(round(estimate))
+
+
+class VaryAnalyzer(object):
+    """
+    Estimates per endpoint how many variants of its responses the
+    request headers listed in Vary produce, to find Vary headers that
+    fragment downstream caches.
+
+    Keeps one HyperLogLog sketch per header and one of the combined
+    values, i.e. the variants, per endpoint. Endpoints are flagged as
+    fragmented once min_requests qualifying responses were seen, and the
+    variants exceed max_variant_ratio of them, i.e. a variant is on
+    average requested fewer than 1 / max_variant_ratio times.
+
+    Install with CacheControl(app, vary_analyzer=VaryAnalyzer()).
+    """
+    def __init__(self, precision=10, min_requests=100, max_variant_ratio=0.5):
+        self.precision = precision
+        self.min_requests = min_requests
+        self.max_variant_ratio = max_variant_ratio
+        # endpoint -> EndpointVarySketches
+        self._endpoints = {}
+
+    def sketches_for(self, endpoint, vary):
+        sketches = self._endpoints.get(endpoint)
+        if sketches is None:
+            sketches = self._endpoints[endpoint] = EndpointVarySketches(vary, self.precision)
+        return sketches
+
+    def report(self):
+        """
+        Return the estimates per endpoint as list of dicts, the most
+        fragmented first.
+        """
+        report = []
+        for endpoint, sketches in self._endpoints.items():
+            variants = sketches.variants.estimate()
+            requests = sketches.requests
+            report.append({
+                'endpoint': endpoint,
+                'vary': {name: sketch.estimate() for name, sketch in zip(sketches.vary, sketches.headers)},
+                'requests': requests,
+                'variants': variants,
+                'fragmented': requests >= self.min_requests and variants > requests * self.max_variant_ratio,
+            })
+        report.sort(key=lambda item: item['variants'], reverse=True)
+        return report
+
+    def fragmented(self):
+        """
+        Return the endpoints whose Vary headers make caching pointless.
+        """
+        return [item['endpoint'] for item in self.report() if item['fragmented']]
+
+
+class EndpointVarySketches(object):
+    def __init__(self, vary, precision):
+        self.vary = tuple(vary)
+        self.headers = tuple(HyperLogLog(precision) for _ in self.vary)
+        self.variants = HyperLogLog(precision)
+        self.requests = 0
+
+    def record(self, headers):
+        self.requests += 1
+        values = []
+        for name, sketch in zip(self.vary, self.headers):
+            value = headers.get(name)
+            value = value.encode('utf-8', 'surrogateescape') if value is not None else _ABSENT
+            sketch.add(value)
+            values.append(value)
+        self.variants.add(b'\x00\x00'.join(values))
+
+
+class VaryRecordingPolicy(object):
+    """
+    Applies a policy, recording the Vary header values of the requests
+    whose responses qualify for it.
+    """
+    def __init__(self, policy, sketches):
+        self._policy = policy
+        self._sketches = sketches
+
+    def qualifies(self, response):
+        return self._policy.qualifies(response)
+
+    async def process_response(self, response):
+        if self._policy.qualifies(response):
+            self._sketches.record(quart.request.headers)
+        return await self._policy.process_response(response)
@@ -9,8 +9,11 @@
 """
 
 from abc import ABCMeta, abstractmethod
-from datetime import datetime
+import quart
+from werkzeug.datastructures import ResponseCacheControl
+from werkzeug.http import parse_cache_control_header
 
+from .clock import http_date_clock
 from .error import CacheControlAttributeInvalidError
 
 
@@ -24,34 +27,106 @@ class CallbackBase(metaclass=ABCMeta):
         pass
 
 
-class SetCacheControlHeadersFromTimedeltaCallback(CallbackBase):
-    def __init__(self, timedelta):
-        self._timedelta = timedelta
-
+class NoopCallback(CallbackBase):
+    """
+    Leaves responses as they are, for policies whose headers are set by
+    an asynchronous callback.
+    """
     def _process_response(self, response):
-        response.expires = datetime.utcnow() + self._timedelta
-        response.cache_control.max_age = int(self._timedelta.total_seconds())
+        pass
 
 
-class SetCacheControlHeadersCallback(CallbackBase):
+class CompiledCacheControlCallbackBase(CallbackBase):
+    """
+    Validates the Cache-Control attributes once and renders the header
+    value up front, so that processing a response is a single header
+    assignment. Only if the view already set a Cache-Control header of
+    its own, the attributes are merged into it.
+    """
     def __init__(self, **cache_control_kw):
+        cache_control = ResponseCacheControl()
+        for attr_name, value in cache_control_kw.items():
+            if not isinstance(getattr(ResponseCacheControl, attr_name, None), property):
+                raise CacheControlAttributeInvalidError(attr_name)
+            setattr(cache_control, attr_name, value)
         self._cache_control_kw = cache_control_kw
+        self._cache_control_header = cache_control.to_header()
 
     def _process_response(self, response):
-        cache_control = response.cache_control
+        headers = response.headers
+        if 'Cache-Control' in headers:
+            self._merge_cache_control(headers)
+        elif self._cache_control_header:
+            headers['Cache-Control'] = self._cache_control_header
+
+    def _merge_cache_control(self, headers):
+        cache_control = parse_cache_control_header(headers['Cache-Control'], cls=ResponseCacheControl)
         for attr_name, value in self._cache_control_kw.items():
-            if not hasattr(cache_control, attr_name):
-                raise CacheControlAttributeInvalidError(attr_name)
             setattr(cache_control, attr_name, value)
+        if cache_control:
+            headers['Cache-Control'] = cache_control.to_header()
+        else:
+            del headers['Cache-Control']
+
+
+class SetCacheControlHeadersFromTimedeltaCallback(CompiledCacheControlCallbackBase):
+    def __init__(self, timedelta, expires=True, **cache_control_kw):
+        self._seconds = int(timedelta.total_seconds())
+        self._expires = expires
+        super().__init__(max_age=self._seconds, **cache_control_kw)
+
+    def _process_response(self, response):
+        if self._expires:
+            response.headers['Expires'] = http_date_clock.http_date_in(self._seconds)
+        super()._process_response(response)
+
+
+class SetCacheControlHeadersCallback(CompiledCacheControlCallbackBase):
+    pass
+
 
+class SetCacheControlHeadersForNoCachingCallback(CompiledCacheControlCallbackBase):
+    def __init__(self):
+        super().__init__(
+            max_age=0,
+            no_cache=True,
+            no_store=True,
+            must_revalidate=True,
+            proxy_revalidate=True,
+        )
+
+
+class SetCacheControlHeadersByCredentialsCallback(CallbackBase):
+    """
+    Sets the Cache-Control headers rendered from anonymous_kw, or from
+    credentialed_kw for requests carrying credentials, see
+    is_credentialed.
+    """
+    def __init__(self, anonymous_kw, credentialed_kw, credential_cookies=()):
+        self._anonymous = SetCacheControlHeadersCallback(**anonymous_kw)
+        self._credentialed = SetCacheControlHeadersCallback(**credentialed_kw)
+        self._credential_cookies = tuple(credential_cookies)
 
-class SetCacheControlHeadersForNoCachingCallback(CallbackBase):
     def _process_response(self, response):
-        response.cache_control.max_age = 0
-        response.cache_control.no_cache = True
-        response.cache_control.no_store = True
-        response.cache_control.must_revalidate = True
-        response.cache_control.proxy_revalidate = True
+        if is_credentialed(quart.request, self._credential_cookies):
+            self._credentialed(response)
+        else:
+            self._anonymous(response)
+
+
+def is_credentialed(request, credential_cookies=()):
+    """
+    Whether request sends an Authorization header or any of the cookies
+    named in credential_cookies.
+    """
+    if 'Authorization' in request.headers:
+        return True
+    if credential_cookies and 'Cookie' in request.headers:
+        cookies = request.cookies
+        for name in credential_cookies:
+            if name in cookies:
+                return True
+    return False
 
 
 class SetVaryHeaderCallback(CallbackBase):
@@ -61,3 +136,47 @@ class SetVaryHeaderCallback(CallbackBase):
 
     def _process_response(self, response):
         response.vary = self._vary_header
+
+
+class SetNormalizedHeadersCallback(CallbackBase):
+    """
+    Sets a response header per normalized request header, carrying the
+    bucket of the request header value.
+
+    Takes normalizers as (request header, response header, bucket
+    function) tuples.
+    """
+    def __init__(self, normalizers):
+        self._normalizers = normalizers
+
+    def _process_response(self, response):
+        request_headers = quart.request.headers
+        headers = response.headers
+        for name, header, bucket in self._normalizers:
+            headers[header] = bucket(request_headers.get(name))
+
+
+class SetCacheTagHeadersCallback(CallbackBase):
+    """
+    Sets Surrogate-Key and Cache-Tag headers listing the tags of the
+    response, for reverse proxies and CDNs purging by tag.
+
+    Takes tags as list, or as function of the view arguments returning
+    the list.
+    """
+    def __init__(self, tags):
+        self._tags = tags
+        # generate header values once for static tags
+        self._headers = None if callable(tags) else self._tag_headers(tags)
+
+    def _process_response(self, response):
+        headers = self._headers
+        if headers is None:
+            headers = self._tag_headers(self._tags(**quart.request.view_args))
+        if headers:
+            response.headers['Surrogate-Key'], response.headers['Cache-Tag'] = headers
+
+    @staticmethod
+    def _tag_headers(tags):
+        tags = list(tags)
+        return (' '.join(tags), ','.join(tags)) if tags else ()
@@ -0,0 +1,43 @@
+# -*- coding: utf-8 -*-
+"""
+    quart_cachecontrol.clock
+    ~~~~~~~~~~~~~~~~~~~~~~~~
+
+    :copyright: (c) 2015 by Thomas Wiebe.
+    :copyright: (c) 2023 by Luckydonald.
+    :license: BSD, see LICENSE for more details.
+"""
+from time import time
+
+from werkzeug.http import http_date
+
+
+class HttpDateClock(object):
+    """
+    Formats HTTP-dates relative to the current time.
+
+    HTTP-dates have a resolution of one second, so every formatted value
+    is kept until the clock ticks over to the next second.
+    """
+    def __init__(self, clock=time):
+        self._clock = clock
+        # (second, {offset: http date}) swapped as a whole on each tick
+        self._state = (None, {})
+
+    def http_date_in(self, seconds):
+        """
+        Return the HTTP-date `seconds` from now.
+        """
+        now = int(self._clock())
+        second, dates = self._state
+        if now != second:
+            dates = {}
+            self._state = (now, dates)
+        try:
+            return dates[seconds]
+        except KeyError:
+            value = dates[seconds] = http_date(now + seconds)
+            return value
+
+
+http_date_clock = HttpDateClock()
@@ -0,0 +1,88 @@
+# -*- coding: utf-8 -*-
+"""
+    quart_cachecontrol.coalesce
+    ~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+    :copyright: (c) 2015 by Thomas Wiebe.
+    :copyright: (c) 2023 by Luckydonald.
+    :license: BSD, see LICENSE for more details.
+"""
+import asyncio
+
+# result of a leader which was cancelled, its waiters call for themselves
+_ABANDONED = object()
+
+
+class SingleFlight(object):
+    """
+    Coalesces concurrent calls for the same key into a single call.
+
+    The first caller of a key, the leader, does the call. Callers of the
+    same key arriving while it is in flight wait for its result instead.
+
+    If share_errors is true, waiters raise the exception the leader's call
+    raised, otherwise they do the call themselves. Waiters giving up after
+    timeout seconds do the call themselves, or raise asyncio.TimeoutError
+    if raise_on_timeout is true. If the leader is cancelled, its waiters
+    do the call themselves.
+    """
+    def __init__(self, timeout=None, share_errors=True, raise_on_timeout=False):
+        self._timeout = timeout
+        self._share_errors = share_errors
+        self._raise_on_timeout = raise_on_timeout
+        self._futures = {}
+        self.leaders = 0
+        self.waiters = 0
+        self.waiting = 0
+
+    async def run(self, key, func):
+        """
+        Return a tuple of the result of func() and whether this caller
+        was the leader.
+        """
+        future = self._futures.get(key)
+        if future is None:
+            return await self._lead(key, func), True
+        self.waiters += 1
+        self.waiting += 1
+        try:
+            if self._timeout is None:
+                result, error = await asyncio.shield(future)
+            else:
+                result, error = await asyncio.wait_for(asyncio.shield(future), self._timeout)
+        except asyncio.TimeoutError:
+            if self._raise_on_timeout:
+                raise
+            return await func(), False
+        finally:
+            self.waiting -= 1
+        if result is _ABANDONED or (error is not None and not self._share_errors):
+            return await func(), False
+        if error is not None:
+            raise error
+        return result, False
+
+    async def _lead(self, key, func):
+        future = self._futures[key] = asyncio.get_running_loop().create_future()
+        self.leaders += 1
+        try:
+            result = await func()
+        except Exception as error:
+            future.set_result((None, error))
+            raise
+        except BaseException:
+            future.set_result((_ABANDONED, None))
+            raise
+        else:
+            future.set_result((result, None))
+            return result
+        finally:
+            del self._futures[key]
+
+    def stats(self):
+        return {
+            'in_flight': len(self._futures),
+            'leaders': self.leaders,
+            'waiters': self.waiters,
+            'waiting': self.waiting,
+        }
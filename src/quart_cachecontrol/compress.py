@@ -0,0 +1,70 @@
+# -*- coding: utf-8 -*-
+"""
+    quart_cachecontrol.compress
+    ~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+    :copyright: (c) 2015 by Thomas Wiebe.
+    :copyright: (c) 2023 by Luckydonald.
+    :license: BSD, see LICENSE for more details.
+"""
+import gzip
+from functools import lru_cache
+
+from werkzeug.http import parse_accept_header
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover
+    brotli = None
+
+
+class Compressor(object):
+    """
+    Compresses the bodies of stored responses once, when storing them,
+    into each of encodings. Requests are served the encoding they accept
+    first in the order of encodings, or the uncompressed body.
+
+    br is only produced if the brotli package is installed. Bodies smaller
+    than min_size, and responses with a Content-Encoding of their own,
+    are not compressed. Encodings not smaller than the body are dropped.
+    """
+    def __init__(self, encodings=('br', 'gzip'), gzip_level=9, brotli_quality=11, min_size=1024):
+        self.encodings = tuple(encoding for encoding in encodings if encoding != 'br' or brotli is not None)
+        self.gzip_level = gzip_level
+        self.brotli_quality = brotli_quality
+        self.min_size = min_size
+
+    def compress(self, body):
+        """
+        Return a dict of the encodings of body worth keeping. Blocks, so
+        it is run in an executor.
+        """
+        if len(body) < self.min_size:
+            return {}
+        encoded = {}
+        for encoding in self.encodings:
+            if encoding == 'br':
+                data = brotli.compress(body, quality=self.brotli_quality)
+            else:
+                data = gzip.compress(body, self.gzip_level, mtime=0)
+            if len(data) < len(body):
+                encoded[encoding] = data
+        return encoded
+
+    def should_compress(self, response):
+        return 'Content-Encoding' not in response.headers
+
+
+@lru_cache(maxsize=1024)
+def choose_encoding(accept_encoding, encodings):
+    """
+    Return the first of encodings accepted by the Accept-Encoding header
+    value accept_encoding, or None.
+    """
+    if not accept_encoding:
+        return None
+    accepted = parse_accept_header(accept_encoding)
+    for encoding in encodings:
+        if accepted[encoding]:
+            return encoding
+    return None
@@ -0,0 +1,140 @@
+# -*- coding: utf-8 -*-
+"""
+    quart_cachecontrol.conditional
+    ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+    :copyright: (c) 2015 by Thomas Wiebe.
+    :copyright: (c) 2023 by Luckydonald.
+    :license: BSD, see LICENSE for more details.
+"""
+from inspect import iscoroutinefunction
+from zlib import crc32
+
+import quart
+from quart.wrappers.response import DataBody
+
+from .dispatch import CACHEABLE_METHODS
+
+# marks responses answering a matching precondition before the view ran
+NOT_MODIFIED_ATTR = 'cache_control_not_modified'
+
+
+class ConditionalResponseCallback(object):
+    """
+    Optionally adds an ETag hashed from the body to successful responses
+    qualifying for the policy, and turns them into 304 Not Modified if
+    the If-None-Match or If-Modified-Since preconditions of the request
+    match.
+
+    Buffered bodies are hashed at once, streamed bodies chunk by chunk.
+    The hash is CRC-32 plus the body length, which is cheap, and good
+    enough to tell revisions of the same resource apart.
+    """
+    def __init__(self, cache_callback, etag=False):
+        self._cache_callback = cache_callback
+        self._hash_etag = etag in (True, 'strong', 'weak')
+        self._weak_etag = etag == 'weak'
+
+    async def __call__(self, response):
+        if getattr(response, NOT_MODIFIED_ATTR, False):
+            make_not_modified(response)
+            return response
+        if not 200 <= response.status_code < 300 or not self._cache_callback.qualifies(response):
+            return response
+        if self._hash_etag and 'ETag' not in response.headers:
+            response.set_etag(await body_etag(response), self._weak_etag)
+        request = quart.request
+        if request.method in CACHEABLE_METHODS and is_not_modified(request, response):
+            make_not_modified(response)
+        return response
+
+
+class ConditionalViewDispatch(object):
+    """
+    Derives the ETag and/or Last-Modified validators of a view from its
+    arguments, before the view is called. If they match the request's
+    preconditions, the view is not called at all, and a 304 Not Modified
+    response is sent instead.
+
+    etag and last_modified may be functions or coroutine functions taking
+    the view arguments. etag returns the ETag value, last_modified a
+    datetime. Either may return None if no validator is known upfront.
+    """
+    def __init__(self, view, etag=None, last_modified=None):
+        self._view = view
+        self._etag = _ensure_async(etag)
+        self._last_modified = _ensure_async(last_modified)
+
+    async def dispatch(self, *a, **kw):
+        etag = await self._etag(*a, **kw) if self._etag is not None else None
+        last_modified = await self._last_modified(*a, **kw) if self._last_modified is not None else None
+        request = quart.request
+        app = quart.current_app
+        if (etag is not None or last_modified is not None) and request.method in CACHEABLE_METHODS:
+            # answered as if successful, to receive the policy's headers
+            response = app.response_class(b'')
+            _set_validators(response, etag, last_modified)
+            if is_not_modified(request, response):
+                setattr(response, NOT_MODIFIED_ATTR, True)
+                return response
+        response = await app.make_response(await self._view(*a, **kw))
+        if 'ETag' not in response.headers and 'Last-Modified' not in response.headers:
+            _set_validators(response, etag, last_modified)
+        return response
+
+
+async def body_etag(response):
+    """
+    Return an ETag value hashed from the response body.
+
+    Streamed bodies are consumed and replaced by the chunks read.
+    """
+    body = response.response
+    if isinstance(body, DataBody):
+        return '{:x}-{:08x}'.format(len(body.data), crc32(body.data))
+    checksum = length = 0
+    chunks = []
+    async with body as body_chunks:
+        async for chunk in body_chunks:
+            checksum = crc32(chunk, checksum)
+            length += len(chunk)
+            chunks.append(chunk)
+    response.response = response.iterable_body_class(chunks)
+    return '{:x}-{:08x}'.format(length, checksum)
+
+
+def is_not_modified(request, response):
+    if_none_match = request.if_none_match
+    if if_none_match:
+        etag, _ = response.get_etag()
+        return etag is not None and if_none_match.contains_weak(etag)
+    if_modified_since = request.if_modified_since
+    if if_modified_since is None:
+        return False
+    last_modified = response.last_modified
+    return last_modified is not None and last_modified <= if_modified_since
+
+
+def make_not_modified(response):
+    response.status_code = 304
+    response.response = response.data_body_class(b'')
+    response.headers.pop('Content-Length', None)
+
+
+def _set_validators(response, etag, last_modified):
+    if etag is not None:
+        if etag.startswith(('"', 'W/')):
+            response.headers['ETag'] = etag
+        else:
+            response.set_etag(etag)
+    if last_modified is not None:
+        response.last_modified = last_modified
+
+
+def _ensure_async(func):
+    if func is None or iscoroutinefunction(func):
+        return func
+
+    async def call(*a, **kw):
+        return func(*a, **kw)
+    return call
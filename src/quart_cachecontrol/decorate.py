@@ -8,20 +8,45 @@
     :license: BSD, see LICENSE for more details.
 """
 from datetime import timedelta
-from functools import wraps
+from functools import partial, wraps
 
 import quart
 
-from .callback import SetCacheControlHeadersCallback, SetVaryHeaderCallback
+from .callback import SetCacheControlHeadersCallback, SetCacheTagHeadersCallback, SetVaryHeaderCallback
+from .callback import NoopCallback, SetCacheControlHeadersByCredentialsCallback, SetNormalizedHeadersCallback
+from .callback import is_credentialed
 from .callback import SetCacheControlHeadersFromTimedeltaCallback, SetCacheControlHeadersForNoCachingCallback
+from .coalesce import SingleFlight
+from .compress import Compressor
+from .conditional import ConditionalResponseCallback, ConditionalViewDispatch
+from .dispatch import CachingViewDispatch, resolve_view_dispatch
+from .error import CacheControlPolicyInvalidError
 from .evaluator import ResponseIsSuccessful
+from .extension import EXTENSION_NAME
+from .normalize import NormalizingViewDispatch, normalizers_for
+from .policy import CachePolicy
+from .ttl import SetCacheControlHeadersFromTtlCallback
 
+STALE_DIRECTIVES = ('stale_while_revalidate', 'stale_if_error')
 
-def cache_for(only_if=ResponseIsSuccessful, vary=None, **timedelta_kw):
+# directives allowing shared caches to store responses to requests with Authorization, RFC 9111 3.5
+AUTHORIZED_SHARING_DIRECTIVES = ('public', 's_maxage', 'must_revalidate')
+
+
+def cache_for(only_if=ResponseIsSuccessful, vary=None, expires=True, *, executor=None, store=False, coalesce=False,
+              etag=False, last_modified=None, stale_while_revalidate=None, stale_if_error=None, tags=None,
+              normalize=None, compress=False, ttl=None, **timedelta_kw):
     """
     Set Cache-Control headers and Expires-header.
 
-    Takes timedelta instantiation kw args.
+    Takes timedelta instantiation kw args, or ttl as function of the
+    response returning a timedelta, seconds, or the datetime the response
+    expires at. The function may be a coroutine function, and gets the
+    view arguments from quart.request.view_args. Headers are rendered
+    once per distinct ttl.
+
+    The Expires-header is redundant next to max-age for HTTP/1.1 caches.
+    Provide expires=False to omit it.
 
     By default, only applies to successful requests (2xx status code).
     Provide only_if=Always to apply to all requests or supply custom
@@ -29,22 +54,83 @@ def cache_for(only_if=ResponseIsSuccessful, vary=None, **timedelta_kw):
 
     Optionally takes vary as list of headers. If given. Vary-header is
     returned for all requests - successful or failed.
+
+    Synchronous views run in executor, if given. Otherwise they run in
+    the executor of the CacheControl extension or the default executor.
+
+    Provide store=True to keep qualifying responses to GET and HEAD
+    requests in the response store of the app for as long as they are
+    fresh, keyed by app, host, endpoint, path, query string and the
+    headers in vary. A store instance may be given instead of True.
+
+    Provide coalesce=True to run the view only once for concurrent
+    requests with the same key. Waiting requests get a copy of the
+    response, if it would qualify for storing. A SingleFlight instance
+    may be given instead of True, to configure error and timeout handling.
+    The decorated view keeps it as cache_control_single_flight, whose
+    stats() count the coalesced requests.
+    Requests with an Authorization header are neither stored nor
+    coalesced.
+
+    Provide etag=True or etag='weak' to add a strong or weak ETag hashed
+    from the body of qualifying responses, or a function of the view
+    arguments returning the ETag value, and/or last_modified as function
+    of the view arguments returning a datetime. Functions may be
+    coroutine functions and run before the view. Requests whose
+    If-None-Match or If-Modified-Since preconditions match are answered
+    with 304 Not Modified, without calling the view if the functions
+    matched.
+
+    Optionally takes stale_while_revalidate and stale_if_error as
+    timedelta or seconds, to add the respective directives. With store,
+    expired responses are kept for as long. Within stale_while_revalidate
+    they are served while the view refreshes them in the background,
+    within stale_if_error when the view raises or fails with a 5xx.
+
+    Optionally takes tags as list, or as function of the view arguments
+    returning the list. Qualifying responses list them in Surrogate-Key
+    and Cache-Tag headers, and stored responses can be invalidated by tag
+    with invalidate_tags.
+
+    Optionally takes normalize as dict of request header names to
+    functions or Normalizer instances, mapping the header values to a few
+    buckets. The view gets the buckets from normalized_header, responses
+    send them in a header of their own, listed in Vary instead of the
+    request header, and stored responses are keyed by them.
+
+    Provide compress=True with store to compress stored responses once,
+    into the br (with brotli installed) and gzip encodings, served per
+    Accept-Encoding of the request. A Compressor instance may be given
+    instead of True, to configure encodings and levels.
     """
+    if ttl is not None and timedelta_kw:
+        raise CacheControlPolicyInvalidError('Give either ttl or timedelta arguments')
     max_age_timedelta = timedelta(**timedelta_kw)
-    cache_callback = only_if(SetCacheControlHeadersFromTimedeltaCallback(max_age_timedelta))
-    vary_callback = SetVaryHeaderCallback(vary)
-
-    def decorate_func(func):
-        @wraps(func)
-        async def decorate_func_call(*a, **kw):
-            quart.after_this_request(cache_callback)
-            quart.after_this_request(vary_callback)
-            return await quart.current_app.ensure_async(func)(*a, **kw)
-        return decorate_func_call
-    return decorate_func
+    stale_kw = {}
+    if stale_while_revalidate is not None:
+        stale_kw['stale_while_revalidate'] = _seconds(stale_while_revalidate)
+    if stale_if_error is not None:
+        stale_kw['stale_if_error'] = _seconds(stale_if_error)
+    ttl_callback = None
+    if ttl is None:
+        cache_callback = only_if(SetCacheControlHeadersFromTimedeltaCallback(max_age_timedelta, expires, **stale_kw))
+    else:
+        cache_callback = only_if(NoopCallback())
+        ttl_callback = SetCacheControlHeadersFromTtlCallback(cache_callback, ttl, expires, **stale_kw)
+    normalizers = normalizers_for(normalize)
+    compressor = _compressor(compress, store)
+    policy = _cache_policy(
+        'cache_for', only_if, cache_callback, etag, last_modified, tags, vary, normalizers, compressor,
+        max_age_timedelta.total_seconds() if ttl is None else None, ttl_callback, store)
+    single_flight = _single_flight(coalesce)
+    return _decorate_with(policy, executor, _view_dispatchers(
+        policy, vary, store, single_flight, max_age_timedelta.total_seconds() if ttl is None else ttl, etag,
+        last_modified, tags, normalizers, compressor, **stale_kw), single_flight)
 
 
-def cache(*cache_control_items, only_if=ResponseIsSuccessful, vary=None, **cache_control_kw):
+def cache(*cache_control_items, only_if=ResponseIsSuccessful, executor=None, vary=None, store=False, coalesce=False,
+          etag=False, last_modified=None, tags=None, normalize=None, compress=False, credentialed=None,
+          credential_cookies=(), partition=None, **cache_control_kw):
     """
     Set Cache-Control headers.
 
@@ -56,7 +142,7 @@ def cache(*cache_control_items, only_if=ResponseIsSuccessful, vary=None, **cache
     Use True as value for attributes without values.
 
     In case of an invalid attribute, CacheControlAttributeInvalidError
-    will be thrown.
+    will be thrown when the decorator is created.
 
     By default, only applies to successful requests (2xx status code).
     Provide only_if=Always to apply to all requests or supply custom
@@ -64,22 +150,87 @@ def cache(*cache_control_items, only_if=ResponseIsSuccessful, vary=None, **cache
 
     Optionally takes vary as list of headers. If given. Vary-header is
     returned for all requests - successful or failed.
+
+    Synchronous views run in executor, if given. Otherwise they run in
+    the executor of the CacheControl extension or the default executor.
+
+    Provide store=True to keep qualifying responses to GET and HEAD
+    requests in the response store of the app for as long as they are
+    fresh, keyed by app, host, endpoint, path, query string and the
+    headers in vary. A store instance may be given instead of True.
+
+    Provide coalesce=True to run the view only once for concurrent
+    requests with the same key. Waiting requests get a copy of the
+    response, if it would qualify for storing. A SingleFlight instance
+    may be given instead of True, to configure error and timeout handling.
+    The decorated view keeps it as cache_control_single_flight, whose
+    stats() count the coalesced requests.
+
+    Requests with an Authorization header are neither stored nor
+    coalesced, unless public, s_maxage or must_revalidate is given.
+
+    Storing requires max_age or s_maxage, which takes precedence, and
+    can't be combined with no_store or private. With store, expired
+    responses are kept for stale_while_revalidate seconds to be served
+    while the view refreshes them in the background, and stale_if_error
+    seconds to be served when the view raises or fails with a 5xx.
+
+    Optionally takes tags as list, or as function of the view arguments
+    returning the list. Qualifying responses list them in Surrogate-Key
+    and Cache-Tag headers, and stored responses can be invalidated by tag
+    with invalidate_tags.
+
+    Optionally takes normalize as dict of request header names to
+    functions or Normalizer instances, mapping the header values to a few
+    buckets. The view gets the buckets from normalized_header, responses
+    send them in a header of their own, listed in Vary instead of the
+    request header, and stored responses are keyed by them.
+
+    Provide compress=True with store to compress stored responses once,
+    into the br (with brotli installed) and gzip encodings, served per
+    Accept-Encoding of the request. A Compressor instance may be given
+    instead of True, to configure encodings and levels.
+
+    Provide credentialed=True to downgrade the headers of requests with
+    credentials, an Authorization header or any of the cookies named in
+    credential_cookies, to private, dropping public and s_maxage. A dict
+    of the attributes for credentialed requests may be given instead.
+    Vary lists partition, the headers carrying credentials by default,
+    Authorization, and Cookie with credential_cookies, so shared caches
+    keep anonymous responses apart from credentialed ones. Requests with credentials bypass the
+    response store.
     """
     cache_control_kw.update(cache_control_items)
-    cache_callback = only_if(SetCacheControlHeadersCallback(**cache_control_kw))
-    vary_callback = SetVaryHeaderCallback(vary)
-
-    def decorate_func(func):
-        @wraps(func)
-        async def decorate_func_call(*a, **kw):
-            quart.after_this_request(cache_callback)
-            quart.after_this_request(vary_callback)
-            return await quart.current_app.ensure_async(func)(*a, **kw)
-        return decorate_func_call
-    return decorate_func
+    if credentialed is None:
+        cache_callback = only_if(SetCacheControlHeadersCallback(**cache_control_kw))
+    else:
+        cache_callback = only_if(SetCacheControlHeadersByCredentialsCallback(
+            cache_control_kw, _credentialed_kw(credentialed, cache_control_kw), credential_cookies))
+        vary = list(vary or ()) + [
+            name for name in _partition_headers(partition, credential_cookies) if name not in (vary or ())]
+    normalizers = normalizers_for(normalize)
+    compressor = _compressor(compress, store)
+    ttl = cache_control_kw.get('s_maxage') or cache_control_kw.get('max_age')
+    policy = _cache_policy(
+        'cache', only_if, cache_callback, etag, last_modified, tags, vary, normalizers, compressor, ttl,
+        store=store)
+    if store is not False:
+        if cache_control_kw.get('no_store') or cache_control_kw.get('private'):
+            raise CacheControlPolicyInvalidError('Responses marked no_store or private can not be stored')
+        if not ttl:
+            raise CacheControlPolicyInvalidError('Storing responses requires max_age or s_maxage')
+    stale_kw = {name: cache_control_kw[name] for name in STALE_DIRECTIVES if cache_control_kw.get(name)}
+    bypass = None
+    if credentialed is not None:
+        bypass = partial(is_credentialed, credential_cookies=tuple(credential_cookies))
+    shares_authorized = any(cache_control_kw.get(name) for name in AUTHORIZED_SHARING_DIRECTIVES)
+    single_flight = _single_flight(coalesce)
+    return _decorate_with(policy, executor, _view_dispatchers(
+        policy, vary, store, single_flight, ttl, etag, last_modified, tags, normalizers, compressor, bypass,
+        shares_authorized=shares_authorized, **stale_kw), single_flight)
 
 
-def dont_cache(only_if=ResponseIsSuccessful):
+def dont_cache(only_if=ResponseIsSuccessful, executor=None):
     """
     Set Cache-Control headers for no caching
 
@@ -89,13 +240,119 @@ def dont_cache(only_if=ResponseIsSuccessful):
     By default, only applies to successful requests (2xx status code).
     Provide only_if=Always to apply to all requests or supply custom
     evaluator for customized behaviour.
+
+    Synchronous views run in executor, if given. Otherwise they run in
+    the executor of the CacheControl extension or the default executor.
     """
     cache_callback = only_if(SetCacheControlHeadersForNoCachingCallback())
+    return _decorate_with(CachePolicy(cache_callback, name='dont_cache'), executor)
+
+
+def _cache_policy(name, only_if, cache_callback, etag, last_modified, tags, vary=None, normalizers=(),
+                  compressor=None, ttl=None, ttl_callback=None, store=False):
+    request_vary = list(vary or ())
+    if normalizers:
+        # the buckets are listed in place of the request headers they normalize
+        normalized = {header_name for header_name, _, _ in normalizers}
+        vary = [header for header in vary or () if header not in normalized] + [
+            header for _, header, _ in normalizers]
+        request_vary += [header_name for header_name, _, _ in normalizers if header_name not in request_vary]
+    if compressor is not None and 'Accept-Encoding' not in (vary or ()):
+        # stored responses are served in the encoding the request accepts
+        vary = list(vary or ()) + ['Accept-Encoding']
+        if 'Accept-Encoding' not in request_vary:
+            request_vary.append('Accept-Encoding')
+    callbacks = [SetVaryHeaderCallback(vary)]
+    if normalizers:
+        callbacks.append(SetNormalizedHeadersCallback(normalizers))
+    if tags is not None:
+        callbacks.append(only_if(SetCacheTagHeadersCallback(tags)))
+    async_callbacks = []
+    if ttl_callback is not None:
+        async_callbacks.append(ttl_callback)
+    if etag is not False or last_modified is not None:
+        async_callbacks.append(ConditionalResponseCallback(cache_callback, etag))
+    return CachePolicy(
+        cache_callback, *callbacks, async_callbacks=async_callbacks, name=name, vary=vary or (), ttl=ttl,
+        request_vary=request_vary, store=store)
+
+
+def _view_dispatchers(policy, vary, store, single_flight, ttl, etag, last_modified, tags, normalizers=(),
+                      compressor=None, bypass=None, stale_while_revalidate=0, stale_if_error=0,
+                      shares_authorized=False):
+    """
+    Return the functions wrapping the view, innermost first.
+    """
+    view_dispatchers = []
+    if normalizers:
+        view_dispatchers.append(lambda view: NormalizingViewDispatch(view, normalizers).dispatch)
+    if store is not False or single_flight is not None:
+        view_dispatchers.append(lambda view: CachingViewDispatch(
+            view, policy, ttl or 0, vary, store, single_flight, stale_while_revalidate, stale_if_error, tags,
+            normalizers, compressor, bypass, shares_authorized).dispatch)
+    if callable(etag) or last_modified is not None:
+        view_dispatchers.append(
+            lambda view: ConditionalViewDispatch(view, etag if callable(etag) else None, last_modified).dispatch)
+    return view_dispatchers
 
+
+def _single_flight(coalesce):
+    if coalesce is False or coalesce is None:
+        return None
+    return SingleFlight() if coalesce is True else coalesce
+
+
+def _partition_headers(partition, credential_cookies):
+    if partition is None:
+        return ['Authorization', 'Cookie'] if credential_cookies else ['Authorization']
+    if isinstance(partition, str):
+        return [partition]
+    return list(partition)
+
+
+def _credentialed_kw(credentialed, cache_control_kw):
+    if credentialed is not True:
+        return dict(credentialed)
+    credentialed_kw = {
+        name: value for name, value in cache_control_kw.items() if name not in ('public', 's_maxage')}
+    credentialed_kw['private'] = True
+    return credentialed_kw
+
+
+def _compressor(compress, store):
+    if compress is False:
+        return None
+    if store is False:
+        raise CacheControlPolicyInvalidError('Compressing responses requires store')
+    return Compressor() if compress is True else compress
+
+
+def _seconds(duration):
+    if isinstance(duration, timedelta):
+        return int(duration.total_seconds())
+    return int(duration)
+
+
+def _decorate_with(policy, executor=None, view_dispatchers=(), single_flight=None):
     def decorate_func(func):
+        view = resolve_view_dispatch(func, executor)
+        for view_dispatcher in view_dispatchers:
+            view = view_dispatcher(view)
+
         @wraps(func)
         async def decorate_func_call(*a, **kw):
-            quart.after_this_request(cache_callback)
-            return await quart.current_app.ensure_async(func)(*a, **kw)
+            if EXTENSION_NAME not in quart.current_app.extensions:
+                quart.after_this_request(policy.process_response)
+            return await view(*a, **kw)
+        # picked up by the CacheControl extension, see extension.py
+        decorate_func_call.cache_control_policy = policy
+        decorate_func_call.cache_control_view = view
+        decorate_func_call.cache_control_wrapper = decorate_func_call
+        # the SingleFlight coalescing requests, for its stats(), or None
+        decorate_func_call.cache_control_single_flight = single_flight
         return decorate_func_call
+    # picked up by CacheRule, see rules.py
+    decorate_func.cache_control_policy = policy
+    decorate_func.cache_control_view_dispatchers = tuple(view_dispatchers)
+    decorate_func.cache_control_single_flight = single_flight
     return decorate_func
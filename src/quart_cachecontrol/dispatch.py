@@ -0,0 +1,233 @@
+# -*- coding: utf-8 -*-
+"""
+    quart_cachecontrol.dispatch
+    ~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+    :copyright: (c) 2015 by Thomas Wiebe.
+    :copyright: (c) 2023 by Luckydonald.
+    :license: BSD, see LICENSE for more details.
+"""
+import asyncio
+from contextvars import ContextVar, copy_context
+from functools import partial, wraps
+from inspect import iscoroutinefunction, isgenerator
+from time import monotonic
+
+import quart
+from quart.utils import run_sync_iterable
+from quart.wrappers.response import DataBody
+from werkzeug.exceptions import HTTPException
+
+from .compress import choose_encoding
+from .extension import EXTENSION_NAME, current_store
+from .metrics import STORE_RESULT_ATTR
+from .store import StoredResponse
+from .ttl import TTL_ATTR, resolve_ttl
+
+CACHEABLE_METHODS = frozenset(('GET', 'HEAD'))
+
+# set by the CacheWarmer, to refresh stored responses instead of serving them
+refreshing = ContextVar('cache_control_refreshing', default=False)
+
+
+def resolve_view_dispatch(func, executor=None):
+    """
+    Return a coroutine function calling the view `func`.
+
+    Coroutine functions are returned as they are. Synchronous views are
+    wrapped once to run in `executor`, falling back to the executor of the
+    CacheControl extension, and to the event loop's default executor if
+    neither is configured.
+    """
+    if iscoroutinefunction(func):
+        return func
+
+    @wraps(func)
+    async def run_sync_view(*a, **kw):
+        loop = asyncio.get_running_loop()
+        result = await loop.run_in_executor(
+            executor or _app_executor(), copy_context().run, partial(func, *a, **kw))
+        if isgenerator(result):
+            return run_sync_iterable(result)
+        return result
+    return run_sync_view
+
+
+def _app_executor():
+    state = quart.current_app.extensions.get(EXTENSION_NAME)
+    return state.executor if state is not None else None
+
+
+class CachingViewDispatch(object):
+    """
+    Serves requests to a view from a response store while a stored
+    response is fresh, and stores the responses qualifying for policy.
+    If single_flight is given, concurrent identical requests are
+    coalesced into a single call of the view.
+
+    Stored responses are kept past their expiry for the longer of
+    stale_while_revalidate and stale_if_error seconds. Within the former,
+    they are still served, while a background task refreshes them.
+    Within the latter, they are served if the view raises or responds
+    with a server error.
+
+    Stored responses are tagged with tags, a list or function of the view
+    arguments returning the list, to invalidate them by tag.
+
+    Requests for which bypass, a function of the request, returns True are
+    neither served from the store nor stored, and neither are requests
+    with an Authorization header, unless shares_authorized is true, as
+    for policies with public, s-maxage or must-revalidate.
+
+    If compressor is given, the bodies of stored responses are compressed
+    once in the executor of the app, and served in the encoding the
+    request accepts.
+
+    Responses are keyed by app, host, root path, endpoint, method, path,
+    query string and the values of the request headers named in vary, or
+    their buckets for the headers normalized by normalizers. Only GET and HEAD requests are
+    served from the store or coalesced. Streamed responses, responses
+    setting cookies and responses the view marked no-store or private
+    are never stored or shared.
+    """
+    def __init__(self, view, policy, ttl, vary=None, store=False, single_flight=None,
+                 stale_while_revalidate=0, stale_if_error=0, tags=(), normalizers=(), compressor=None, bypass=None,
+                 shares_authorized=False):
+        self._view = view
+        self._policy = policy
+        self._ttl = ttl
+        normalized = {name for name, _, _ in normalizers}
+        self._vary = tuple(name for name in vary if name not in normalized) if vary is not None else ()
+        self._normalizers = tuple((name, bucket) for name, _, bucket in normalizers)
+        self._store = store
+        self._single_flight = single_flight
+        self._stale_while_revalidate = stale_while_revalidate
+        self._stale_if_error = stale_if_error
+        self._keep_stale = max(stale_while_revalidate, stale_if_error)
+        self._tags = tags if tags is not None else ()
+        self._compressor = compressor
+        self._bypass = bypass
+        self._shares_authorized = shares_authorized
+        # keys refreshed in the background, and the tasks doing it
+        self._revalidating = {}
+
+    def key_for(self, request):
+        headers = request.headers
+        key = (quart.current_app.name, request.host, request.root_path, request.endpoint,
+               request.method, request.path, request.query_string) + tuple(headers.get(name) for name in self._vary)
+        if self._normalizers:
+            key += tuple(bucket(headers.get(name)) for name, bucket in self._normalizers)
+        return key
+
+    async def dispatch(self, *a, **kw):
+        request = quart.request
+        if request.method not in CACHEABLE_METHODS or (self._bypass is not None and self._bypass(request)):
+            return await self._view(*a, **kw)
+        if not self._shares_authorized and 'Authorization' in request.headers:
+            return await self._view(*a, **kw)
+        key = self.key_for(request)
+        store = stale = None
+        if self._store is not False:
+            store = self._store if self._store is not True else current_store()
+            now = store.clock()
+            entry = store.get(key, now) if not refreshing.get() else None
+            if entry is not None:
+                if now < entry.expires_at:
+                    return _with_store_result(self._entry_response(entry, now), 'hit')
+                if now < entry.expires_at + self._stale_while_revalidate:
+                    self._revalidate(key, store, a, kw)
+                    return _with_store_result(self._entry_response(entry, now), 'stale')
+                if now < entry.expires_at + self._stale_if_error:
+                    stale = entry
+        if stale is None:
+            return await self._respond(key, store, a, kw)
+        try:
+            response = await self._respond(key, store, a, kw)
+        except HTTPException as error:
+            if error.code < 500:
+                raise
+            return _with_store_result(self._entry_response(stale, now), 'stale')
+        except Exception:
+            quart.current_app.logger.exception('Serving stale response of %s, as its view failed', request.path)
+            return _with_store_result(self._entry_response(stale, now), 'stale')
+        if response.status_code >= 500:
+            return _with_store_result(self._entry_response(stale, now), 'stale')
+        return response
+
+    async def _respond(self, key, store, a, kw):
+        async def render():
+            return await self._render(key, store, a, kw)
+
+        if self._single_flight is None:
+            return (await render())[0]
+        (response, entry), is_leader = await self._single_flight.run(key, render)
+        if is_leader:
+            return response
+        if entry is None:
+            # not shareable, so this request needs a response of its own
+            return (await render())[0]
+        return self._entry_response(entry)
+
+    def _entry_response(self, entry, now=None):
+        if not entry.encodings:
+            return entry.to_response(now)
+        encoding = choose_encoding(quart.request.headers.get('Accept-Encoding'), tuple(entry.encodings))
+        return entry.to_response(now, encoding)
+
+    async def _render(self, key, store, a, kw):
+        response = await quart.current_app.make_response(await self._view(*a, **kw))
+        if not self._is_storable(response):
+            return response, None
+        now = store.clock() if store is not None else monotonic()
+        ttl = self._ttl
+        if callable(ttl):
+            ttl = await resolve_ttl(ttl, response)
+            # the policy renders its headers from the same ttl
+            setattr(response, TTL_ATTR, ttl)
+        expires_at = now + ttl
+        tags = self._tags(*a, **kw) if callable(self._tags) else self._tags
+        body = response.response.data
+        encodings = None
+        if self._compressor is not None and store is not None and self._compressor.should_compress(response):
+            loop = asyncio.get_running_loop()
+            encodings = await loop.run_in_executor(_app_executor(), self._compressor.compress, body)
+        entry = StoredResponse(
+            response.status_code, list(response.headers.items()), body, now, expires_at,
+            expires_at + self._keep_stale, tags, encodings)
+        if store is not None:
+            store.set(key, entry)
+            if entry.encodings:
+                response = self._entry_response(entry)
+            _with_store_result(response, 'stored')
+        return response, entry
+
+    def _revalidate(self, key, store, a, kw):
+        if key in self._revalidating:
+            return
+        app = quart.current_app._get_current_object()
+
+        @quart.copy_current_request_context
+        async def revalidate():
+            try:
+                await self._respond(key, store, a, kw)
+            except Exception:
+                app.logger.exception('Refreshing stale response of %s failed', quart.request.path)
+            finally:
+                del self._revalidating[key]
+        self._revalidating[key] = asyncio.ensure_future(revalidate())
+
+    def _is_storable(self, response):
+        if not isinstance(response.response, DataBody) or not self._policy.qualifies(response):
+            return False
+        headers = response.headers
+        if 'Set-Cookie' in headers:
+            return False
+        if 'Cache-Control' in headers:
+            cache_control = response.cache_control
+            return not (cache_control.no_store or cache_control.private)
+        return True
+
+
+def _with_store_result(response, result):
+    setattr(response, STORE_RESULT_ATTR, result)
+    return response
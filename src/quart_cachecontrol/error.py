@@ -20,3 +20,20 @@ class CacheControlAttributeInvalidError(QuartCacheControlError):
     def __str__(self):
         return 'Attribute {!r} not a valid Quart Cache-Control parameter'.format(
             self.attr_name)
+
+
+class CacheControlPolicyInvalidError(QuartCacheControlError):
+    def __init__(self, message):
+        self.message = message
+
+    def __str__(self):
+        return self.message
+
+
+class PurgeError(QuartCacheControlError):
+    def __init__(self, message, status=None):
+        self.message = message
+        self.status = status
+
+    def __str__(self):
+        return self.message
@@ -9,8 +9,33 @@
 """
 from abc import ABCMeta, abstractmethod
 
+import quart
 
-class OnlyIfEvaluatorBase(metaclass=ABCMeta):
+# status codes below this are looked up in a table, others never match a status condition
+STATUS_TABLE_SIZE = 600
+
+
+class OnlyIfEvaluatorMeta(ABCMeta):
+    """
+    Lets evaluator classes be combined with &, | and ~ into a Condition.
+    """
+    def __and__(cls, other):
+        return as_condition(cls) & other
+
+    def __rand__(cls, other):
+        return as_condition(other) & cls
+
+    def __or__(cls, other):
+        return as_condition(cls) | other
+
+    def __ror__(cls, other):
+        return as_condition(other) | cls
+
+    def __invert__(cls):
+        return ~as_condition(cls)
+
+
+class OnlyIfEvaluatorBase(metaclass=OnlyIfEvaluatorMeta):
     def __init__(self, callback):
         self._callback = callback
 
@@ -19,15 +44,202 @@ class OnlyIfEvaluatorBase(metaclass=ABCMeta):
             return self._callback(response)
         return response
 
+    @property
+    def callback(self):
+        return self._callback
+
+    def qualifies(self, response):
+        return self._response_qualifies(response)
+
     @abstractmethod
     def _response_qualifies(self, response):
         pass
 
 
+class Condition(object):
+    """
+    An only_if evaluator combined from status codes and predicates.
+
+    Conditions and evaluator classes combine with & (and), | (or) and
+    ~ (not). The result is compiled into a table of the matching status
+    codes and a tuple of the remaining tests, checked by a single
+    function when decorating.
+
+    response_only tells whether the tests only read the response, not
+    quart.request, and defaults to whether there are none.
+    """
+    def __init__(self, statuses=None, tests=(), response_only=None):
+        # bytes of STATUS_TABLE_SIZE flags, or None to match any status
+        self._statuses = statuses
+        # functions of the response, all of which must return True
+        self._tests = tuple(tests)
+        # whether the condition can be checked outside of a request context
+        self.response_only = not self._tests if response_only is None else response_only
+
+    def __call__(self, callback):
+        return ConditionEvaluator(callback, self.compile(), self.response_only)
+
+    def qualifies(self, response):
+        return self.compile()(response)
+
+    def compile(self):
+        """
+        Return a function of a response, checking the condition.
+        """
+        statuses, tests = self._statuses, self._tests
+        if statuses is None:
+            if not tests:
+                return _always
+            if len(tests) == 1:
+                return tests[0]
+            return lambda response: all(test(response) for test in tests)
+        if not tests:
+            def check(response):
+                status_code = response.status_code
+                return status_code < STATUS_TABLE_SIZE and statuses[status_code] == 1
+            return check
+
+        def check(response):
+            status_code = response.status_code
+            if status_code >= STATUS_TABLE_SIZE or statuses[status_code] == 0:
+                return False
+            for test in tests:
+                if not test(response):
+                    return False
+            return True
+        return check
+
+    def __and__(self, other):
+        other = as_condition(other)
+        if self._statuses is None:
+            statuses = other._statuses
+        elif other._statuses is None:
+            statuses = self._statuses
+        else:
+            statuses = bytes(a & b for a, b in zip(self._statuses, other._statuses))
+        return Condition(statuses, self._tests + other._tests, self.response_only and other.response_only)
+
+    def __rand__(self, other):
+        return as_condition(other) & self
+
+    def __or__(self, other):
+        other = as_condition(other)
+        if self._tests or other._tests:
+            first, second = self.compile(), other.compile()
+            return Condition(
+                tests=(lambda response: first(response) or second(response),),
+                response_only=self.response_only and other.response_only)
+        if self._statuses is None or other._statuses is None:
+            return Condition()
+        return Condition(bytes(a | b for a, b in zip(self._statuses, other._statuses)))
+
+    def __ror__(self, other):
+        return as_condition(other) | self
+
+    def __invert__(self):
+        if self._tests:
+            check = self.compile()
+            return Condition(tests=(lambda response: not check(response),), response_only=self.response_only)
+        if self._statuses is None:
+            return Condition(bytes(STATUS_TABLE_SIZE))
+        return Condition(bytes(1 - flag for flag in self._statuses))
+
+
+class ConditionEvaluator(OnlyIfEvaluatorBase):
+    """
+    Applies a callback to the responses matching a compiled Condition.
+    """
+    def __init__(self, callback, check, response_only=False):
+        super().__init__(callback)
+        self._check = check
+        self.response_only = response_only
+
+    def __call__(self, response):
+        if self._check(response):
+            return self._callback(response)
+        return response
+
+    def qualifies(self, response):
+        return self._check(response)
+
+    def _response_qualifies(self, response):
+        return self._check(response)
+
+
+class ResponseStatusIn(Condition):
+    """
+    Matches responses with any of the given status codes, or ranges of
+    status codes.
+    """
+    def __init__(self, *status_codes):
+        statuses = bytearray(STATUS_TABLE_SIZE)
+        for item in status_codes:
+            for status_code in (item if isinstance(item, range) else (item,)):
+                if 0 <= status_code < STATUS_TABLE_SIZE:
+                    statuses[status_code] = 1
+        super().__init__(bytes(statuses))
+
+
+class RequestMethodIn(Condition):
+    """
+    Matches responses to requests with any of the given methods.
+    """
+    def __init__(self, *methods):
+        methods = frozenset(method.upper() for method in methods)
+        super().__init__(tests=(lambda response: quart.request.method in methods,))
+
+
+class RequestHasHeader(Condition):
+    """
+    Matches responses to requests sending the given header.
+    """
+    def __init__(self, name):
+        super().__init__(tests=(lambda response: name in quart.request.headers,))
+
+
+class ResponseMimetypeIn(Condition):
+    """
+    Matches responses with any of the given mimetypes.
+    """
+    def __init__(self, *mimetypes):
+        mimetypes = frozenset(mimetype.lower() for mimetype in mimetypes)
+        super().__init__(tests=(lambda response: response.mimetype in mimetypes,), response_only=True)
+
+
+class ResponseContentLengthAtMost(Condition):
+    """
+    Matches responses with a known length of at most max_bytes.
+    """
+    def __init__(self, max_bytes):
+        def check(response):
+            content_length = response.content_length
+            return content_length is not None and content_length <= max_bytes
+        super().__init__(tests=(check,), response_only=True)
+
+
+def as_condition(only_if):
+    """
+    Return the Condition of an evaluator class or Condition.
+    """
+    if isinstance(only_if, Condition):
+        return only_if
+    condition = getattr(only_if, 'condition', None)
+    if condition is not None:
+        return condition
+    # evaluator classes of users, checked by their own method
+    return Condition(tests=(only_if(None)._response_qualifies,))
+
+
+def _always(response):
+    return True
+
+
 class Always(OnlyIfEvaluatorBase):
     """
     Matches all responses.
     """
+    condition = Condition()
+
     def _response_qualifies(self, response):
         return True
 
@@ -36,6 +248,8 @@ class ResponseIsSuccessful(OnlyIfEvaluatorBase):
     """
     Matches responses with a 2xx status code
     """
+    condition = ResponseStatusIn(range(200, 300))
+
     def _response_qualifies(self, response):
         return 200 <= response.status_code < 300
 
@@ -44,5 +258,7 @@ class ResponseIsSuccessfulOrRedirect(OnlyIfEvaluatorBase):
     """
     Matches responses with 2xx and 3xx status codes.
     """
+    condition = ResponseStatusIn(range(200, 400))
+
     def _response_qualifies(self, response):
         return 200 <= response.status_code < 400
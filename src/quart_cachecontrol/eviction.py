@@ -0,0 +1,202 @@
+# -*- coding: utf-8 -*-
+"""
+    quart_cachecontrol.eviction
+    ~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+    :copyright: (c) 2015 by Thomas Wiebe.
+    :copyright: (c) 2023 by Luckydonald.
+    :license: BSD, see LICENSE for more details.
+"""
+from abc import ABCMeta, abstractmethod
+from collections import OrderedDict
+
+
+class EvictionPolicyBase(metaclass=ABCMeta):
+    """
+    Decides which entries a bounded response store drops.
+
+    The store keeps the entries and the byte accounting, and tells the
+    policy about every insert, access and removal. Once the store is over
+    its budget, it asks the policy for victims until it fits again. All
+    operations are O(1).
+    """
+    def resize(self, max_bytes):
+        """
+        Called by the store with its byte budget, which may be None.
+        """
+
+    def record_miss(self, key):
+        """
+        Called for lookups of keys not in the store.
+        """
+
+    @abstractmethod
+    def record_access(self, key):
+        pass
+
+    @abstractmethod
+    def insert(self, key, size):
+        pass
+
+    @abstractmethod
+    def remove(self, key):
+        pass
+
+    @abstractmethod
+    def victim(self):
+        """
+        Forget and return the key of the entry to evict next.
+        """
+
+
+class LRUPolicy(EvictionPolicyBase):
+    """
+    Evicts the least recently used entry.
+    """
+    def __init__(self):
+        self._order = OrderedDict()
+
+    def record_access(self, key):
+        self._order.move_to_end(key)
+
+    def insert(self, key, size):
+        self._order[key] = size
+
+    def remove(self, key):
+        del self._order[key]
+
+    def victim(self):
+        return self._order.popitem(last=False)[0]
+
+
+# halves every 4 bit counter, see FrequencySketch._age
+_HALVE_TABLE = bytes(value >> 1 for value in range(256))
+
+
+class FrequencySketch(object):
+    """
+    Count-min sketch estimating how often keys were seen recently.
+
+    Keeps depth rows of width counters, saturating at 15. After
+    10 * width increments, all counters are halved, so the estimates
+    favour recent popularity.
+    """
+    _SEEDS = (0x9E3779B97F4A7C15, 0xC2B2AE3D27D4EB4F, 0x165667B19E3779F9, 0xD6E8FEB86659FD93)
+
+    def __init__(self, width=4096):
+        # round up to a power of two, to index by mask
+        self._mask = (1 << max(width - 1, 1).bit_length()) - 1
+        self._rows = tuple(bytearray(self._mask + 1) for _ in self._SEEDS)
+        self._sample_size = 10 * (self._mask + 1)
+        self._additions = 0
+
+    def _indexes(self, key):
+        h = hash(key)
+        mask = self._mask
+        return [((h ^ seed) * 0x2545F4914F6CDD1D >> 17) & mask for seed in self._SEEDS]
+
+    def increment(self, key):
+        for row, index in zip(self._rows, self._indexes(key)):
+            if row[index] < 15:
+                row[index] += 1
+        self._additions += 1
+        if self._additions >= self._sample_size:
+            self._age()
+
+    def frequency(self, key):
+        return min(row[index] for row, index in zip(self._rows, self._indexes(key)))
+
+    def _age(self):
+        self._rows = tuple(bytearray(row.translate(_HALVE_TABLE)) for row in self._rows)
+        self._additions //= 2
+
+
+class TinyLFUPolicy(EvictionPolicyBase):
+    """
+    W-TinyLFU: a small LRU admission window in front of a segmented LRU.
+
+    New entries enter the window, which holds window_share of the byte
+    budget. Entries leaving the window are only admitted to the main
+    segments if the frequency sketch estimates them to be more popular
+    than the entry they would displace, so one-hit wonders and scans do
+    not flush popular entries. Main entries accessed again are promoted
+    from probation to the protected segment, which holds
+    protected_share of the main segments.
+    """
+    def __init__(self, window_share=0.01, protected_share=0.8, sketch_width=4096):
+        self._window_share = window_share
+        self._protected_share = protected_share
+        self._sketch = FrequencySketch(sketch_width)
+        self._window = OrderedDict()
+        self._probation = OrderedDict()
+        self._protected = OrderedDict()
+        self._window_bytes = self._probation_bytes = self._protected_bytes = 0
+        self._window_max = self._main_max = self._protected_max = None
+
+    def resize(self, max_bytes):
+        if max_bytes is None:
+            self._window_max = self._main_max = self._protected_max = None
+        else:
+            self._window_max = max(int(max_bytes * self._window_share), 1)
+            self._main_max = max_bytes - self._window_max
+            self._protected_max = int(self._main_max * self._protected_share)
+
+    def record_miss(self, key):
+        self._sketch.increment(key)
+
+    def record_access(self, key):
+        self._sketch.increment(key)
+        if key in self._window:
+            self._window.move_to_end(key)
+        elif key in self._protected:
+            self._protected.move_to_end(key)
+        else:
+            size = self._probation.pop(key)
+            self._probation_bytes -= size
+            self._protected[key] = size
+            self._protected_bytes += size
+            self._demote_protected()
+
+    def insert(self, key, size):
+        self._sketch.increment(key)
+        self._window[key] = size
+        self._window_bytes += size
+
+    def remove(self, key):
+        if key in self._window:
+            self._window_bytes -= self._window.pop(key)
+        elif key in self._protected:
+            self._protected_bytes -= self._protected.pop(key)
+        else:
+            self._probation_bytes -= self._probation.pop(key)
+
+    def victim(self):
+        while self._window_max is not None and self._window_bytes > self._window_max:
+            candidate, size = self._window.popitem(last=False)
+            self._window_bytes -= size
+            main = self._probation or self._protected
+            if not main or self._probation_bytes + self._protected_bytes + size <= self._main_max:
+                self._admit(candidate, size)
+                continue
+            incumbent = next(iter(main))
+            if self._sketch.frequency(candidate) <= self._sketch.frequency(incumbent):
+                return candidate
+            self.remove(incumbent)
+            self._admit(candidate, size)
+            return incumbent
+        for segment in (self._probation, self._protected, self._window):
+            if segment:
+                key = next(iter(segment))
+                self.remove(key)
+                return key
+        raise KeyError('victim from empty policy')
+
+    def _admit(self, key, size):
+        self._probation[key] = size
+        self._probation_bytes += size
+
+    def _demote_protected(self):
+        while self._protected_max is not None and self._protected_bytes > self._protected_max:
+            key, size = self._protected.popitem(last=False)
+            self._protected_bytes -= size
+            self._admit(key, size)
@@ -0,0 +1,158 @@
+# -*- coding: utf-8 -*-
+"""
+    quart_cachecontrol.extension
+    ~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+    :copyright: (c) 2015 by Thomas Wiebe.
+    :copyright: (c) 2023 by Luckydonald.
+    :license: BSD, see LICENSE for more details.
+"""
+from concurrent.futures import ThreadPoolExecutor
+
+import quart
+
+from .analyzer import VaryRecordingPolicy
+from .metrics import InstrumentedPolicy
+from .store import DEFAULT_MAX_BYTES, MemoryStore, default_store
+
+EXTENSION_NAME = 'cachecontrol'
+
+
+class CacheControl(object):
+    """
+    Optional app extension applying the policies of decorated views.
+
+    Without the extension, every decorated view registers its policy with
+    quart.after_this_request on each request. With the extension, a single
+    after_request hook looks up the policy by request endpoint instead.
+    Once the app starts serving, decorated views are replaced by the
+    functions they wrap, so no extra wrapper runs per request either.
+
+    Synchronous decorated views without an executor of their own run in
+    executor, if given, or in a thread pool of max_workers threads, which
+    is shut down when the app stops serving. Without either, they run in
+    the event loop's default executor.
+
+    Views decorated with store=True keep their responses in store, or in
+    a MemoryStore of the app bounded to 64 MiB if not given.
+
+    Optionally takes a CacheMetrics instance as metrics, to count per
+    endpoint how the policies applied.
+
+    Views not decorated themselves get the policies of rules, a CacheRules
+    table, if given.
+
+    Optionally takes a VaryAnalyzer as vary_analyzer, to estimate the
+    variants the Vary headers of each endpoint produce.
+    """
+    def __init__(self, app=None, executor=None, max_workers=None, store=None, metrics=None, rules=None,
+                 vary_analyzer=None):
+        self._executor = executor
+        self._max_workers = max_workers
+        self._store = store
+        self._metrics = metrics
+        self._rules = rules
+        self._vary_analyzer = vary_analyzer
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        store = self._store if self._store is not None else MemoryStore(DEFAULT_MAX_BYTES)
+        state = CacheControlState(app, self._executor, store, self._metrics, self._rules, self._vary_analyzer)
+        if self._executor is None and self._max_workers is not None:
+            state.executor = ThreadPoolExecutor(self._max_workers, thread_name_prefix='quart-cachecontrol')
+            app.after_serving(state.shutdown_executor)
+        app.extensions[EXTENSION_NAME] = state
+        app.after_request(state.process_response)
+        app.before_serving(state.unwrap_views)
+        return state
+
+
+class CacheControlState(object):
+    """
+    Per app state of the CacheControl extension.
+    """
+    def __init__(self, app, executor=None, store=None, metrics=None, rules=None, vary_analyzer=None):
+        self.app = app
+        self.executor = executor
+        self.store = store
+        self.metrics = metrics
+        self.rules = rules
+        self.vary_analyzer = vary_analyzer
+        # endpoint -> CachePolicy, RulesPolicy, a wrapper of them or None, filled lazily
+        self._policies = {}
+        # endpoint -> CachePolicy of the views unwrapped
+        self.unwrapped_policies = {}
+
+    def policy_for(self, endpoint):
+        try:
+            return self._policies[endpoint]
+        except KeyError:
+            policy = self._policies[endpoint] = self._resolve_policy(endpoint)
+            return policy
+
+    def _resolve_policy(self, endpoint):
+        view = self.app.view_functions.get(endpoint)
+        policy = getattr(view, 'cache_control_policy', None)
+        if policy is None and self.rules is not None and endpoint is not None:
+            policy = self.rules.policy_for(self.app, endpoint)
+        return self._instrument(endpoint, policy)
+
+    def _instrument(self, endpoint, policy):
+        if policy is None:
+            return policy
+        vary = getattr(policy, 'request_vary', ())
+        if self.metrics is not None:
+            policy = InstrumentedPolicy(policy, self.metrics.slot(endpoint, policy.name), self.metrics.clock)
+        if self.vary_analyzer is not None and vary:
+            policy = VaryRecordingPolicy(policy, self.vary_analyzer.sketches_for(endpoint, vary))
+        return policy
+
+    async def process_response(self, response):
+        policy = self.policy_for(quart.request.endpoint)
+        if policy is None:
+            return response
+        return await policy.process_response(response)
+
+    async def unwrap_views(self):
+        view_functions = self.app.view_functions
+        for endpoint, view in list(view_functions.items()):
+            # views wrapped again by other decorators carry a copy of our
+            # attributes, but must keep their outer wrapper
+            if getattr(view, 'cache_control_wrapper', None) is not view:
+                continue
+            self.unwrapped_policies[endpoint] = view.cache_control_policy
+            self._policies[endpoint] = self._instrument(endpoint, view.cache_control_policy)
+            view_functions[endpoint] = view.cache_control_view
+
+    async def shutdown_executor(self):
+        self.executor.shutdown(wait=False)
+
+
+def decorated_policy(app, endpoint):
+    """
+    Return the CachePolicy endpoint is decorated with, or None, also after
+    the CacheControl extension unwrapped the view.
+    """
+    policy = getattr(app.view_functions.get(endpoint), 'cache_control_policy', None)
+    if policy is None:
+        state = app.extensions.get(EXTENSION_NAME)
+        if state is not None:
+            policy = state.unwrapped_policies.get(endpoint)
+    return policy
+
+
+def current_store():
+    """
+    Return the response store of the current app.
+    """
+    state = quart.current_app.extensions.get(EXTENSION_NAME)
+    return state.store if state is not None else default_store
+
+
+def invalidate_tags(*tags):
+    """
+    Delete the responses tagged with any of tags from the response store
+    of the current app, and return their number.
+    """
+    return current_store().invalidate_tags(*tags)
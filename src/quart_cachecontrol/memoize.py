@@ -0,0 +1,206 @@
+# -*- coding: utf-8 -*-
+"""
+    quart_cachecontrol.memoize
+    ~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+    :copyright: (c) 2015 by Thomas Wiebe.
+    :copyright: (c) 2023 by Luckydonald.
+    :license: BSD, see LICENSE for more details.
+"""
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future
+from datetime import timedelta
+from functools import wraps
+from inspect import iscoroutinefunction
+from time import monotonic
+
+from .coalesce import SingleFlight
+from .error import CacheControlPolicyInvalidError
+from .evaluator import Condition, OnlyIfEvaluatorBase, as_condition
+
+# separates positional from keyword arguments in keys
+_KW_MARK = object()
+_MISSING = object()
+
+
+def memoize_for(only_if=None, maxsize=1024, clock=monotonic, **timedelta_kw):
+    """
+    Keep the results of a function for the duration given by timedelta
+    instantiation kw args, as cache_for does for responses.
+
+    Results are keyed by the arguments of the function, which need to be
+    hashable. At most maxsize results are kept, dropping the least
+    recently used. Concurrent calls with the same arguments share a
+    single call of the function, coroutine functions within the event
+    loop, synchronous functions across threads.
+
+    Optionally takes only_if, as function of the result returning whether
+    to keep it, or as only_if evaluator for functions returning responses.
+    Results are shared between callers, so must not be modified.
+
+    The decorated function gets invalidate(*a, **kw), dropping the result
+    for the arguments, clear() and stats().
+    """
+    ttl = timedelta(**timedelta_kw).total_seconds()
+    if ttl <= 0:
+        raise CacheControlPolicyInvalidError('memoize_for needs a positive duration')
+
+    def decorate_func(func):
+        memo = Memo(ttl, _result_check(only_if), maxsize, clock)
+        if iscoroutinefunction(func):
+            single_flight = SingleFlight()
+
+            @wraps(func)
+            async def decorate_func_call(*a, **kw):
+                key = _key(a, kw)
+                result = memo.get(key)
+                if result is not _MISSING:
+                    return result
+
+                async def call():
+                    memo.begin(key)
+                    try:
+                        result = await func(*a, **kw)
+                    except BaseException:
+                        memo.abandon(key)
+                        raise
+                    return memo.complete(key, result)
+                return (await single_flight.run(key, call))[0]
+        else:
+            @wraps(func)
+            def decorate_func_call(*a, **kw):
+                key = _key(a, kw)
+                result, future, is_leader = memo.get_or_lead(key)
+                if result is not _MISSING:
+                    return result
+                if not is_leader:
+                    return future.result()
+                try:
+                    result = func(*a, **kw)
+                except BaseException as error:
+                    memo.abandon(key)
+                    future.set_exception(error)
+                    raise
+                future.set_result(memo.complete(key, result))
+                return result
+        decorate_func_call.invalidate = memo.invalidate
+        decorate_func_call.clear = memo.clear
+        decorate_func_call.stats = memo.stats
+        return decorate_func_call
+    return decorate_func
+
+
+class Memo(object):
+    """
+    Results of a memoized function, by key, with the keys of the calls in
+    flight. Results of calls invalidated while in flight are not kept.
+    """
+    def __init__(self, ttl, check=None, maxsize=1024, clock=monotonic):
+        self.ttl = ttl
+        self.check = check
+        self.maxsize = maxsize
+        self.clock = clock
+        # key -> (expires_at, result), least recently used first
+        self._results = OrderedDict()
+        # key -> Future of synchronous calls in flight, or None for coroutines
+        self._in_flight = {}
+        # keys of calls in flight invalidated, whose results are not kept
+        self._invalidated = set()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        with self._lock:
+            return self._get(key)
+
+    def get_or_lead(self, key):
+        """
+        Return a tuple of the result for key, or _MISSING, the Future of the
+        synchronous call for key in flight, and whether this caller leads
+        it, starting the call with a new Future if none is in flight.
+        """
+        with self._lock:
+            result = self._get(key)
+            if result is not _MISSING:
+                return result, None, False
+            future = self._in_flight.get(key)
+            if future is not None:
+                return _MISSING, future, False
+            future = self._in_flight[key] = Future()
+            return _MISSING, future, True
+
+    def begin(self, key):
+        with self._lock:
+            self._in_flight[key] = None
+
+    def abandon(self, key):
+        with self._lock:
+            self._done(key)
+
+    def complete(self, key, result):
+        with self._lock:
+            invalidated = self._done(key)
+            if not invalidated and (self.check is None or self.check(result)):
+                self._results[key] = (self.clock() + self.ttl, result)
+                self._results.move_to_end(key)
+                if len(self._results) > self.maxsize:
+                    self._results.popitem(last=False)
+        return result
+
+    def invalidate(self, *a, **kw):
+        """
+        Drop the result for the arguments, and return whether there was one.
+        """
+        key = _key(a, kw)
+        with self._lock:
+            if key in self._in_flight:
+                self._invalidated.add(key)
+            return self._results.pop(key, None) is not None
+
+    def clear(self):
+        with self._lock:
+            self._invalidated.update(self._in_flight)
+            self._results.clear()
+
+    def stats(self):
+        with self._lock:
+            return {
+                'entries': len(self._results),
+                'in_flight': len(self._in_flight),
+                'hits': self.hits,
+                'misses': self.misses,
+            }
+
+    def _get(self, key):
+        entry = self._results.get(key)
+        if entry is not None:
+            if self.clock() < entry[0]:
+                self._results.move_to_end(key)
+                self.hits += 1
+                return entry[1]
+            del self._results[key]
+        self.misses += 1
+        return _MISSING
+
+    def _done(self, key):
+        self._in_flight.pop(key, None)
+        if key in self._invalidated:
+            self._invalidated.discard(key)
+            return True
+        return False
+
+
+def _key(a, kw):
+    if not kw:
+        return a
+    return a + (_KW_MARK,) + tuple(sorted(kw.items()))
+
+
+def _result_check(only_if):
+    if only_if is None:
+        return None
+    if isinstance(only_if, Condition) or (isinstance(only_if, type) and issubclass(only_if, OnlyIfEvaluatorBase)):
+        return as_condition(only_if).compile()
+    return only_if
@@ -0,0 +1,131 @@
+# -*- coding: utf-8 -*-
+"""
+    quart_cachecontrol.metrics
+    ~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+    :copyright: (c) 2015 by Thomas Wiebe.
+    :copyright: (c) 2023 by Luckydonald.
+    :license: BSD, see LICENSE for more details.
+"""
+from time import perf_counter_ns
+
+# set on responses served from or put into a response store
+STORE_RESULT_ATTR = 'cache_control_store_result'
+
+# counter indexes within a slot
+QUALIFIED = 0
+SKIPPED = 1  # followed by one counter per status class, 1xx to 5xx
+STORED = 6
+HIT = 7
+STALE = 8
+CALLBACK_NS = 9
+SLOT_SIZE = 10
+
+_STORE_RESULT_INDEXES = {'stored': STORED, 'hit': HIT, 'stale': STALE}
+
+
+class CacheMetrics(object):
+    """
+    Counts per endpoint and decorator how many responses qualified for
+    the policy, how many were skipped by status class, how many were
+    stored in or served from a response store, and the time spent
+    applying the policy.
+
+    Counters live in a slot allocated once per endpoint, when the
+    CacheControl extension first resolves its policy. Install with
+    CacheControl(app, metrics=CacheMetrics()). Without metrics, the
+    extension applies policies without any instrumentation.
+    """
+    def __init__(self, clock=perf_counter_ns):
+        self.clock = clock
+        # (endpoint, decorator) -> list of SLOT_SIZE counters
+        self._slots = {}
+
+    def slot(self, endpoint, decorator):
+        return self._slots.setdefault((endpoint, decorator), [0] * SLOT_SIZE)
+
+    def snapshot(self):
+        """
+        Return the counters as list of dicts, e.g. to pass them on to a
+        metrics backend from a callback.
+        """
+        return [
+            {
+                'endpoint': endpoint,
+                'decorator': decorator,
+                'qualified': slot[QUALIFIED],
+                'skipped': {'{}xx'.format(status_class): slot[SKIPPED + status_class - 1] for status_class in range(1, 6)},
+                'stored': slot[STORED],
+                'hits': slot[HIT],
+                'stale_hits': slot[STALE],
+                'callback_seconds': slot[CALLBACK_NS] / 1e9,
+            }
+            for (endpoint, decorator), slot in sorted(self._slots.items(), key=lambda item: str(item[0]))
+        ]
+
+    def prometheus_text(self):
+        """
+        Return the counters in the Prometheus text exposition format.
+        """
+        lines = [
+            '# HELP quart_cachecontrol_responses_total Responses of decorated views by policy outcome.',
+            '# TYPE quart_cachecontrol_responses_total counter',
+        ]
+        callback_lines = [
+            '# HELP quart_cachecontrol_callback_seconds_total Time spent applying cache policies.',
+            '# TYPE quart_cachecontrol_callback_seconds_total counter',
+        ]
+        for metrics in self.snapshot():
+            labels = 'endpoint="{}",decorator="{}"'.format(
+                _escape_label(metrics['endpoint']), _escape_label(metrics['decorator']))
+            lines.append('quart_cachecontrol_responses_total{{{},outcome="qualified"}} {}'.format(
+                labels, metrics['qualified']))
+            for status_class, count in metrics['skipped'].items():
+                lines.append('quart_cachecontrol_responses_total{{{},outcome="skipped",status_class="{}"}} {}'.format(
+                    labels, status_class, count))
+            for outcome in ('stored', 'hits', 'stale_hits'):
+                lines.append('quart_cachecontrol_responses_total{{{},outcome="{}"}} {}'.format(
+                    labels, outcome, metrics[outcome]))
+            callback_lines.append('quart_cachecontrol_callback_seconds_total{{{}}} {}'.format(
+                labels, metrics['callback_seconds']))
+        return '\n'.join(lines + callback_lines) + '\n'
+
+    def add_url_rule(self, app, rule='/metrics', endpoint='cache_control_metrics'):
+        """
+        Serve the counters in the Prometheus text format at rule.
+        """
+        async def metrics_view():
+            return self.prometheus_text(), 200, {'Content-Type': 'text/plain; version=0.0.4; charset=utf-8'}
+        app.add_url_rule(rule, endpoint, metrics_view)
+
+
+class InstrumentedPolicy(object):
+    """
+    Applies a policy like CachePolicy.process_response, counting the
+    outcome into a CacheMetrics slot.
+    """
+    def __init__(self, policy, slot, clock):
+        self._policy = policy
+        self._slot = slot
+        self._clock = clock
+
+    def qualifies(self, response):
+        return self._policy.qualifies(response)
+
+    async def process_response(self, response):
+        started = self._clock()
+        slot = self._slot
+        if self._policy.qualifies(response):
+            slot[QUALIFIED] += 1
+        else:
+            slot[SKIPPED + min(max(response.status_code // 100, 1), 5) - 1] += 1
+        store_result = getattr(response, STORE_RESULT_ATTR, None)
+        if store_result is not None:
+            slot[_STORE_RESULT_INDEXES[store_result]] += 1
+        response = await self._policy.process_response(response)
+        slot[CALLBACK_NS] += self._clock() - started
+        return response
+
+
+def _escape_label(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
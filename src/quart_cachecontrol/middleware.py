@@ -0,0 +1,188 @@
+# -*- coding: utf-8 -*-
+"""
+    quart_cachecontrol.middleware
+    ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+    :copyright: (c) 2015 by Thomas Wiebe.
+    :copyright: (c) 2023 by Luckydonald.
+    :license: BSD, see LICENSE for more details.
+"""
+from functools import lru_cache
+
+from werkzeug.datastructures import ResponseCacheControl
+from werkzeug.http import parse_cache_control_header
+
+from .callback import CompiledCacheControlCallbackBase, NoopCallback, SetCacheControlHeadersFromTimedeltaCallback, \
+    SetCacheTagHeadersCallback, SetVaryHeaderCallback
+from .clock import http_date_clock
+from .error import CacheControlPolicyInvalidError
+from .evaluator import ConditionEvaluator, OnlyIfEvaluatorBase
+from .rules import CacheRules
+
+
+class CacheControlMiddleware(object):
+    """
+    ASGI middleware applying the policies of rules, a list of CacheRule,
+    to the raw headers of the http.response.start message, without
+    building Quart or werkzeug objects per response. Bodies, streamed or
+    not, pass through untouched.
+
+    Rules are matched against the request path instead of the URL rule,
+    so endpoint and blueprint criteria are not supported. Neither are
+    policies depending on the request or running after the view, such as
+    callable tags or etag; only_if predicates may check the status,
+    mimetype and content length of the response only. The candidates of
+    the max_paths most recent paths are kept.
+
+    Wrap the ASGI app of Quart with it:
+
+        app.asgi_app = CacheControlMiddleware(app.asgi_app, rules)
+    """
+    def __init__(self, app, rules, max_paths=4096):
+        self.app = app
+        self._rules = CacheRules(rules)
+        for rule in self._rules.rules:
+            if rule.endpoint is not None or rule.blueprint is not None:
+                raise CacheControlPolicyInvalidError('The middleware matches rules by path only')
+        self._compiled = tuple(RawHeaderPolicy(rule.policy) for rule in self._rules.rules)
+        self._candidates = lru_cache(max_paths)(self._resolve)
+
+    def _resolve(self, path):
+        rules = self._rules.rules
+        return tuple(
+            (rules[index].methods, rules[index].mimetypes, self._compiled[index])
+            for index in sorted(self._rules.pattern_matches(path)))
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] != 'http':
+            return await self.app(scope, receive, send)
+        method = scope['method']
+        candidates = [
+            (mimetypes, policy) for methods, mimetypes, policy in self._candidates(scope['path'])
+            if methods is None or method in methods]
+        if not candidates:
+            return await self.app(scope, receive, send)
+
+        async def send_with_policy(message):
+            if message['type'] == 'http.response.start':
+                message = _apply_first(candidates, message)
+            await send(message)
+        await self.app(scope, receive, send_with_policy)
+
+
+def _apply_first(candidates, message):
+    start = ResponseStart(message['status'], message.get('headers', ()))
+    for mimetypes, policy in candidates:
+        if mimetypes is None or start.mimetype in mimetypes:
+            return dict(message, headers=policy.apply(start))
+    return message
+
+
+class ResponseStart(object):
+    """
+    The status and raw headers of an http.response.start message, with
+    the attributes only_if evaluators check.
+    """
+    def __init__(self, status_code, headers):
+        self.status_code = status_code
+        self.raw_headers = list(headers)
+
+    def header(self, name):
+        for header_name, value in self.raw_headers:
+            if header_name.lower() == name:
+                return value
+        return None
+
+    @property
+    def mimetype(self):
+        content_type = self.header(b'content-type')
+        if content_type is None:
+            return None
+        return content_type.split(b';', 1)[0].strip().lower().decode('latin-1')
+
+    @property
+    def content_length(self):
+        content_length = self.header(b'content-length')
+        return int(content_length) if content_length is not None else None
+
+
+class RawHeaderPolicy(object):
+    """
+    The headers a CachePolicy sets, rendered as raw header values once.
+    """
+    def __init__(self, policy):
+        if policy.async_callbacks:
+            raise CacheControlPolicyInvalidError('The middleware can not apply policies with etag or ttl')
+        self._qualifies = policy.qualifies
+        self._vary = None
+        self._cache_control = None
+        self._cache_control_kw = {}
+        self._expires_in = None
+        self._qualified_headers = []
+        for callback in policy.callbacks:
+            if isinstance(callback, OnlyIfEvaluatorBase):
+                if not _is_response_only(callback):
+                    raise CacheControlPolicyInvalidError(
+                        'The middleware can not apply only_if conditions depending on the request')
+                callback = callback.callback
+            if isinstance(callback, CompiledCacheControlCallbackBase):
+                self._cache_control = callback._cache_control_header.encode('latin-1')
+                self._cache_control_kw = callback._cache_control_kw
+                if isinstance(callback, SetCacheControlHeadersFromTimedeltaCallback) and callback._expires:
+                    self._expires_in = callback._seconds
+            elif isinstance(callback, SetVaryHeaderCallback):
+                if callback._vary_header is not None:
+                    self._vary = callback._vary_header.encode('latin-1')
+            elif isinstance(callback, SetCacheTagHeadersCallback) and callback._headers is not None:
+                if callback._headers:
+                    surrogate_key, cache_tag = callback._headers
+                    self._qualified_headers += [
+                        (b'surrogate-key', surrogate_key.encode('latin-1')),
+                        (b'cache-tag', cache_tag.encode('latin-1'))]
+            elif not isinstance(callback, NoopCallback):
+                raise CacheControlPolicyInvalidError(
+                    'The middleware can not apply {}'.format(type(callback).__name__))
+
+    def apply(self, start):
+        """
+        Return the raw headers of start with the headers of the policy.
+        """
+        headers = start.raw_headers
+        if self._vary is not None:
+            headers = _without(headers, b'vary')
+            headers.append((b'vary', self._vary))
+        if not self._qualifies(start):
+            return headers
+        existing = start.header(b'cache-control')
+        if existing is None:
+            if self._cache_control:
+                headers.append((b'cache-control', self._cache_control))
+        else:
+            headers = _without(headers, b'cache-control')
+            merged = self._merge_cache_control(existing)
+            if merged:
+                headers.append((b'cache-control', merged))
+        if self._expires_in is not None:
+            headers = _without(headers, b'expires')
+            headers.append((b'expires', http_date_clock.http_date_in(self._expires_in).encode('latin-1')))
+        headers.extend(self._qualified_headers)
+        return headers
+
+    def _merge_cache_control(self, existing):
+        # only if the app set Cache-Control itself
+        cache_control = parse_cache_control_header(existing.decode('latin-1'), cls=ResponseCacheControl)
+        for attr_name, value in self._cache_control_kw.items():
+            setattr(cache_control, attr_name, value)
+        return cache_control.to_header().encode('latin-1')
+
+
+def _is_response_only(evaluator):
+    if isinstance(evaluator, ConditionEvaluator):
+        return evaluator.response_only
+    # evaluator classes are response only if their condition is, e.g. ResponseIsSuccessful
+    condition = getattr(type(evaluator), 'condition', None)
+    return condition is not None and condition.response_only
+
+
+def _without(headers, name):
+    return [(header_name, value) for header_name, value in headers if header_name.lower() != name]
@@ -0,0 +1,110 @@
+# -*- coding: utf-8 -*-
+"""
+    quart_cachecontrol.normalize
+    ~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+    :copyright: (c) 2015 by Thomas Wiebe.
+    :copyright: (c) 2023 by Luckydonald.
+    :license: BSD, see LICENSE for more details.
+"""
+import re
+from functools import lru_cache
+
+import quart
+from werkzeug.datastructures import LanguageAccept
+from werkzeug.http import parse_accept_header
+
+# set on quart.g, header name -> bucket of the current request
+BUCKETS_ATTR = 'cache_control_buckets'
+
+_MOBILE_USER_AGENT = re.compile(r'Mobi|Android|iPhone|iPad|iPod|Opera Mini|IEMobile', re.IGNORECASE)
+
+
+class Normalizer(object):
+    """
+    Maps the values of a request header to a small set of buckets with
+    func, a function of the header value, or None if not sent. The
+    bucket is sent in the response header header, which Vary lists
+    instead of the request header. Results of func are kept for the
+    maxsize most recent values.
+    """
+    def __init__(self, func, header=None, maxsize=1024):
+        self.func = func
+        self.header = header
+        self.bucket = lru_cache(maxsize)(func)
+
+    def header_for(self, name):
+        return self.header or 'X-{}-Bucket'.format(name)
+
+
+def normalizers_for(normalize):
+    """
+    Return (request header, response header, bucket function) tuples for
+    normalize, a dict of request header names to Normalizer or function.
+    """
+    if not normalize:
+        return ()
+    normalizers = []
+    for name, normalizer in normalize.items():
+        if not isinstance(normalizer, Normalizer):
+            normalizer = Normalizer(normalizer)
+        normalizers.append((name, normalizer.header_for(name), normalizer.bucket))
+    return tuple(normalizers)
+
+
+class NormalizingViewDispatch(object):
+    """
+    Puts the buckets of the normalized request headers on quart.g before
+    calling the view, see normalized_header.
+    """
+    def __init__(self, view, normalizers):
+        self._view = view
+        self._normalizers = normalizers
+
+    async def dispatch(self, *a, **kw):
+        headers = quart.request.headers
+        setattr(quart.g, BUCKETS_ATTR, {
+            name: bucket(headers.get(name)) for name, _, bucket in self._normalizers})
+        return await self._view(*a, **kw)
+
+
+def normalized_header(name, default=None):
+    """
+    Return the bucket of the request header name normalized for the
+    current view, or default.
+    """
+    return getattr(quart.g, BUCKETS_ATTR, {}).get(name, default)
+
+
+def accept_encoding(value):
+    """
+    Buckets Accept-Encoding into br, gzip and identity.
+    """
+    if value:
+        accepted = parse_accept_header(value)
+        for encoding in ('br', 'gzip'):
+            if accepted[encoding]:
+                return encoding
+    return 'identity'
+
+
+class AcceptLanguage(object):
+    """
+    Buckets Accept-Language into the best matching of the supported
+    languages, or default.
+    """
+    def __init__(self, supported, default=None):
+        self.supported = tuple(supported)
+        self.default = default if default is not None else self.supported[0]
+
+    def __call__(self, value):
+        if not value:
+            return self.default
+        return parse_accept_header(value, LanguageAccept).best_match(self.supported, self.default)
+
+
+def device_class(value):
+    """
+    Buckets User-Agent into mobile and desktop.
+    """
+    return 'mobile' if value and _MOBILE_USER_AGENT.search(value) else 'desktop'
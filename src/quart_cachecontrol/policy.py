@@ -0,0 +1,57 @@
+# -*- coding: utf-8 -*-
+"""
+    quart_cachecontrol.policy
+    ~~~~~~~~~~~~~~~~~~~~~~~~~
+
+    :copyright: (c) 2015 by Thomas Wiebe.
+    :copyright: (c) 2023 by Luckydonald.
+    :license: BSD, see LICENSE for more details.
+"""
+
+
+class CachePolicy(object):
+    """
+    The callbacks a decorator applies to the responses of a view.
+    """
+    def __init__(self, cache_callback, *callbacks, async_callbacks=(), name=None, vary=(), ttl=None,
+                 request_vary=None, store=False):
+        # the decorator creating the policy, as reported in metrics
+        self.name = name
+        # the headers listed in Vary
+        self.vary = tuple(vary)
+        # the request headers responses vary by, differing from vary for normalized headers
+        self.request_vary = tuple(request_vary) if request_vary is not None else self.vary
+        # seconds qualifying responses are fresh for, if known
+        self.ttl = ttl
+        # the response store of the view, True for the one of the app, or False
+        self.store = store
+        self._cache_callback = cache_callback
+        self._callbacks = (cache_callback,) + callbacks
+        # coroutine functions run after the others, e.g. to answer with 304
+        self._async_callbacks = tuple(async_callbacks)
+
+    @property
+    def callbacks(self):
+        return self._callbacks
+
+    @property
+    def async_callbacks(self):
+        return self._async_callbacks
+
+    def qualifies(self, response):
+        """
+        Whether the only_if evaluator of the policy matches response.
+        """
+        return self._cache_callback.qualifies(response)
+
+    def __call__(self, response):
+        for callback in self._callbacks:
+            response = callback(response)
+        return response
+
+    async def process_response(self, response):
+        # a coroutine function, so Quart does not hand it to an executor
+        response = self(response)
+        for callback in self._async_callbacks:
+            response = await callback(response)
+        return response
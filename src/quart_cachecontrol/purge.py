@@ -0,0 +1,265 @@
+# -*- coding: utf-8 -*-
+"""
+    quart_cachecontrol.purge
+    ~~~~~~~~~~~~~~~~~~~~~~~~
+
+    :copyright: (c) 2015 by Thomas Wiebe.
+    :copyright: (c) 2023 by Luckydonald.
+    :license: BSD, see LICENSE for more details.
+"""
+import asyncio
+import logging
+from time import perf_counter
+from urllib.parse import urlsplit
+
+from .error import PurgeError
+
+logger = logging.getLogger(__name__)
+
+
+class PurgeDispatcher(object):
+    """
+    Collects purges of URLs and surrogate keys from app code, and sends
+    them to reverse proxies or CDNs through transport, e.g. an
+    HTTPPurgeTransport.
+
+    Purges are deduplicated and sent window seconds after the first one
+    not sent yet, URLs one request each, keys max_batch per request. At
+    most concurrency requests run at once. Failed requests are retried
+    up to retries times, waiting backoff seconds, doubled each attempt.
+
+    Purges are sent by a task of the running event loop; call close() to
+    send the pending ones and stop. init_app does both with the app.
+    """
+    def __init__(self, transport, window=0.1, max_batch=256, concurrency=4, retries=3, backoff=0.1):
+        self.transport = transport
+        self.window = window
+        self.max_batch = max_batch
+        self.concurrency = concurrency
+        self.retries = retries
+        self.backoff = backoff
+        self._urls = set()
+        self._keys = set()
+        self._flush_handle = None
+        self._flushing = set()
+        self._semaphore = None
+        self.requested = 0
+        self.sent = 0
+        self.failed = 0
+        self.retried = 0
+        self.batches = 0
+        self.batch_seconds = 0.0
+        self.last_batch_seconds = None
+
+    def init_app(self, app):
+        @app.after_serving
+        async def close_purge_dispatcher():
+            await self.close()
+
+    def purge_urls(self, *urls):
+        """
+        Purge the responses of urls, absolute or paths.
+        """
+        self.requested += len(urls)
+        self._urls.update(urls)
+        self._schedule()
+
+    def purge_keys(self, *keys):
+        """
+        Purge the responses tagged with any of keys, e.g. the tags of
+        cache_for and cache.
+        """
+        self.requested += len(keys)
+        self._keys.update(keys)
+        self._schedule()
+
+    async def flush(self):
+        """
+        Send the pending purges now, and wait for all purges being sent.
+        """
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+        if self._urls or self._keys:
+            await self._send_batch()
+        if self._flushing:
+            await asyncio.gather(*self._flushing, return_exceptions=True)
+
+    async def close(self):
+        await self.flush()
+        await self.transport.close()
+
+    def stats(self):
+        return {
+            'requested': self.requested,
+            'sent': self.sent,
+            'failed': self.failed,
+            'retried': self.retried,
+            'pending': len(self._urls) + len(self._keys),
+            'dedupe_ratio': 1 - (self.sent + self.failed) / self.requested if self.requested else 0.0,
+            'batches': self.batches,
+            'mean_batch_seconds': self.batch_seconds / self.batches if self.batches else None,
+            'last_batch_seconds': self.last_batch_seconds,
+        }
+
+    def _schedule(self):
+        if self._flush_handle is None:
+            loop = asyncio.get_running_loop()
+            self._flush_handle = loop.call_later(self.window, self._start_batch)
+
+    def _start_batch(self):
+        self._flush_handle = None
+        task = asyncio.ensure_future(self._send_batch())
+        self._flushing.add(task)
+        task.add_done_callback(self._flushing.discard)
+
+    async def _send_batch(self):
+        urls, self._urls = sorted(self._urls), set()
+        keys, self._keys = sorted(self._keys), set()
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.concurrency)
+        started = perf_counter()
+        sends = [self._send(self.transport.purge_url, url, 1) for url in urls]
+        sends += [
+            self._send(self.transport.purge_keys, keys[start:start + self.max_batch], len(keys[start:start + self.max_batch]))
+            for start in range(0, len(keys), self.max_batch)]
+        try:
+            await asyncio.gather(*sends)
+        finally:
+            self.last_batch_seconds = perf_counter() - started
+            self.batch_seconds += self.last_batch_seconds
+            self.batches += 1
+
+    async def _send(self, send, purge, count):
+        for attempt in range(self.retries + 1):
+            if attempt:
+                self.retried += 1
+                await asyncio.sleep(self.backoff * 2 ** (attempt - 1))
+            try:
+                async with self._semaphore:
+                    await send(purge)
+            except (OSError, asyncio.TimeoutError, PurgeError) as error:
+                last_error = error
+                continue
+            except Exception:
+                self.failed += count
+                logger.exception('Purging %r failed', purge)
+                return
+            self.sent += count
+            return
+        self.failed += count
+        logger.error('Purging %r failed: %s', purge, last_error)
+
+
+class HTTPPurgeTransport(object):
+    """
+    Sends purges to the reverse proxy or CDN at base_url over up to
+    pool_size kept-alive HTTP/1.1 connections.
+
+    URLs are purged with a method request, PURGE by default, for their
+    path, carrying their host, if absolute. Keys are purged with a
+    single method request for the path of base_url, listing them space
+    separated in key_header. Responses other than 2xx raise PurgeError.
+    """
+    def __init__(self, base_url, method='PURGE', key_header='Surrogate-Key', pool_size=4, timeout=5.0,
+                 headers=None):
+        url = urlsplit(base_url)
+        self.host = url.hostname
+        self.port = url.port or (443 if url.scheme == 'https' else 80)
+        self.ssl = url.scheme == 'https'
+        self.netloc = url.netloc
+        self.path = url.path or '/'
+        self.method = method
+        self.key_header = key_header
+        self.timeout = timeout
+        self.headers = dict(headers or {})
+        self._idle = []
+        self._connections = None
+        self._pool_size = pool_size
+
+    async def purge_url(self, url):
+        url = urlsplit(url)
+        path = (url.path or '/') + ('?' + url.query if url.query else '')
+        await self.request(path, {'Host': url.netloc or self.netloc})
+
+    async def purge_keys(self, keys):
+        await self.request(self.path, {'Host': self.netloc, self.key_header: ' '.join(keys)})
+
+    async def request(self, path, headers):
+        """
+        Send a method request for path with headers, and return the status.
+        """
+        if self._connections is None:
+            self._connections = asyncio.Semaphore(self._pool_size)
+        async with self._connections:
+            reader, writer = await self._connection()
+            try:
+                status, keep_alive = await asyncio.wait_for(self._exchange(reader, writer, path, headers), self.timeout)
+            except BaseException:
+                writer.close()
+                raise
+            if keep_alive:
+                self._idle.append((reader, writer))
+            else:
+                writer.close()
+        if not 200 <= status < 300:
+            raise PurgeError('{} {} answered {}'.format(self.method, path, status), status)
+        return status
+
+    async def close(self):
+        idle, self._idle = self._idle, []
+        for _, writer in idle:
+            writer.close()
+
+    async def _connection(self):
+        while self._idle:
+            reader, writer = self._idle.pop()
+            if not reader.at_eof() and not writer.is_closing():
+                return reader, writer
+            writer.close()
+        return await asyncio.wait_for(asyncio.open_connection(self.host, self.port, ssl=self.ssl), self.timeout)
+
+    async def _exchange(self, reader, writer, path, headers):
+        lines = ['{} {} HTTP/1.1'.format(self.method, path)]
+        lines += ['{}: {}'.format(name, value) for name, value in dict(self.headers, **headers).items()]
+        lines += ['Content-Length: 0', '', '']
+        writer.write('\r\n'.join(lines).encode('latin-1'))
+        await writer.drain()
+        status, response_headers = await self._read_head(reader)
+        # interim responses precede the final one
+        while 100 <= status < 200:
+            status, response_headers = await self._read_head(reader)
+        if status in (204, 304) or self.method == 'HEAD':
+            return status, response_headers.get('connection', '').lower() != 'close'
+        try:
+            if response_headers.get('transfer-encoding', '').lower() == 'chunked':
+                while True:
+                    size = int((await reader.readline()).split(b';')[0], 16)
+                    await reader.readexactly(size + 2)
+                    if not size:
+                        break
+            elif 'content-length' in response_headers:
+                await reader.readexactly(int(response_headers['content-length']))
+            else:
+                await reader.read()
+                return status, False
+        except (ValueError, asyncio.IncompleteReadError) as error:
+            raise PurgeError('Malformed response body from {}: {}'.format(self.netloc, error)) from None
+        return status, response_headers.get('connection', '').lower() != 'close'
+
+    async def _read_head(self, reader):
+        status_line = await reader.readline()
+        if not status_line:
+            raise PurgeError('Connection closed by {}'.format(self.netloc))
+        try:
+            status = int(status_line.split()[1])
+        except (IndexError, ValueError):
+            raise PurgeError('Malformed status line from {}: {!r}'.format(self.netloc, status_line)) from None
+        response_headers = {}
+        while True:
+            line = await reader.readline()
+            if line in (b'\r\n', b'\n', b''):
+                break
+            name, _, value = line.decode('latin-1').partition(':')
+            response_headers[name.strip().lower()] = value.strip()
+        return status, response_headers
@@ -0,0 +1,174 @@
+# -*- coding: utf-8 -*-
+"""
+    quart_cachecontrol.rules
+    ~~~~~~~~~~~~~~~~~~~~~~~~
+
+    :copyright: (c) 2015 by Thomas Wiebe.
+    :copyright: (c) 2023 by Luckydonald.
+    :license: BSD, see LICENSE for more details.
+"""
+import re
+from fnmatch import translate
+
+import quart
+
+from .error import CacheControlPolicyInvalidError
+
+# names the group of each rule in the combined regex
+_GROUP_PREFIX = '_cache_rule_'
+
+
+class CacheRule(object):
+    """
+    Applies policy, a cache_for, cache or dont_cache decorator, to the
+    responses of the views matching all of the given criteria.
+
+    The URL rule of a view, e.g. '/users/<int:user_id>', is matched by
+    one of prefix, glob (as by fnmatch) or regex (from its start). The
+    view is matched by endpoint name or blueprint name. Requests are
+    matched by methods, and responses by mimetypes. Criteria not given
+    match everything.
+
+    Policies only setting headers can be used. Those storing responses,
+    coalescing requests or evaluating validators before the view need to
+    decorate the view.
+    """
+    def __init__(self, policy, prefix=None, glob=None, regex=None, endpoint=None, blueprint=None,
+                 methods=None, mimetypes=None):
+        if getattr(policy, 'cache_control_view_dispatchers', ()):
+            raise CacheControlPolicyInvalidError(
+                'Rules apply headers only, decorate views storing or coalescing responses instead')
+        self.policy = getattr(policy, 'cache_control_policy', policy)
+        if sum(pattern is not None for pattern in (prefix, glob, regex)) > 1:
+            raise CacheControlPolicyInvalidError('Give at most one of prefix, glob and regex')
+        if prefix is not None:
+            self.pattern = re.escape(prefix)
+        elif glob is not None:
+            self.pattern = translate(glob)
+        else:
+            self.pattern = regex
+        if self.pattern is not None:
+            re.compile(self.pattern)
+        self.endpoint = endpoint
+        self.blueprint = blueprint
+        self.methods = frozenset(method.upper() for method in methods) if methods is not None else None
+        self.mimetypes = frozenset(mimetype.lower() for mimetype in mimetypes) if mimetypes is not None else None
+
+    def matches(self, response):
+        """
+        Whether the request and response criteria of the rule match.
+        """
+        return (
+            (self.methods is None or quart.request.method in self.methods)
+            and (self.mimetypes is None or response.mimetype in self.mimetypes))
+
+
+class CacheRules(object):
+    """
+    A table of CacheRule, applied by the CacheControl extension to the
+    responses of views not decorated themselves. The first matching rule
+    applies.
+
+    Rules are compiled once into a single regex for the URL rule criteria
+    and dicts by endpoint and blueprint. The rules that may apply to an
+    endpoint are resolved on its first request and kept, so the cost per
+    request does not grow with the number of rules.
+    """
+    def __init__(self, rules):
+        self.rules = tuple(rules)
+        self._patterns = self._compile_patterns()
+        # indexes of the rules matching any endpoint, blueprint or URL rule
+        any_rule = frozenset(index for index, rule in enumerate(self.rules))
+        self._any_endpoint = frozenset(index for index in any_rule if self.rules[index].endpoint is None)
+        self._any_blueprint = frozenset(index for index in any_rule if self.rules[index].blueprint is None)
+        self._any_url_rule = frozenset(index for index in any_rule if self.rules[index].pattern is None)
+        self._by_endpoint = self._index_by('endpoint')
+        self._by_blueprint = self._index_by('blueprint')
+
+    def _index_by(self, attr_name):
+        index = {}
+        for position, rule in enumerate(self.rules):
+            value = getattr(rule, attr_name)
+            if value is not None:
+                index.setdefault(value, set()).add(position)
+        return index
+
+    def _compile_patterns(self):
+        patterns = [(index, rule.pattern) for index, rule in enumerate(self.rules) if rule.pattern is not None]
+        if not patterns:
+            return None
+        try:
+            # each rule is an optional lookahead, so one match finds every matching rule
+            return re.compile(''.join(
+                '(?=(?P<{}{}>{}))?'.format(_GROUP_PREFIX, index, pattern) for index, pattern in patterns))
+        except re.error:
+            # e.g. named groups used by several patterns
+            return tuple((index, re.compile(pattern)) for index, pattern in patterns)
+
+    def pattern_matches(self, string):
+        """
+        Return the indexes of the rules whose prefix, glob or regex, if
+        any, matches string.
+        """
+        if self._patterns is None:
+            return self._any_url_rule
+        if isinstance(self._patterns, tuple):
+            matching = {index for index, pattern in self._patterns if pattern.match(string)}
+        else:
+            matching = {
+                int(name[len(_GROUP_PREFIX):]) for name, value in self._patterns.match(string).groupdict().items()
+                if value is not None and name.startswith(_GROUP_PREFIX)}
+        return self._any_url_rule | matching
+
+    def candidates(self, endpoint, url_rule):
+        """
+        Return the rules that may apply to the responses of endpoint
+        served by url_rule, in order.
+        """
+        blueprint = endpoint.rpartition('.')[0] if '.' in endpoint else None
+        indexes = (
+            (self._any_endpoint | self._by_endpoint.get(endpoint, frozenset()))
+            & (self._any_blueprint | self._by_blueprint.get(blueprint, frozenset()))
+            & self.pattern_matches(url_rule))
+        return tuple(self.rules[index] for index in sorted(indexes))
+
+    def policy_for(self, app, endpoint):
+        """
+        Return the policy applying the rules to endpoint, or None if none
+        may apply.
+        """
+        by_url_rule = {}
+        for url_rule in app.url_map.iter_rules(endpoint):
+            candidates = self.candidates(endpoint, url_rule.rule)
+            if candidates:
+                by_url_rule[url_rule.rule] = candidates
+        if not by_url_rule:
+            return None
+        return RulesPolicy(by_url_rule)
+
+
+class RulesPolicy(object):
+    """
+    Applies the first matching of the rules resolved for an endpoint.
+    """
+    name = 'rules'
+
+    def __init__(self, by_url_rule):
+        self._by_url_rule = by_url_rule
+
+    def rule_for(self, response):
+        url_rule = quart.request.url_rule
+        for rule in self._by_url_rule.get(url_rule.rule if url_rule is not None else None, ()):
+            if rule.matches(response):
+                return rule
+        return None
+
+    def qualifies(self, response):
+        rule = self.rule_for(response)
+        return rule is not None and rule.policy.qualifies(response)
+
+    async def process_response(self, response):
+        rule = self.rule_for(response)
+        if rule is None:
+            return response
+        return await rule.policy.process_response(response)
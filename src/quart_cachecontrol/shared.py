@@ -0,0 +1,308 @@
+# -*- coding: utf-8 -*-
+"""
+    quart_cachecontrol.shared
+    ~~~~~~~~~~~~~~~~~~~~~~~~~
+
+    :copyright: (c) 2015 by Thomas Wiebe.
+    :copyright: (c) 2023 by Luckydonald.
+    :license: BSD, see LICENSE for more details.
+"""
+import json
+import mmap
+import os
+import struct
+import threading
+from hashlib import blake2b
+from time import time
+
+from .error import QuartCacheControlError
+from .store import StoredResponse
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover
+    fcntl = None
+
+MAGIC = b'QCCSTOR2'
+# magic, slot count, data size, write cursor, start and end of the records of the previous lap
+_HEADER = struct.Struct('<8sIQQQQ')
+# sequence, key hash, data offset, data length, expires at, keep until
+_SLOT = struct.Struct('<QQQIdd4x')
+# record length, key digest, metadata length
+_RECORD = struct.Struct('<I16sI')
+# slots a key may occupy, starting at its home slot
+ASSOCIATIVITY = 4
+# attempts to read a slot while a writer updates it
+READ_RETRIES = 3
+
+
+class SharedMemoryStore(object):
+    """
+    Keeps stored responses in a memory mapped file, shared by all worker
+    processes of a host opening the same path. Put the file on a tmpfs,
+    such as /dev/shm, to keep it in memory.
+
+    The file holds an index of slots and a data ring of data_bytes, to
+    which responses are appended. Appending past the end of the ring
+    starts over at its beginning, dropping the responses overwritten.
+    These are found by walking the records of the previous lap ahead of
+    the write cursor, so a write only visits the records it overwrites.
+    A key may occupy any of ASSOCIATIVITY slots, and replaces the one
+    kept for the shortest time if they are all taken.
+
+    Writers take an exclusive lock on the file. Readers take no lock, but
+    check the sequence number of a slot, which writers increment before
+    and after changing it, and retry if it changed while reading. Bodies
+    are copied out of the mapping once per hit, since their space may be
+    reused while the response is being sent.
+
+    Times are shared between processes, so clock defaults to time.time.
+    Only available on platforms supporting fcntl.flock.
+    """
+    def __init__(self, path, data_bytes=64 * 1024 * 1024, slots=4096, clock=time):
+        if fcntl is None:  # pragma: no cover
+            raise QuartCacheControlError('SharedMemoryStore requires fcntl.flock, not available on this platform')
+        self.path = path
+        self.clock = clock
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+        self._fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o600)
+        size = _HEADER.size + slots * _SLOT.size + data_bytes
+        fcntl.flock(self._fd, fcntl.LOCK_EX)
+        try:
+            if os.fstat(self._fd).st_size != size or os.pread(self._fd, len(MAGIC), 0) != MAGIC:
+                os.ftruncate(self._fd, 0)
+                os.ftruncate(self._fd, size)
+                os.pwrite(self._fd, _HEADER.pack(MAGIC, slots, data_bytes, 0, 0, 0), 0)
+        finally:
+            fcntl.flock(self._fd, fcntl.LOCK_UN)
+        self._map = mmap.mmap(self._fd, size)
+        _, self._slots, self._data_bytes, _, _, _ = _HEADER.unpack_from(self._map, 0)
+        self._data_start = _HEADER.size + self._slots * _SLOT.size
+
+    def close(self):
+        self._map.close()
+        os.close(self._fd)
+
+    def __len__(self):
+        return sum(1 for _ in self._live_slots())
+
+    def get(self, key, now):
+        digest = _digest(key)
+        key_hash = _key_hash(digest)
+        for index in self._probe(key_hash):
+            entry = self._read_slot(index, key_hash, digest)
+            if entry is None:
+                continue
+            if entry.keep_until <= now:
+                break
+            self.hits += 1
+            return entry
+        self.misses += 1
+        return None
+
+    def set(self, key, entry):
+        digest = _digest(key)
+        record = _encode(digest, entry)
+        if len(record) > self._data_bytes:
+            return
+        key_hash = _key_hash(digest)
+        with self._locked():
+            index = self._slot_for(key_hash)
+            _, _, _, cursor, tail, tail_end = _HEADER.unpack_from(self._map, 0)
+            if cursor + len(record) > self._data_bytes:
+                # the previous lap is overwritten entirely, this one becomes the previous
+                self._evict_records(tail, tail_end)
+                cursor, tail, tail_end = 0, 0, cursor
+            tail = self._evict_records(tail, min(cursor + len(record), tail_end))
+            end = cursor + len(record)
+            if tail >= tail_end:
+                tail = tail_end = end
+            offset = self._data_start + cursor
+            self._map[offset:offset + len(record)] = record
+            self._write_slot(index, key_hash, offset, len(record), entry.expires_at, entry.keep_until)
+            _HEADER.pack_into(self._map, 0, MAGIC, self._slots, self._data_bytes, end, tail, tail_end)
+
+    def delete(self, key):
+        key_hash = _key_hash(_digest(key))
+        with self._locked():
+            for index in self._probe(key_hash):
+                if self._slot(index)[1] == key_hash:
+                    self._clear_slot(index)
+
+    def clear(self):
+        with self._locked():
+            for index, _ in list(self._live_slots()):
+                self._clear_slot(index)
+
+    def invalidate_tags(self, *tags):
+        """
+        Delete all entries tagged with any of tags, and return their number.
+        Scans all entries, as the index is not shared.
+        """
+        tags = set(tags)
+        invalidated = 0
+        with self._locked():
+            for index, (_, _, offset, _, _, _) in list(self._live_slots()):
+                if tags.intersection(_decode_metadata(self._map, offset)['tags']):
+                    self._clear_slot(index)
+                    invalidated += 1
+        return invalidated
+
+    def stats(self):
+        live = [slot for _, slot in self._live_slots()]
+        return {
+            'entries': len(live),
+            'bytes': sum(slot[3] for slot in live),
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+        }
+
+    def _locked(self):
+        return _FileLock(self._lock, self._fd)
+
+    def _probe(self, key_hash):
+        home = key_hash % self._slots
+        return [(home + step) % self._slots for step in range(ASSOCIATIVITY)]
+
+    def _slot(self, index):
+        return _SLOT.unpack_from(self._map, _HEADER.size + index * _SLOT.size)
+
+    def _live_slots(self):
+        for index in range(self._slots):
+            slot = self._slot(index)
+            if slot[1]:
+                yield index, slot
+
+    def _read_slot(self, index, key_hash, digest):
+        position = _HEADER.size + index * _SLOT.size
+        for _ in range(READ_RETRIES):
+            sequence, slot_hash, offset, length, _, _ = _SLOT.unpack_from(self._map, position)
+            if sequence & 1:
+                continue
+            if slot_hash != key_hash:
+                return None
+            try:
+                entry = _decode(self._map, offset, digest)
+            except (ValueError, KeyError, TypeError, struct.error):
+                # torn by a concurrent writer
+                entry = None
+            if _SLOT.unpack_from(self._map, position)[0] == sequence:
+                return entry
+        return None
+
+    def _write_slot(self, index, key_hash, offset, length, expires_at, keep_until):
+        position = _HEADER.size + index * _SLOT.size
+        sequence = _SLOT.unpack_from(self._map, position)[0]
+        # odd while changing, so readers retry
+        _SLOT.pack_into(self._map, position, sequence + 1, 0, 0, 0, 0.0, 0.0)
+        _SLOT.pack_into(self._map, position, sequence + 1, key_hash, offset, length, expires_at, keep_until)
+        struct.pack_into('<Q', self._map, position, sequence + 2)
+
+    def _clear_slot(self, index):
+        self._write_slot(index, 0, 0, 0, 0.0, 0.0)
+
+    def _slot_for(self, key_hash):
+        probe = self._probe(key_hash)
+        slots = [(index, self._slot(index)) for index in probe]
+        for index, slot in slots:
+            if slot[1] == key_hash:
+                return index
+        for index, slot in slots:
+            if not slot[1]:
+                return index
+        self.evictions += 1
+        return min(slots, key=lambda item: item[1][5])[0]
+
+    def _evict_records(self, start, end):
+        """
+        Clear the slots of the records starting from start before end, and
+        return the position after the last of them.
+        """
+        position = start
+        while position < end:
+            offset = self._data_start + position
+            length, digest, _ = _RECORD.unpack_from(self._map, offset)
+            if length < _RECORD.size:
+                # never written
+                return end
+            key_hash = _key_hash(digest)
+            for index in self._probe(key_hash):
+                slot = self._slot(index)
+                # the key may have been stored again since, at another offset
+                if slot[1] == key_hash and slot[2] == offset:
+                    self._clear_slot(index)
+                    self.evictions += 1
+            position += length
+        return position
+
+
+class _FileLock(object):
+    def __init__(self, lock, fd):
+        self._lock = lock
+        self._fd = fd
+
+    def __enter__(self):
+        self._lock.acquire()
+        fcntl.flock(self._fd, fcntl.LOCK_EX)
+
+    def __exit__(self, *exc_info):
+        fcntl.flock(self._fd, fcntl.LOCK_UN)
+        self._lock.release()
+
+
+def _digest(key):
+    return blake2b(repr(key).encode('utf-8', 'surrogateescape'), digest_size=16).digest()
+
+
+def _key_hash(digest):
+    # 0 marks free slots
+    return int.from_bytes(digest[:8], 'little') or 1
+
+
+def _encode(digest, entry):
+    encodings = list(entry.encodings.items())
+    metadata = json.dumps({
+        'status': entry.status,
+        'headers': entry.headers,
+        'stored_at': entry.stored_at,
+        'expires_at': entry.expires_at,
+        'keep_until': entry.keep_until,
+        'tags': list(entry.tags),
+        'encodings': [(encoding, len(data)) for encoding, data in encodings],
+    }).encode('utf-8')
+    parts = [metadata, entry.body] + [data for _, data in encodings]
+    length = _RECORD.size + sum(len(part) for part in parts)
+    return b''.join([_RECORD.pack(length, digest, len(metadata))] + parts)
+
+
+def _decode_metadata(data, offset):
+    _, _, metadata_length = _RECORD.unpack_from(data, offset)
+    start = offset + _RECORD.size
+    return json.loads(data[start:start + metadata_length])
+
+
+def _decode(data, offset, digest):
+    """
+    Return the StoredResponse of the record at offset of data, or None if
+    it is not the one of digest. Copies each body out of data once.
+    """
+    length, record_digest, metadata_length = _RECORD.unpack_from(data, offset)
+    if record_digest != digest:
+        return None
+    position = offset + _RECORD.size + metadata_length
+    metadata = json.loads(data[offset + _RECORD.size:position])
+    end = offset + length
+    body_end = end - sum(encoded_length for _, encoded_length in metadata['encodings'])
+    body = data[position:body_end]
+    encodings = {}
+    position = body_end
+    for encoding, encoded_length in metadata['encodings']:
+        encodings[encoding] = data[position:position + encoded_length]
+        position += encoded_length
+    return StoredResponse(
+        metadata['status'], [tuple(header) for header in metadata['headers']], body, metadata['stored_at'],
+        metadata['expires_at'], metadata['keep_until'], metadata['tags'], encodings)
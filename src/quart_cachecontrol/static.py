@@ -0,0 +1,169 @@
+# -*- coding: utf-8 -*-
+"""
+    quart_cachecontrol.static
+    ~~~~~~~~~~~~~~~~~~~~~~~~~
+
+    :copyright: (c) 2015 by Thomas Wiebe.
+    :copyright: (c) 2023 by Luckydonald.
+    :license: BSD, see LICENSE for more details.
+"""
+import asyncio
+import hashlib
+import json
+import logging
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+import quart
+
+from .decorate import cache
+from .evaluator import ResponseIsSuccessfulOrRedirect
+
+logger = logging.getLogger(__name__)
+
+# a year, the longest max-age RFC 9111 recommends
+IMMUTABLE_MAX_AGE = 31536000
+
+CACHE_VERSION = 1
+
+
+class StaticAssets(object):
+    """
+    Serves the files of the static folder of an app under fingerprinted
+    URLs, with the hash of their content in their name, e.g.
+    css/app.3f2a9c1b.css, for cache(public=True, max_age=31536000,
+    immutable=True). A changed file gets a new fingerprint and URL, so
+    clients never need to revalidate them.
+
+    The static folder is hashed when the app starts serving, by a pool
+    of max_workers threads. The hashes are kept in cache_file, by default
+    static-fingerprints.json in the instance folder of the app, along
+    with the mtime and size of each file, so only new and changed files
+    are hashed again on restart. scan() hashes them again while serving.
+
+    url_for(filename) returns the fingerprinted URL of a static file, and
+    the plain one of files not hashed. It is available in templates as
+    static_url(filename). Plain static URLs are served as before.
+    """
+    def __init__(self, app=None, max_workers=None, cache_file=None, hash_length=8):
+        self.max_workers = max_workers
+        self.cache_file = cache_file
+        self.hash_length = hash_length
+        self.static_folder = None
+        # filename -> fingerprinted filename, and back
+        self._fingerprinted = {}
+        self._originals = {}
+        # 304s to revalidations update the headers of cached responses
+        self._policy = cache(
+            public=True, max_age=IMMUTABLE_MAX_AGE, immutable=True,
+            only_if=ResponseIsSuccessfulOrRedirect).cache_control_policy
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        if not app.has_static_folder:
+            raise RuntimeError('No static folder for this app')
+        self.static_folder = app.static_folder
+        if self.cache_file is None:
+            self.cache_file = os.path.join(app.instance_path, 'static-fingerprints.json')
+        static_view = app.view_functions['static']
+
+        async def fingerprinted_static(filename):
+            original = self._originals.get(filename)
+            if original is None:
+                return await static_view(filename=filename)
+            response = await app.send_static_file(original)
+            # send_static_file expires it by SEND_FILE_MAX_AGE_DEFAULT
+            response.headers.pop('Expires', None)
+            return await self._policy.process_response(response)
+        app.view_functions['static'] = fingerprinted_static
+        app.add_template_global(self.url_for, 'static_url')
+
+        @app.before_serving
+        async def hash_static_folder():
+            await asyncio.get_running_loop().run_in_executor(None, self.scan)
+
+    def url_for(self, filename, **kw):
+        """
+        Return the URL of the static file filename, fingerprinted if hashed.
+        """
+        return quart.url_for('static', filename=self._fingerprinted.get(filename, filename), **kw)
+
+    def fingerprint(self, filename):
+        """
+        Return the fingerprinted name of the static file filename, or None
+        if not hashed.
+        """
+        return self._fingerprinted.get(filename)
+
+    def scan(self):
+        """
+        Hash the new and changed files of the static folder, and return
+        the number of files hashed.
+        """
+        cached = self._load_cache()
+        files = {}
+        stale = []
+        for filename, stat in self._walk():
+            entry = cached.get(filename)
+            if entry is not None and entry[:2] == [stat.st_mtime_ns, stat.st_size]:
+                files[filename] = entry
+            else:
+                stale.append((filename, stat))
+        if stale:
+            with ThreadPoolExecutor(self.max_workers, thread_name_prefix='quart-cachecontrol-static') as executor:
+                digests = executor.map(self._hash, [filename for filename, _ in stale])
+                for (filename, stat), digest in zip(stale, digests):
+                    files[filename] = [stat.st_mtime_ns, stat.st_size, digest]
+        if stale or files.keys() != cached.keys():
+            self._save_cache(files)
+
+        fingerprinted = {
+            filename: _fingerprinted_name(filename, digest[:self.hash_length])
+            for filename, (_, _, digest) in files.items()}
+        self._fingerprinted = fingerprinted
+        self._originals = {name: filename for filename, name in fingerprinted.items()}
+        return len(stale)
+
+    def _walk(self):
+        for root, _, names in os.walk(self.static_folder):
+            for name in names:
+                path = os.path.join(root, name)
+                filename = os.path.relpath(path, self.static_folder).replace(os.sep, '/')
+                yield filename, os.stat(path)
+
+    def _hash(self, filename):
+        digest = hashlib.sha256()
+        with open(os.path.join(self.static_folder, filename), 'rb') as f:
+            for chunk in iter(lambda: f.read(65536), b''):
+                digest.update(chunk)
+        return digest.hexdigest()
+
+    def _load_cache(self):
+        try:
+            with open(self.cache_file) as f:
+                cached = json.load(f)
+        except (OSError, ValueError):
+            return {}
+        if not isinstance(cached, dict) or cached.get('version') != CACHE_VERSION:
+            return {}
+        return cached.get('files', {})
+
+    def _save_cache(self, files):
+        try:
+            os.makedirs(os.path.dirname(self.cache_file) or '.', exist_ok=True)
+            with open(self.cache_file + '.tmp', 'w') as f:
+                json.dump({'version': CACHE_VERSION, 'files': files}, f)
+            os.replace(self.cache_file + '.tmp', self.cache_file)
+        except OSError as error:
+            logger.warning('Saving static fingerprints to %s failed: %s', self.cache_file, error)
+
+
+def _fingerprinted_name(filename, fingerprint):
+    directory, _, name = filename.rpartition('/')
+    stem, dot, extension = name.partition('.')
+    if not stem:
+        # dotfiles like .htaccess
+        stem, dot, extension = name, '', ''
+    name = '{}.{}{}{}'.format(stem, fingerprint, dot, extension)
+    return directory + '/' + name if directory else name
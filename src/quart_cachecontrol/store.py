@@ -0,0 +1,167 @@
+# -*- coding: utf-8 -*-
+"""
+    quart_cachecontrol.store
+    ~~~~~~~~~~~~~~~~~~~~~~~~
+
+    :copyright: (c) 2015 by Thomas Wiebe.
+    :copyright: (c) 2023 by Luckydonald.
+    :license: BSD, see LICENSE for more details.
+"""
+from time import monotonic
+
+import quart
+
+from .eviction import LRUPolicy
+
+# approximate bookkeeping cost of an entry besides body and headers
+ENTRY_OVERHEAD = 256
+
+# budget of the stores used when none is given, as expired entries are only dropped when requested again
+DEFAULT_MAX_BYTES = 64 * 1024 * 1024
+
+
+class StoredResponse(object):
+    """
+    A fully buffered response kept in a response store.
+
+    The response is fresh until expires_at, and kept until keep_until,
+    which defaults to expires_at, to serve it stale. Responses may be
+    invalidated by any of their tags. Compressed bodies are kept in
+    encodings, by content coding.
+    """
+    __slots__ = ('status', 'headers', 'body', 'stored_at', 'expires_at', 'keep_until', 'tags', 'encodings', 'size')
+
+    def __init__(self, status, headers, body, stored_at, expires_at, keep_until=None, tags=(), encodings=None):
+        self.status = status
+        self.headers = headers
+        self.body = body
+        self.stored_at = stored_at
+        self.expires_at = expires_at
+        self.keep_until = keep_until if keep_until is not None else expires_at
+        self.tags = tuple(tags)
+        self.encodings = encodings or {}
+        self.size = (
+            ENTRY_OVERHEAD + len(body) + sum(len(data) for data in self.encodings.values())
+            + sum(len(name) + len(value) for name, value in headers))
+
+    def to_response(self, now=None, encoding=None):
+        """
+        Return a new response. If now is given, it carries an Age header.
+        If encoding is given, the body is the one compressed with it.
+        """
+        if encoding is None:
+            response = quart.current_app.response_class(self.body, status=self.status, headers=self.headers)
+        else:
+            response = quart.current_app.response_class(
+                self.encodings[encoding], status=self.status, headers=self.headers)
+            response.headers['Content-Encoding'] = encoding
+        if now is not None:
+            response.headers['Age'] = str(int(now - self.stored_at))
+        return response
+
+
+class MemoryStore(object):
+    """
+    Keeps stored responses in process memory until they expire, or until
+    they are no longer kept to be served stale.
+
+    If max_bytes or max_entries are given, the eviction policy picks
+    the entries to drop once the store exceeds them. Defaults to an
+    LRUPolicy. Entries larger than max_bytes are never stored.
+
+    An inverted index from tags to keys allows to invalidate all entries
+    of a tag in time proportional to their number.
+    """
+    def __init__(self, max_bytes=None, max_entries=None, eviction=None, clock=monotonic):
+        self._max_bytes = max_bytes
+        self._max_entries = max_entries
+        self._eviction = eviction if eviction is not None else LRUPolicy()
+        self._eviction.resize(max_bytes)
+        self._entries = {}
+        self._tagged = {}
+        self.clock = clock
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, key, now):
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            self._eviction.record_miss(key)
+            return None
+        if entry.keep_until <= now:
+            self._remove(key)
+            self.misses += 1
+            self._eviction.record_miss(key)
+            return None
+        self.hits += 1
+        self._eviction.record_access(key)
+        return entry
+
+    def set(self, key, entry):
+        if self._max_bytes is not None and entry.size > self._max_bytes:
+            return
+        self.delete(key)
+        self._entries[key] = entry
+        self.bytes += entry.size
+        for tag in entry.tags:
+            self._tagged.setdefault(tag, set()).add(key)
+        self._eviction.insert(key, entry.size)
+        while self._is_over_budget():
+            self._forget(self._eviction.victim())
+            self.evictions += 1
+
+    def delete(self, key):
+        if key in self._entries:
+            self._remove(key)
+
+    def clear(self):
+        for key in list(self._entries):
+            self._remove(key)
+
+    def invalidate_tags(self, *tags):
+        """
+        Delete all entries tagged with any of tags, and return their number.
+        """
+        invalidated = 0
+        for tag in tags:
+            for key in list(self._tagged.get(tag, ())):
+                self._remove(key)
+                invalidated += 1
+        return invalidated
+
+    def stats(self):
+        return {
+            'entries': len(self._entries),
+            'bytes': self.bytes,
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+        }
+
+    def _remove(self, key):
+        self._forget(key)
+        self._eviction.remove(key)
+
+    def _forget(self, key):
+        entry = self._entries.pop(key)
+        self.bytes -= entry.size
+        for tag in entry.tags:
+            keys = self._tagged[tag]
+            keys.discard(key)
+            if not keys:
+                del self._tagged[tag]
+
+    def _is_over_budget(self):
+        return (
+            (self._max_bytes is not None and self.bytes > self._max_bytes)
+            or (self._max_entries is not None and len(self._entries) > self._max_entries)
+        )
+
+
+default_store = MemoryStore(DEFAULT_MAX_BYTES)
@@ -0,0 +1,67 @@
+# -*- coding: utf-8 -*-
+"""
+    quart_cachecontrol.ttl
+    ~~~~~~~~~~~~~~~~~~~~~~
+
+    :copyright: (c) 2015 by Thomas Wiebe.
+    :copyright: (c) 2023 by Luckydonald.
+    :license: BSD, see LICENSE for more details.
+"""
+from datetime import datetime, timedelta, timezone
+from inspect import isawaitable
+
+from .callback import SetCacheControlHeadersFromTimedeltaCallback
+
+# set on responses whose ttl was resolved before the policy applies, e.g. to store them
+TTL_ATTR = 'cache_control_ttl'
+# distinct ttls kept rendered per decorated view
+MAX_RENDERED_TTLS = 1024
+
+
+async def resolve_ttl(ttl, response):
+    """
+    Call the function ttl with response, and return the seconds the
+    response is fresh for. The function may be a coroutine function, and
+    return a timedelta, seconds, or the datetime the response expires at,
+    in UTC if naive.
+    """
+    value = ttl(response)
+    if isawaitable(value):
+        value = await value
+    if isinstance(value, datetime):
+        if value.tzinfo is None:
+            value = value.replace(tzinfo=timezone.utc)
+        value = value - datetime.now(timezone.utc)
+    if isinstance(value, timedelta):
+        value = value.total_seconds()
+    return max(int(value), 0)
+
+
+class SetCacheControlHeadersFromTtlCallback(object):
+    """
+    Sets Cache-Control and Expires headers like
+    SetCacheControlHeadersFromTimedeltaCallback, for a ttl computed per
+    response by the function ttl, see resolve_ttl. The headers are
+    rendered once per distinct ttl.
+    """
+    def __init__(self, cache_callback, ttl, expires=True, **cache_control_kw):
+        self._cache_callback = cache_callback
+        self._ttl = ttl
+        self._expires = expires
+        self._cache_control_kw = cache_control_kw
+        # seconds -> SetCacheControlHeadersFromTimedeltaCallback
+        self._rendered = {}
+
+    async def __call__(self, response):
+        if not self._cache_callback.qualifies(response):
+            return response
+        seconds = getattr(response, TTL_ATTR, None)
+        if seconds is None:
+            seconds = await resolve_ttl(self._ttl, response)
+        callback = self._rendered.get(seconds)
+        if callback is None:
+            if len(self._rendered) >= MAX_RENDERED_TTLS:
+                self._rendered.clear()
+            callback = self._rendered[seconds] = SetCacheControlHeadersFromTimedeltaCallback(
+                timedelta(seconds=seconds), self._expires, **self._cache_control_kw)
+        return callback(response)
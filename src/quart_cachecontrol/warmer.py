@@ -0,0 +1,238 @@
+# -*- coding: utf-8 -*-
+"""
+    quart_cachecontrol.warmer
+    ~~~~~~~~~~~~~~~~~~~~~~~~~
+
+    :copyright: (c) 2015 by Thomas Wiebe.
+    :copyright: (c) 2023 by Luckydonald.
+    :license: BSD, see LICENSE for more details.
+"""
+import asyncio
+from inspect import isawaitable
+from time import perf_counter
+from urllib.parse import urlsplit
+
+from .dispatch import refreshing
+from .extension import decorated_policy
+
+# policies of these decorators are warmed when discovering routes
+WARMED_DECORATORS = frozenset(('cache_for', 'cache'))
+
+
+class WarmTarget(object):
+    """
+    An endpoint to warm, with params, an iterable of dicts of the view
+    arguments, or a function, possibly a coroutine function, returning
+    one. Requests are sent with headers, and repeated every ttl seconds
+    if given, which defaults to the ttl of the policy of the endpoint.
+    """
+    def __init__(self, endpoint, params=None, ttl=None, headers=None):
+        self.endpoint = endpoint
+        self.params = params
+        self.ttl = ttl
+        self.headers = headers
+
+
+class CacheWarmer(object):
+    """
+    Requests the cacheable routes of an app through its ASGI interface
+    when it starts serving, and again before their responses expire, to
+    fill response stores before users request them.
+
+    Routes of views decorated with cache_for or cache and a response
+    store are discovered from the URL map, if they take no arguments and
+    accept GET, as warming views without a store has no effect. Routes taking
+    arguments can be given as targets, a list of WarmTarget. Requests
+    bypass stored responses, to refresh them. They are sent for the
+    SERVER_NAME of the app, or localhost, unless headers give a Host.
+
+    At most concurrency requests run at once, and at most rate per
+    second, if given. Routes are requested again after refresh_at of
+    their ttl passed. report() returns the time each route took to warm.
+
+    Downstream caches such as reverse proxies are not warmed, as the
+    requests never leave the process.
+    """
+    def __init__(self, app=None, targets=(), discover=True, concurrency=4, rate=None, refresh_at=0.9,
+                 headers=None):
+        self.targets = list(targets)
+        self.discover = discover
+        self.concurrency = concurrency
+        self.rate = rate
+        self.refresh_at = refresh_at
+        self.headers = dict(headers or {})
+        # path -> dict of the last warming of the path
+        self._report = {}
+        # endpoint -> dict of the last failure of a target before requesting its paths
+        self._target_errors = {}
+        self._semaphore = None
+        self._next_start = 0.0
+        self._task = None
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        @app.before_serving
+        async def start_warming():
+            self._task = asyncio.ensure_future(self.run(app))
+
+        @app.after_serving
+        async def stop_warming():
+            if self._task is not None:
+                self._task.cancel()
+
+    def report(self):
+        """
+        Return the last warming of each path, as list of dicts, followed by
+        the last failure of each target whose paths could not be built,
+        with path None.
+        """
+        return [dict(item, path=path) for path, item in sorted(self._report.items())] + [
+            dict(item, path=None) for _, item in sorted(self._target_errors.items())]
+
+    def discover_targets(self, app):
+        """
+        Return a WarmTarget for each route of a view decorated with a
+        response store, which takes no arguments and accepts GET.
+        """
+        targets = []
+        for rule in app.url_map.iter_rules():
+            policy = decorated_policy(app, rule.endpoint)
+            if policy is None or policy.name not in WARMED_DECORATORS or policy.store is False:
+                continue
+            if rule.arguments or 'GET' not in rule.methods:
+                continue
+            targets.append(WarmTarget(rule.endpoint))
+        return targets
+
+    async def run(self, app):
+        """
+        Warm all targets, and keep them warm.
+        """
+        self._semaphore = asyncio.Semaphore(self.concurrency)
+        targets = self.targets + (self.discover_targets(app) if self.discover else [])
+        tasks = [asyncio.ensure_future(self._keep_warm(app, target)) for target in targets]
+        try:
+            await asyncio.gather(*tasks)
+        finally:
+            for task in tasks:
+                task.cancel()
+
+    async def warm(self, app, target):
+        """
+        Warm each path of target once.
+        """
+        adapter = app.url_map.bind('localhost')
+        params = target.params
+        if params is None:
+            params = [{}]
+        elif callable(params):
+            params = params()
+            if isawaitable(params):
+                params = await params
+        await asyncio.gather(*(
+            self._warm_path(app, target, adapter.build(target.endpoint, values, method='GET'))
+            for values in params))
+
+    async def _keep_warm(self, app, target):
+        ttl = target.ttl if target.ttl is not None else self._policy_ttl(app, target.endpoint)
+        while True:
+            try:
+                await self.warm(app, target)
+            except Exception as exception:
+                # e.g. params not matching the route, the other targets keep warming
+                app.logger.exception('Warming %s failed', target.endpoint)
+                previous = self._target_errors.get(target.endpoint, {})
+                self._target_errors[target.endpoint] = {
+                    'endpoint': target.endpoint,
+                    'status': None,
+                    'error': repr(exception),
+                    'seconds': None,
+                    'count': previous.get('count', 0) + 1,
+                }
+            if not ttl:
+                return
+            await asyncio.sleep(ttl * self.refresh_at)
+
+    async def _warm_path(self, app, target, path):
+        async with self._semaphore:
+            await self._wait_for_rate()
+            headers = dict(self.headers, **(target.headers or {}))
+            started = perf_counter()
+            try:
+                status = await _asgi_get(app, path, headers)
+                error = None
+            except Exception as exception:
+                status, error = None, repr(exception)
+                app.logger.exception('Warming %s failed', path)
+            previous = self._report.get(path, {})
+            self._report[path] = {
+                'endpoint': target.endpoint,
+                'status': status,
+                'error': error,
+                'seconds': perf_counter() - started,
+                'count': previous.get('count', 0) + 1,
+            }
+
+    async def _wait_for_rate(self):
+        if not self.rate:
+            return
+        loop = asyncio.get_running_loop()
+        now = loop.time()
+        start = max(now, self._next_start)
+        self._next_start = start + 1 / self.rate
+        if start > now:
+            await asyncio.sleep(start - now)
+
+    @staticmethod
+    def _policy_ttl(app, endpoint):
+        return getattr(decorated_policy(app, endpoint), 'ttl', None)
+
+
+async def _asgi_get(app, path, headers):
+    """
+    Send a GET request for path to app, and return the response status.
+    """
+    url = urlsplit(path)
+    raw_headers = [(name.lower().encode('latin-1'), value.encode('latin-1')) for name, value in headers.items()]
+    if not any(name == b'host' for name, _ in raw_headers):
+        # stored responses are keyed by host
+        raw_headers.insert(0, (b'host', (app.config.get('SERVER_NAME') or 'localhost').encode('latin-1')))
+    scope = {
+        'type': 'http',
+        'asgi': {'version': '3.0'},
+        'http_version': '1.1',
+        'method': 'GET',
+        'scheme': 'http',
+        'path': url.path,
+        'raw_path': url.path.encode(),
+        'query_string': url.query.encode(),
+        'root_path': '',
+        'headers': raw_headers,
+        'client': ('127.0.0.1', 0),
+        'server': ('localhost', 80),
+        'extensions': {},
+    }
+    done = asyncio.Event()
+    received = []
+    status = []
+
+    async def receive():
+        if not received:
+            received.append(True)
+            return {'type': 'http.request', 'body': b'', 'more_body': False}
+        await done.wait()
+        return {'type': 'http.disconnect'}
+
+    async def send(message):
+        if message['type'] == 'http.response.start':
+            status.append(message['status'])
+        elif not message.get('more_body', False):
+            done.set()
+
+    token = refreshing.set(True)
+    try:
+        await app(scope, receive, send)
+    finally:
+        refreshing.reset(token)
+    return status[0] if status else None
@@ -0,0 +1,90 @@
+import unittest
+
+import pytest
+from quart import Quart, Response
+from quart_cachecontrol import AcceptLanguage, CacheControl, HyperLogLog, VaryAnalyzer, cache_for
+
+analyzer = VaryAnalyzer(min_requests=50)
+app = Quart(__name__)
+
+
+@app.route('/fragmented')
+@cache_for(minutes=5, vary=['User-Agent', 'Accept-Encoding'])
+async def view_fragmented():
+    return Response('body')
+
+
+@app.route('/bucketed/<int:status_code>')
+@cache_for(minutes=5, vary=['Accept-Encoding'])
+async def view_bucketed(status_code):
+    return Response('body', status=status_code)
+
+
+@app.route('/not_varying')
+@cache_for(minutes=5)
+async def view_not_varying():
+    return Response('body')
+
+
+CacheControl(app, vary_analyzer=analyzer)
+
+normalized_analyzer = VaryAnalyzer(min_requests=1)
+normalized_app = Quart(__name__)
+
+
+@normalized_app.route('/normalized')
+@cache_for(minutes=5, vary=['Accept-Language'], normalize={'Accept-Language': AcceptLanguage(['en', 'de'])})
+async def view_normalized():
+    return Response('body')
+
+
+CacheControl(normalized_app, vary_analyzer=normalized_analyzer)
+
+
+class TestHyperLogLog(unittest.TestCase):
+    def test_estimate(self):
+        for count in (10, 1000, 20000):
+            sketch = HyperLogLog()
+            for value in range(count):
+                sketch.add(str(value).encode())
+            self.assertAlmostEqual(count, sketch.estimate(), delta=count * 0.1, msg='count ~= sketch.estimate()')
+
+    def test_duplicates(self):
+        sketch = HyperLogLog()
+        for _ in range(1000):
+            sketch.add(b'same')
+        self.assertEqual(1, sketch.estimate(), "1 == sketch.estimate()")
+
+    def test_fixed_size(self):
+        self.assertEqual(1024, len(HyperLogLog(10)._registers), "1024 == len(HyperLogLog(10)._registers)")
+
+
+class TestVaryAnalyzer(unittest.IsolatedAsyncioTestCase):
+    @pytest.mark.asyncio
+    async def test_report(self):
+        async with app.test_client() as client:
+            for index in range(100):
+                await client.get('/fragmented', headers={'User-Agent': f'agent/{index}', 'Accept-Encoding': 'gzip'})
+                await client.get('/bucketed/200', headers={'Accept-Encoding': ('gzip', 'br')[index % 2]})
+                await client.get('/bucketed/404', headers={'Accept-Encoding': f'enc{index}'})
+                await client.get('/not_varying')
+        report = {item['endpoint']: item for item in analyzer.report()}
+        self.assertEqual({'view_fragmented', 'view_bucketed'}, set(report), "{'view_fragmented', 'view_bucketed'} == set(report)")
+        fragmented = report['view_fragmented']
+        self.assertAlmostEqual(100, fragmented['variants'], delta=5, msg="100 ~= fragmented['variants']")
+        self.assertEqual(1, fragmented['vary']['Accept-Encoding'], "1 == fragmented['vary']['Accept-Encoding']")
+        self.assertTrue(fragmented['fragmented'], "fragmented['fragmented']")
+        bucketed = report['view_bucketed']
+        self.assertEqual(100, bucketed['requests'], "100 == bucketed['requests']")
+        self.assertEqual(2, bucketed['variants'], "2 == bucketed['variants']")
+        self.assertFalse(bucketed['fragmented'], "not bucketed['fragmented']")
+        self.assertEqual(['view_fragmented'], analyzer.fragmented(), "['view_fragmented'] == analyzer.fragmented()")
+
+    @pytest.mark.asyncio
+    async def test_normalized_request_headers(self):
+        async with normalized_app.test_client() as client:
+            for language in ('en', 'de', 'en-US', 'de-AT'):
+                await client.get('/normalized', headers={'Accept-Language': language})
+        report = normalized_analyzer.report()[0]
+        self.assertEqual({'Accept-Language': 4}, report['vary'], "{'Accept-Language': 4} == report['vary']")
+        self.assertEqual(4, report['variants'], "4 == report['variants']")
@@ -1,9 +1,11 @@
+import threading
 import unittest
+from concurrent.futures import ThreadPoolExecutor
 
 import pytest
 from quart import Quart, Response
 from quart_cachecontrol import cache_for, cache, dont_cache, ResponseIsSuccessful, ResponseIsSuccessfulOrRedirect, \
-    Always
+    Always, CacheControlAttributeInvalidError
 
 app = Quart(__name__)
 
@@ -36,6 +38,24 @@ async def view_cache_for_on_success_with_vary(status_code):
     return Response(status=status_code)
 
 
+@app.route('/cache_for/vary_positional/<int:status_code>')
+@cache_for(ResponseIsSuccessful, VARY_HEADERS, seconds=CACHE_SECONDS)
+async def view_cache_for_with_positional_vary(status_code):
+    return Response(status=status_code)
+
+
+@app.route('/cache_for/without_expires/<int:status_code>')
+@cache_for(only_if=ResponseIsSuccessful, seconds=CACHE_SECONDS, expires=False)
+async def view_cache_for_without_expires(status_code):
+    return Response(status=status_code)
+
+
+@app.route('/cache_for/sync/<int:status_code>')
+@cache_for(only_if=ResponseIsSuccessful, seconds=CACHE_SECONDS, executor=ThreadPoolExecutor(1, thread_name_prefix='view-executor'))
+def view_cache_for_sync(status_code):
+    return Response(threading.current_thread().name, status=status_code)
+
+
 @app.route('/dont_cache/always/<int:status_code>')
 @dont_cache(only_if=Always)
 async def view_dont_cache_always(status_code):
@@ -168,6 +188,30 @@ class TestCacheForVary(unittest.IsolatedAsyncioTestCase):
             rv = await client.get('/cache_for/vary/500')
         self.assertEqual(VARY_HEADERS_STR, rv.headers.get('Vary'), "VARY_HEADERS_STR == rv.headers.get('Vary')")
 
+    @pytest.mark.asyncio
+    async def test_positional(self):
+        async with app.test_client() as client:
+            rv = await client.get('/cache_for/vary_positional/200')
+        self.assertEqual(VARY_HEADERS_STR, rv.headers.get('Vary'), "VARY_HEADERS_STR == rv.headers.get('Vary')")
+
+
+class TestCacheForWithoutExpires(unittest.IsolatedAsyncioTestCase):
+    @pytest.mark.asyncio
+    async def test_success(self):
+        async with app.test_client() as client:
+            rv = await client.get('/cache_for/without_expires/200')
+        self.assertEqual(f'max-age={CACHE_SECONDS}', rv.headers.get('Cache-Control'), "f'max-age={CACHE_SECONDS}' == rv.headers.get('Cache-Control')")
+        self.assertNotIn('Expires', rv.headers, "'Expires' not in rv.headers")
+
+
+class TestCacheForSyncView(unittest.IsolatedAsyncioTestCase):
+    @pytest.mark.asyncio
+    async def test_success(self):
+        async with app.test_client() as client:
+            rv = await client.get('/cache_for/sync/200')
+        self.assertEqual(f'max-age={CACHE_SECONDS}', rv.headers.get('Cache-Control'), "f'max-age={CACHE_SECONDS}' == rv.headers.get('Cache-Control')")
+        self.assertTrue((await rv.get_data(as_text=True)).startswith('view-executor'), "(await rv.get_data(as_text=True)).startswith('view-executor')")
+
 
 class TestDontCacheAlways(unittest.IsolatedAsyncioTestCase):
     @pytest.mark.asyncio
@@ -331,3 +375,27 @@ class TestCacheVary(unittest.IsolatedAsyncioTestCase):
         async with app.test_client() as client:
             rv = await client.get('/cache/vary/500')
         self.assertEqual(VARY_HEADERS_STR, rv.headers.get('Vary'), "VARY_HEADERS_STR == rv.headers.get('Vary')")
+
+
+@app.route('/cache/view_header/<int:status_code>')
+@cache(max_age=CACHE_SECONDS, public=True, only_if=Always)
+async def view_cache_with_view_header(status_code):
+    return Response(status=status_code, headers={'Cache-Control': 'no-transform'})
+
+
+class TestCacheInvalidAttribute(unittest.TestCase):
+    def test_raises_on_decoration(self):
+        with self.assertRaises(CacheControlAttributeInvalidError):
+            cache(max_ageing=CACHE_SECONDS)
+
+    def test_raises_for_non_directive_attribute(self):
+        with self.assertRaises(CacheControlAttributeInvalidError):
+            cache(to_header=True)
+
+
+class TestCacheMergesViewHeader(unittest.IsolatedAsyncioTestCase):
+    @pytest.mark.asyncio
+    async def test_success(self):
+        async with app.test_client() as client:
+            rv = await client.get('/cache/view_header/200')
+        self.assertEqual(f'no-transform, max-age={CACHE_SECONDS}, public', rv.headers.get('Cache-Control'), "f'no-transform, max-age={CACHE_SECONDS}, public' == rv.headers.get('Cache-Control')")
@@ -0,0 +1,33 @@
+import unittest
+
+from werkzeug.http import http_date
+
+from quart_cachecontrol.clock import HttpDateClock
+
+
+class FakeClock(object):
+    def __init__(self, now):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+class TestHttpDateClock(unittest.TestCase):
+    def test_formats_offset(self):
+        clock = HttpDateClock(FakeClock(1000.5))
+        self.assertEqual(http_date(1300), clock.http_date_in(300), "http_date(1300) == clock.http_date_in(300)")
+
+    def test_reuses_value_within_second(self):
+        fake_clock = FakeClock(1000.1)
+        clock = HttpDateClock(fake_clock)
+        first = clock.http_date_in(300)
+        fake_clock.now = 1000.9
+        self.assertIs(first, clock.http_date_in(300), "first is clock.http_date_in(300)")
+
+    def test_refreshes_on_next_second(self):
+        fake_clock = FakeClock(1000.9)
+        clock = HttpDateClock(fake_clock)
+        clock.http_date_in(300)
+        fake_clock.now = 1001.0
+        self.assertEqual(http_date(1301), clock.http_date_in(300), "http_date(1301) == clock.http_date_in(300)")
@@ -0,0 +1,120 @@
+import asyncio
+import unittest
+
+import pytest
+from quart import Quart, Response
+from quart_cachecontrol import cache_for, SingleFlight
+
+CACHE_SECONDS = 300
+
+app = Quart(__name__)
+calls = []
+
+
+@app.route('/cache_for/<int:status_code>')
+@cache_for(seconds=CACHE_SECONDS, coalesce=True)
+async def view_cache_for(status_code):
+    calls.append(status_code)
+    await asyncio.sleep(0.05)
+    return Response(str(len(calls)), status=status_code)
+
+
+class TestSingleFlight(unittest.IsolatedAsyncioTestCase):
+    @pytest.mark.asyncio
+    async def test_coalesces(self):
+        single_flight = SingleFlight()
+        calls = []
+
+        async def func():
+            calls.append(1)
+            await asyncio.sleep(0.01)
+            return 'result'
+
+        results = await asyncio.gather(*(single_flight.run('key', func) for _ in range(5)))
+        self.assertEqual(1, len(calls), "1 == len(calls)")
+        self.assertEqual([('result', True)] + [('result', False)] * 4, results, "[('result', True)] + [('result', False)] * 4 == results")
+        self.assertEqual({'in_flight': 0, 'leaders': 1, 'waiters': 4, 'waiting': 0}, single_flight.stats(), "{'in_flight': 0, 'leaders': 1, 'waiters': 4, 'waiting': 0} == single_flight.stats()")
+
+    @pytest.mark.asyncio
+    async def test_shares_errors(self):
+        single_flight = SingleFlight()
+
+        async def func():
+            await asyncio.sleep(0.01)
+            raise ValueError()
+
+        results = await asyncio.gather(*(single_flight.run('key', func) for _ in range(3)), return_exceptions=True)
+        self.assertTrue(all(isinstance(result, ValueError) for result in results), "all(isinstance(result, ValueError) for result in results)")
+
+    @pytest.mark.asyncio
+    async def test_retries_errors(self):
+        single_flight = SingleFlight(share_errors=False)
+        calls = []
+
+        async def func():
+            calls.append(1)
+            await asyncio.sleep(0.01)
+            if len(calls) == 1:
+                raise ValueError()
+            return 'result'
+
+        results = await asyncio.gather(*(single_flight.run('key', func) for _ in range(3)), return_exceptions=True)
+        self.assertIsInstance(results[0], ValueError, "isinstance(results[0], ValueError)")
+        self.assertEqual([('result', False)] * 2, results[1:], "[('result', False)] * 2 == results[1:]")
+
+    @pytest.mark.asyncio
+    async def test_timeout(self):
+        single_flight = SingleFlight(timeout=0.01, raise_on_timeout=True)
+
+        async def func():
+            await asyncio.sleep(0.1)
+            return 'result'
+
+        results = await asyncio.gather(single_flight.run('key', func), single_flight.run('key', func), return_exceptions=True)
+        self.assertEqual(('result', True), results[0], "('result', True) == results[0]")
+        self.assertIsInstance(results[1], asyncio.TimeoutError, "isinstance(results[1], asyncio.TimeoutError)")
+
+    @pytest.mark.asyncio
+    async def test_leader_cancelled(self):
+        single_flight = SingleFlight()
+
+        async def func():
+            await asyncio.sleep(0.05)
+            return 'result'
+
+        leader = asyncio.ensure_future(single_flight.run('key', func))
+        await asyncio.sleep(0)
+        waiter = asyncio.ensure_future(single_flight.run('key', func))
+        await asyncio.sleep(0)
+        leader.cancel()
+        self.assertEqual(('result', False), await waiter, "('result', False) == await waiter")
+
+
+class TestCacheForCoalesce(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        calls.clear()
+
+    @pytest.mark.asyncio
+    async def test_success(self):
+        stats = view_cache_for.cache_control_single_flight.stats()
+        client = app.test_client()
+        responses = await asyncio.gather(*(client.get('/cache_for/200') for _ in range(5)))
+        self.assertEqual([200], calls, "[200] == calls")
+        waiters = view_cache_for.cache_control_single_flight.stats()['waiters'] - stats['waiters']
+        self.assertEqual(4, waiters, "4 == waiters")
+        for rv in responses:
+            self.assertEqual(b'1', await rv.get_data(), "b'1' == await rv.get_data()")
+            self.assertEqual(f'max-age={CACHE_SECONDS}', rv.headers.get('Cache-Control'), "f'max-age={CACHE_SECONDS}' == rv.headers.get('Cache-Control')")
+
+    @pytest.mark.asyncio
+    async def test_not_qualifying(self):
+        client = app.test_client()
+        await asyncio.gather(*(client.get('/cache_for/500') for _ in range(3)))
+        self.assertEqual([500] * 3, calls, "[500] * 3 == calls")
+
+    @pytest.mark.asyncio
+    async def test_skips_authorized(self):
+        client = app.test_client()
+        await asyncio.gather(*(
+            client.get('/cache_for/200', headers={'Authorization': name}) for name in ('alice', 'bob')))
+        self.assertEqual([200, 200], calls, "[200, 200] == calls")
@@ -0,0 +1,87 @@
+import gzip
+import unittest
+
+import pytest
+from quart import Quart, Response
+from quart_cachecontrol import CacheControl, Compressor, MemoryStore, CacheControlPolicyInvalidError, cache, cache_for
+from quart_cachecontrol.compress import brotli, choose_encoding
+
+BODY = b'{"items": [' + b', '.join(b'"item"' for _ in range(1000)) + b']}'
+
+app = Quart(__name__)
+store = MemoryStore()
+calls = []
+
+
+@app.route('/json')
+@cache_for(minutes=5, store=True, compress=True, vary=['Cookie'])
+async def view_json():
+    calls.append(1)
+    return Response(BODY, mimetype='application/json')
+
+
+@app.route('/small')
+@cache(max_age=300, store=True, compress=True)
+async def view_small():
+    return Response(b'small')
+
+
+@app.route('/encoded')
+@cache(max_age=300, store=True, compress=Compressor(encodings=('gzip',)))
+async def view_encoded():
+    return Response(gzip.compress(BODY), headers={'Content-Encoding': 'gzip'})
+
+
+CacheControl(app, store=store)
+
+
+class TestCompressor(unittest.TestCase):
+    def test_compress(self):
+        encoded = Compressor(encodings=('gzip',)).compress(BODY)
+        self.assertEqual(BODY, gzip.decompress(encoded['gzip']), "BODY == gzip.decompress(encoded['gzip'])")
+
+    def test_min_size(self):
+        self.assertEqual({}, Compressor().compress(b'small'), "{} == Compressor().compress(b'small')")
+
+    @unittest.skipIf(brotli is None, 'brotli not installed')
+    def test_brotli(self):
+        encoded = Compressor().compress(BODY)
+        self.assertEqual(BODY, brotli.decompress(encoded['br']), "BODY == brotli.decompress(encoded['br'])")
+
+    def test_choose_encoding(self):
+        self.assertEqual('br', choose_encoding('gzip, br', ('br', 'gzip')), "'br' == choose_encoding('gzip, br', ('br', 'gzip'))")
+        self.assertEqual('gzip', choose_encoding('gzip, br;q=0', ('br', 'gzip')), "'gzip' == choose_encoding('gzip, br;q=0', ...)")
+        self.assertIsNone(choose_encoding('deflate', ('gzip',)), "choose_encoding('deflate', ('gzip',)) is None")
+        self.assertIsNone(choose_encoding(None, ('gzip',)), "choose_encoding(None, ('gzip',)) is None")
+
+    def test_requires_store(self):
+        with self.assertRaises(CacheControlPolicyInvalidError):
+            cache_for(minutes=5, compress=True)
+
+
+class TestCompressedStore(unittest.IsolatedAsyncioTestCase):
+    @pytest.mark.asyncio
+    async def test_variants(self):
+        calls.clear()
+        async with app.test_app() as test_app:
+            client = test_app.test_client()
+            rv = await client.get('/json', headers={'Accept-Encoding': 'gzip'})
+            self.assertEqual('gzip', rv.headers.get('Content-Encoding'), "'gzip' == rv.headers.get('Content-Encoding')")
+            self.assertEqual(BODY, gzip.decompress(await rv.get_data()), "BODY == gzip.decompress(await rv.get_data())")
+            self.assertEqual('Cookie,Accept-Encoding', rv.headers.get('Vary'), "'Cookie,Accept-Encoding' == rv.headers.get('Vary')")
+            rv = await client.get('/json')
+            self.assertNotIn('Content-Encoding', rv.headers, "'Content-Encoding' not in rv.headers")
+            self.assertEqual(BODY, await rv.get_data(), "BODY == await rv.get_data()")
+            rv = await client.get('/json', headers={'Accept-Encoding': 'gzip;q=0.5, deflate'})
+            self.assertEqual('gzip', rv.headers.get('Content-Encoding'), "'gzip' == rv.headers.get('Content-Encoding')")
+            self.assertEqual(str(len(await rv.get_data())), rv.headers.get('Content-Length'), "str(len(await rv.get_data())) == rv.headers.get('Content-Length')")
+        self.assertEqual(1, len(calls), "1 == len(calls)")
+
+    @pytest.mark.asyncio
+    async def test_not_compressed(self):
+        async with app.test_app() as test_app:
+            client = test_app.test_client()
+            rv = await client.get('/small', headers={'Accept-Encoding': 'gzip'})
+            self.assertNotIn('Content-Encoding', rv.headers, "'Content-Encoding' not in rv.headers")
+            rv = await client.get('/encoded', headers={'Accept-Encoding': 'gzip'})
+            self.assertEqual(BODY, gzip.decompress(await rv.get_data()), "BODY == gzip.decompress(await rv.get_data())")
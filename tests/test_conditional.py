@@ -0,0 +1,130 @@
+import unittest
+from datetime import datetime, timezone
+from zlib import crc32
+
+import pytest
+from quart import Quart, Response
+from werkzeug.http import http_date
+from quart_cachecontrol import cache_for, cache
+
+CACHE_SECONDS = 300
+BODY = b'conditional body'
+BODY_ETAG = '"{:x}-{:08x}"'.format(len(BODY), crc32(BODY))
+LAST_MODIFIED = datetime(2023, 1, 1, tzinfo=timezone.utc)
+
+app = Quart(__name__)
+calls = []
+
+
+@app.route('/etag/<int:status_code>')
+@cache_for(seconds=CACHE_SECONDS, etag=True)
+async def view_etag(status_code):
+    return Response(BODY, status=status_code)
+
+
+@app.route('/etag/weak')
+@cache(max_age=CACHE_SECONDS, etag='weak')
+async def view_etag_weak():
+    return Response(BODY)
+
+
+@app.route('/etag/streamed')
+@cache_for(seconds=CACHE_SECONDS, etag=True)
+async def view_etag_streamed():
+    async def chunks():
+        yield BODY[:5]
+        yield BODY[5:]
+    return Response(chunks())
+
+
+@app.route('/etag/function/<int:version>')
+@cache_for(seconds=CACHE_SECONDS, etag=lambda version: f'v{version}')
+async def view_etag_function(version):
+    calls.append(version)
+    return Response(BODY)
+
+
+@app.route('/last_modified')
+@cache_for(seconds=CACHE_SECONDS, last_modified=lambda: LAST_MODIFIED)
+async def view_last_modified():
+    calls.append('last_modified')
+    return Response(BODY)
+
+
+class TestETag(unittest.IsolatedAsyncioTestCase):
+    @pytest.mark.asyncio
+    async def test_adds_etag(self):
+        async with app.test_client() as client:
+            rv = await client.get('/etag/200')
+        self.assertEqual(BODY_ETAG, rv.headers.get('ETag'), "BODY_ETAG == rv.headers.get('ETag')")
+
+    @pytest.mark.asyncio
+    async def test_weak(self):
+        async with app.test_client() as client:
+            rv = await client.get('/etag/weak')
+        self.assertEqual('W/' + BODY_ETAG, rv.headers.get('ETag'), "'W/' + BODY_ETAG == rv.headers.get('ETag')")
+
+    @pytest.mark.asyncio
+    async def test_streamed(self):
+        async with app.test_client() as client:
+            rv = await client.get('/etag/streamed')
+        self.assertEqual(BODY_ETAG, rv.headers.get('ETag'), "BODY_ETAG == rv.headers.get('ETag')")
+        self.assertEqual(BODY, await rv.get_data(), "BODY == await rv.get_data()")
+
+    @pytest.mark.asyncio
+    async def test_not_modified(self):
+        async with app.test_client() as client:
+            rv = await client.get('/etag/200', headers={'If-None-Match': BODY_ETAG})
+        self.assertEqual(304, rv.status_code, "304 == rv.status_code")
+        self.assertEqual(b'', await rv.get_data(), "b'' == await rv.get_data()")
+        self.assertEqual(f'max-age={CACHE_SECONDS}', rv.headers.get('Cache-Control'), "f'max-age={CACHE_SECONDS}' == rv.headers.get('Cache-Control')")
+
+    @pytest.mark.asyncio
+    async def test_modified(self):
+        async with app.test_client() as client:
+            rv = await client.get('/etag/200', headers={'If-None-Match': '"other"'})
+        self.assertEqual(200, rv.status_code, "200 == rv.status_code")
+        self.assertEqual(BODY, await rv.get_data(), "BODY == await rv.get_data()")
+
+    @pytest.mark.asyncio
+    async def test_client_error(self):
+        async with app.test_client() as client:
+            rv = await client.get('/etag/404', headers={'If-None-Match': BODY_ETAG})
+        self.assertEqual(404, rv.status_code, "404 == rv.status_code")
+        self.assertNotIn('ETag', rv.headers, "'ETag' not in rv.headers")
+
+
+class TestConditionalViewDispatch(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        calls.clear()
+
+    @pytest.mark.asyncio
+    async def test_etag_skips_view(self):
+        async with app.test_client() as client:
+            rv = await client.get('/etag/function/1', headers={'If-None-Match': '"v1"'})
+        self.assertEqual(304, rv.status_code, "304 == rv.status_code")
+        self.assertEqual([], calls, "[] == calls")
+        self.assertEqual('"v1"', rv.headers.get('ETag'), "'\"v1\"' == rv.headers.get('ETag')")
+        self.assertEqual(f'max-age={CACHE_SECONDS}', rv.headers.get('Cache-Control'), "f'max-age={CACHE_SECONDS}' == rv.headers.get('Cache-Control')")
+
+    @pytest.mark.asyncio
+    async def test_etag_calls_view(self):
+        async with app.test_client() as client:
+            rv = await client.get('/etag/function/2', headers={'If-None-Match': '"v1"'})
+        self.assertEqual(200, rv.status_code, "200 == rv.status_code")
+        self.assertEqual([2], calls, "[2] == calls")
+        self.assertEqual('"v2"', rv.headers.get('ETag'), "'\"v2\"' == rv.headers.get('ETag')")
+
+    @pytest.mark.asyncio
+    async def test_last_modified_skips_view(self):
+        async with app.test_client() as client:
+            rv = await client.get('/last_modified', headers={'If-Modified-Since': http_date(LAST_MODIFIED)})
+        self.assertEqual(304, rv.status_code, "304 == rv.status_code")
+        self.assertEqual([], calls, "[] == calls")
+
+    @pytest.mark.asyncio
+    async def test_last_modified_calls_view(self):
+        async with app.test_client() as client:
+            rv = await client.get('/last_modified', headers={'If-Modified-Since': http_date(LAST_MODIFIED.replace(year=2022))})
+        self.assertEqual(200, rv.status_code, "200 == rv.status_code")
+        self.assertEqual(http_date(LAST_MODIFIED), rv.headers.get('Last-Modified'), "http_date(LAST_MODIFIED) == rv.headers.get('Last-Modified')")
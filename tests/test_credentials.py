@@ -0,0 +1,77 @@
+import unittest
+
+import pytest
+from quart import Quart, Response
+from quart_cachecontrol import CacheControl, MemoryStore, cache
+
+app = Quart(__name__)
+calls = []
+
+
+@app.route('/articles')
+@cache(public=True, s_maxage=600, max_age=60, credentialed=True, credential_cookies=['session'], store=True)
+async def view_articles():
+    calls.append(1)
+    return Response('articles')
+
+
+@app.route('/api')
+@cache(public=True, max_age=300, credentialed={'private': True, 'no_cache': True}, partition='Authorization',
+       vary=['Accept'])
+async def view_api():
+    return Response('{}')
+
+
+@app.route('/feed')
+@cache(public=True, max_age=60, s_maxage=600, credentialed=True)
+async def view_feed():
+    return Response('feed')
+
+
+CacheControl(app, store=MemoryStore())
+
+
+class TestCredentialedDowngrade(unittest.IsolatedAsyncioTestCase):
+    @pytest.mark.asyncio
+    async def test_anonymous(self):
+        async with app.test_client() as client:
+            rv = await client.get('/articles', headers={'Cookie': 'theme=dark'})
+        self.assertEqual('public, s-maxage=600, max-age=60', rv.headers.get('Cache-Control'), "'public, s-maxage=600, max-age=60' == rv.headers.get('Cache-Control')")
+        self.assertEqual('Authorization,Cookie', rv.headers.get('Vary'), "'Authorization,Cookie' == rv.headers.get('Vary')")
+
+    @pytest.mark.asyncio
+    async def test_session_cookie(self):
+        async with app.test_client() as client:
+            rv = await client.get('/articles', headers={'Cookie': 'theme=dark; session=abc'})
+        self.assertEqual('max-age=60, private', rv.headers.get('Cache-Control'), "'max-age=60, private' == rv.headers.get('Cache-Control')")
+        self.assertEqual('Authorization,Cookie', rv.headers.get('Vary'), "'Authorization,Cookie' == rv.headers.get('Vary')")
+
+    @pytest.mark.asyncio
+    async def test_partitions_by_authorization_without_cookies(self):
+        async with app.test_client() as client:
+            anonymous = await client.get('/feed')
+            authorized = await client.get('/feed', headers={'Authorization': 'Bearer token'})
+        self.assertEqual('Authorization', anonymous.headers.get('Vary'), "'Authorization' == anonymous.headers.get('Vary')")
+        self.assertEqual('Authorization', authorized.headers.get('Vary'), "'Authorization' == authorized.headers.get('Vary')")
+        self.assertEqual('max-age=60, private', authorized.headers.get('Cache-Control'), "'max-age=60, private' == authorized.headers.get('Cache-Control')")
+
+    @pytest.mark.asyncio
+    async def test_authorization(self):
+        async with app.test_client() as client:
+            rv = await client.get('/api', headers={'Authorization': 'Bearer token'})
+            self.assertEqual('private, no-cache', rv.headers.get('Cache-Control'), "'private, no-cache' == rv.headers.get('Cache-Control')")
+            self.assertEqual('Accept,Authorization', rv.headers.get('Vary'), "'Accept,Authorization' == rv.headers.get('Vary')")
+            rv = await client.get('/api')
+            self.assertEqual('public, max-age=300', rv.headers.get('Cache-Control'), "'public, max-age=300' == rv.headers.get('Cache-Control')")
+
+    @pytest.mark.asyncio
+    async def test_credentialed_requests_bypass_store(self):
+        calls.clear()
+        async with app.test_app() as test_app:
+            client = test_app.test_client()
+            await client.get('/articles')
+            await client.get('/articles')
+            self.assertEqual(1, len(calls), "1 == len(calls)")
+            await client.get('/articles', headers={'Cookie': 'session=abc'})
+            await client.get('/articles', headers={'Cookie': 'session=abc'})
+            self.assertEqual(3, len(calls), "3 == len(calls)")
@@ -0,0 +1,87 @@
+import unittest
+
+import pytest
+from quart import Quart, Response
+from quart_cachecontrol import cache_for, Always, ResponseIsSuccessful, ResponseIsSuccessfulOrRedirect, \
+    ResponseStatusIn, RequestMethodIn, RequestHasHeader, ResponseMimetypeIn, ResponseContentLengthAtMost
+from quart_cachecontrol.evaluator import OnlyIfEvaluatorBase
+
+CACHE_SECONDS = 300
+
+app = Quart(__name__)
+
+
+class ResponseIsTeapot(OnlyIfEvaluatorBase):
+    def _response_qualifies(self, response):
+        return response.status_code == 418
+
+
+@app.route('/success_or_not_found/<int:status_code>')
+@cache_for(only_if=ResponseIsSuccessful | ResponseStatusIn(404), seconds=CACHE_SECONDS)
+async def view_success_or_not_found(status_code):
+    return Response(status=status_code)
+
+
+@app.route('/anonymous_html', methods=['GET', 'POST'])
+@cache_for(only_if=ResponseIsSuccessful & RequestMethodIn('GET') & ~RequestHasHeader('Authorization')
+           & ResponseMimetypeIn('text/html') & ResponseContentLengthAtMost(10), seconds=CACHE_SECONDS)
+async def view_anonymous_html():
+    return Response('html', status=200, mimetype='text/html')
+
+
+@app.route('/not_redirect/<int:status_code>')
+@cache_for(only_if=~ResponseIsSuccessfulOrRedirect, seconds=CACHE_SECONDS)
+async def view_not_redirect(status_code):
+    return Response(status=status_code)
+
+
+@app.route('/teapot/<int:status_code>')
+@cache_for(only_if=ResponseIsTeapot | ResponseIsSuccessful, seconds=CACHE_SECONDS)
+async def view_teapot(status_code):
+    return Response(status=status_code)
+
+
+class TestConditions(unittest.IsolatedAsyncioTestCase):
+    @pytest.mark.asyncio
+    async def test_status_or(self):
+        async with app.test_client() as client:
+            for status_code, cached in ((200, True), (404, True), (302, False), (500, False)):
+                rv = await client.get(f'/success_or_not_found/{status_code}')
+                self.assertEqual(cached, 'Cache-Control' in rv.headers, "cached == ('Cache-Control' in rv.headers)")
+
+    @pytest.mark.asyncio
+    async def test_request_and_response_predicates(self):
+        async with app.test_client() as client:
+            rv = await client.get('/anonymous_html')
+            self.assertIn('Cache-Control', rv.headers, "'Cache-Control' in rv.headers")
+            rv = await client.post('/anonymous_html')
+            self.assertNotIn('Cache-Control', rv.headers, "'Cache-Control' not in rv.headers")
+            rv = await client.get('/anonymous_html', headers={'Authorization': 'Bearer token'})
+            self.assertNotIn('Cache-Control', rv.headers, "'Cache-Control' not in rv.headers")
+
+    @pytest.mark.asyncio
+    async def test_invert(self):
+        async with app.test_client() as client:
+            rv = await client.get('/not_redirect/302')
+            self.assertNotIn('Cache-Control', rv.headers, "'Cache-Control' not in rv.headers")
+            rv = await client.get('/not_redirect/404')
+            self.assertIn('Cache-Control', rv.headers, "'Cache-Control' in rv.headers")
+
+    @pytest.mark.asyncio
+    async def test_custom_evaluator(self):
+        async with app.test_client() as client:
+            for status_code, cached in ((418, True), (200, True), (404, False)):
+                rv = await client.get(f'/teapot/{status_code}')
+                self.assertEqual(cached, 'Cache-Control' in rv.headers, "cached == ('Cache-Control' in rv.headers)")
+
+    def test_compiled_status_table(self):
+        check = (ResponseIsSuccessful | ResponseStatusIn(404)).compile()
+        self.assertTrue(check(Response(status=204)), "check(Response(status=204))")
+        self.assertTrue(check(Response(status=404)), "check(Response(status=404))")
+        self.assertFalse(check(Response(status=700)), "not check(Response(status=700))")
+        self.assertTrue((Always | ResponseStatusIn(404)).compile()(Response(status=700)), "(Always | ResponseStatusIn(404)) matches 700")
+
+    def test_content_length(self):
+        check = ResponseContentLengthAtMost(3).compile()
+        self.assertTrue(check(Response('abc')), "check(Response('abc'))")
+        self.assertFalse(check(Response('abcd')), "not check(Response('abcd'))")
@@ -0,0 +1,109 @@
+import unittest
+
+from quart import Quart
+from quart_cachecontrol import CacheControl
+from quart_cachecontrol.eviction import FrequencySketch, LRUPolicy, TinyLFUPolicy
+from quart_cachecontrol.store import DEFAULT_MAX_BYTES, ENTRY_OVERHEAD, MemoryStore, StoredResponse, default_store
+
+NOW = 1000.0
+
+
+def entry(size):
+    return StoredResponse(200, [], b'x' * (size - ENTRY_OVERHEAD), NOW, NOW + 60)
+
+
+class TestMemoryStoreBudget(unittest.TestCase):
+    def test_evicts_by_bytes(self):
+        store = MemoryStore(max_bytes=3000)
+        for key in 'abcd':
+            store.set(key, entry(1000))
+        self.assertIsNone(store.get('a', NOW), "store.get('a', NOW) is None")
+        self.assertEqual(3000, store.bytes, "3000 == store.bytes")
+        self.assertEqual(1, store.evictions, "1 == store.evictions")
+
+    def test_evicts_least_recently_used(self):
+        store = MemoryStore(max_bytes=3000)
+        for key in 'abc':
+            store.set(key, entry(1000))
+        store.get('a', NOW)
+        store.set('d', entry(1000))
+        self.assertIsNotNone(store.get('a', NOW), "store.get('a', NOW) is not None")
+        self.assertIsNone(store.get('b', NOW), "store.get('b', NOW) is None")
+
+    def test_evicts_by_entries(self):
+        store = MemoryStore(max_entries=2)
+        for key in 'abc':
+            store.set(key, entry(1000))
+        self.assertEqual(2, len(store), "2 == len(store)")
+
+    def test_skips_oversized_entries(self):
+        store = MemoryStore(max_bytes=3000)
+        store.set('a', entry(4000))
+        self.assertEqual(0, len(store), "0 == len(store)")
+
+    def test_stats(self):
+        store = MemoryStore()
+        store.set('a', entry(1000))
+        store.get('a', NOW)
+        store.get('b', NOW)
+        store.get('a', NOW + 60)
+        self.assertEqual({'entries': 0, 'bytes': 0, 'hits': 1, 'misses': 2, 'evictions': 0}, store.stats(), "{'entries': 0, 'bytes': 0, 'hits': 1, 'misses': 2, 'evictions': 0} == store.stats()")
+
+
+class TestLRUPolicy(unittest.TestCase):
+    def test_victim_order(self):
+        policy = LRUPolicy()
+        for key in 'abc':
+            policy.insert(key, 1)
+        policy.record_access('a')
+        self.assertEqual(['b', 'c', 'a'], [policy.victim() for _ in range(3)], "['b', 'c', 'a'] == [policy.victim() for _ in range(3)]")
+
+
+class TestFrequencySketch(unittest.TestCase):
+    def test_counts(self):
+        sketch = FrequencySketch(64)
+        for _ in range(3):
+            sketch.increment('a')
+        self.assertEqual(3, sketch.frequency('a'), "3 == sketch.frequency('a')")
+
+    def test_saturates(self):
+        sketch = FrequencySketch(64)
+        for _ in range(20):
+            sketch.increment('a')
+        self.assertEqual(15, sketch.frequency('a'), "15 == sketch.frequency('a')")
+
+    def test_ages(self):
+        sketch = FrequencySketch(64)
+        for _ in range(10 * 64):
+            sketch.increment('a')
+        self.assertEqual(7, sketch.frequency('a'), "7 == sketch.frequency('a')")
+
+
+class TestTinyLFUPolicy(unittest.TestCase):
+    def test_scan_keeps_popular_entries(self):
+        store = MemoryStore(max_bytes=100 * 1000, eviction=TinyLFUPolicy())
+        for key in range(90):
+            store.set(key, entry(1000))
+            for _ in range(3):
+                store.get(key, NOW)
+        for key in range(1000, 2000):
+            store.get(key, NOW)
+            store.set(key, entry(1000))
+        hits = sum(store.get(key, NOW) is not None for key in range(90))
+        self.assertGreaterEqual(hits, 85, "hits >= 85")
+
+    def test_lru_flushed_by_scan(self):
+        store = MemoryStore(max_bytes=100 * 1000)
+        for key in range(90):
+            store.set(key, entry(1000))
+        for key in range(1000, 2000):
+            store.set(key, entry(1000))
+        hits = sum(store.get(key, NOW) is not None for key in range(90))
+        self.assertEqual(0, hits, "0 == hits")
+
+
+class TestDefaultStores(unittest.TestCase):
+    def test_bounded(self):
+        self.assertEqual(DEFAULT_MAX_BYTES, default_store._max_bytes, "DEFAULT_MAX_BYTES == default_store._max_bytes")
+        state = CacheControl().init_app(Quart(__name__))
+        self.assertEqual(DEFAULT_MAX_BYTES, state.store._max_bytes, "DEFAULT_MAX_BYTES == state.store._max_bytes")
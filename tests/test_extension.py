@@ -0,0 +1,111 @@
+import threading
+import unittest
+
+import pytest
+from quart import Blueprint, Quart, Response
+from quart_cachecontrol import CacheControl, cache_for, cache, dont_cache, Always
+
+CACHE_SECONDS = 300
+VARY_HEADERS = ['User-Agent', 'Referer']
+VARY_HEADERS_STR = ','.join(VARY_HEADERS)
+
+app = Quart(__name__)
+blueprint = Blueprint('blueprint', __name__)
+
+
+@app.route('/cache_for/<int:status_code>')
+@cache_for(seconds=CACHE_SECONDS, vary=VARY_HEADERS)
+async def view_cache_for(status_code):
+    return Response(status=status_code)
+
+
+@app.route('/cache_for/sync/<int:status_code>')
+@cache_for(seconds=CACHE_SECONDS)
+def view_cache_for_sync(status_code):
+    return Response(status=status_code)
+
+
+@app.route('/dont_cache/<int:status_code>')
+@dont_cache(only_if=Always)
+async def view_dont_cache(status_code):
+    return Response(status=status_code)
+
+
+@app.route('/undecorated')
+async def view_undecorated():
+    return Response(status=200)
+
+
+@blueprint.route('/blueprint/cache')
+@cache(max_age=CACHE_SECONDS, public=True)
+async def view_blueprint_cache():
+    return Response(status=200)
+
+
+app.register_blueprint(blueprint)
+CacheControl(app)
+
+executor_app = Quart(__name__)
+
+
+@executor_app.route('/sync')
+@cache_for(seconds=CACHE_SECONDS)
+def view_executor_sync():
+    return Response(threading.current_thread().name, status=200)
+
+
+CacheControl(executor_app, max_workers=2)
+
+
+class TestCacheControlExtension(unittest.IsolatedAsyncioTestCase):
+    @pytest.mark.asyncio
+    async def test_cache_for(self):
+        async with app.test_client() as client:
+            rv = await client.get('/cache_for/200')
+        self.assertEqual(f'max-age={CACHE_SECONDS}', rv.headers.get('Cache-Control'), "f'max-age={CACHE_SECONDS}' == rv.headers.get('Cache-Control')")
+        self.assertEqual(VARY_HEADERS_STR, rv.headers.get('Vary'), "VARY_HEADERS_STR == rv.headers.get('Vary')")
+        self.assertIn('Expires', rv.headers, "'Expires' in rv.headers")
+
+    @pytest.mark.asyncio
+    async def test_cache_for_client_error(self):
+        async with app.test_client() as client:
+            rv = await client.get('/cache_for/404')
+        self.assertNotIn('Cache-Control', rv.headers, "'Cache-Control' not in rv.headers")
+        self.assertEqual(VARY_HEADERS_STR, rv.headers.get('Vary'), "VARY_HEADERS_STR == rv.headers.get('Vary')")
+
+    @pytest.mark.asyncio
+    async def test_dont_cache(self):
+        async with app.test_client() as client:
+            rv = await client.get('/dont_cache/404')
+        self.assertIn('no-cache', rv.headers.get('Cache-Control'), "'no-cache' in rv.headers.get('Cache-Control')")
+
+    @pytest.mark.asyncio
+    async def test_blueprint(self):
+        async with app.test_client() as client:
+            rv = await client.get('/blueprint/cache')
+        self.assertEqual(f'max-age={CACHE_SECONDS}, public', rv.headers.get('Cache-Control'), "f'max-age={CACHE_SECONDS}, public' == rv.headers.get('Cache-Control')")
+
+    @pytest.mark.asyncio
+    async def test_undecorated(self):
+        async with app.test_client() as client:
+            rv = await client.get('/undecorated')
+        self.assertNotIn('Cache-Control', rv.headers, "'Cache-Control' not in rv.headers")
+
+    @pytest.mark.asyncio
+    async def test_serving_unwraps_views(self):
+        async with app.test_app() as test_app:
+            self.assertIs(view_cache_for.cache_control_view, app.view_functions['view_cache_for'], "view_cache_for.cache_control_view is app.view_functions['view_cache_for']")
+            client = test_app.test_client()
+            rv = await client.get('/cache_for/200')
+            self.assertEqual(f'max-age={CACHE_SECONDS}', rv.headers.get('Cache-Control'), "f'max-age={CACHE_SECONDS}' == rv.headers.get('Cache-Control')")
+            rv = await client.get('/cache_for/sync/200')
+            self.assertEqual(f'max-age={CACHE_SECONDS}', rv.headers.get('Cache-Control'), "f'max-age={CACHE_SECONDS}' == rv.headers.get('Cache-Control')")
+
+
+class TestCacheControlExtensionExecutor(unittest.IsolatedAsyncioTestCase):
+    @pytest.mark.asyncio
+    async def test_sync_view_runs_in_app_executor(self):
+        async with executor_app.test_app() as test_app:
+            rv = await test_app.test_client().get('/sync')
+            self.assertTrue((await rv.get_data(as_text=True)).startswith('quart-cachecontrol'), "(await rv.get_data(as_text=True)).startswith('quart-cachecontrol')")
+            self.assertEqual(f'max-age={CACHE_SECONDS}', rv.headers.get('Cache-Control'), "f'max-age={CACHE_SECONDS}' == rv.headers.get('Cache-Control')")
@@ -0,0 +1,177 @@
+import asyncio
+import threading
+import time
+import unittest
+
+import pytest
+from quart import Response
+from quart_cachecontrol import CacheControlPolicyInvalidError, ResponseIsSuccessful, memoize_for
+
+
+class FakeClock(object):
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class TestMemoizeFor(unittest.IsolatedAsyncioTestCase):
+    @pytest.mark.asyncio
+    async def test_keeps_results_for_duration(self):
+        clock = FakeClock()
+        calls = []
+
+        @memoize_for(minutes=1, clock=clock)
+        async def total(user_id, currency='EUR'):
+            calls.append((user_id, currency))
+            return len(calls)
+
+        self.assertEqual(1, await total(1), 'await total(1) == 1')
+        self.assertEqual(1, await total(1), 'await total(1) == 1')
+        self.assertEqual(2, await total(1, currency='USD'), "await total(1, currency='USD') == 2")
+        self.assertEqual(2, await total(1, currency='USD'), "await total(1, currency='USD') == 2")
+        clock.now = 60
+        self.assertEqual(3, await total(1), 'await total(1) == 3')
+        self.assertEqual(3, len(calls), 'len(calls) == 3')
+
+    @pytest.mark.asyncio
+    async def test_concurrent_calls_share_one_call(self):
+        calls = []
+
+        @memoize_for(minutes=1)
+        async def aggregate(name):
+            calls.append(name)
+            await asyncio.sleep(0.01)
+            return name.upper()
+
+        results = await asyncio.gather(*(aggregate('a') for _ in range(5)))
+        self.assertEqual(['A'] * 5, results, "results == ['A'] * 5")
+        self.assertEqual(['a'], calls, "calls == ['a']")
+
+    @pytest.mark.asyncio
+    async def test_errors_are_not_kept(self):
+        calls = []
+
+        @memoize_for(minutes=1)
+        async def fails():
+            calls.append(True)
+            raise ValueError()
+
+        for _ in range(2):
+            with self.assertRaises(ValueError):
+                await fails()
+        self.assertEqual(2, len(calls), 'len(calls) == 2')
+        self.assertEqual(0, fails.stats()['in_flight'], "fails.stats()['in_flight'] == 0")
+
+    @pytest.mark.asyncio
+    async def test_invalidate(self):
+        calls = []
+
+        @memoize_for(minutes=1)
+        async def load(key):
+            calls.append(key)
+            return len(calls)
+
+        await load('a')
+        await load('b')
+        self.assertTrue(load.invalidate('a'), "load.invalidate('a')")
+        self.assertFalse(load.invalidate('a'), "not load.invalidate('a')")
+        self.assertEqual(3, await load('a'), "await load('a') == 3")
+        self.assertEqual(2, await load('b'), "await load('b') == 2")
+        load.clear()
+        self.assertEqual(4, await load('b'), "await load('b') == 4")
+
+    @pytest.mark.asyncio
+    async def test_invalidated_in_flight_result_is_not_kept(self):
+        calls = []
+
+        @memoize_for(minutes=1)
+        async def load():
+            calls.append(True)
+            await asyncio.sleep(0.01)
+            return len(calls)
+
+        task = asyncio.ensure_future(load())
+        await asyncio.sleep(0)
+        load.invalidate()
+        self.assertEqual(1, await task, 'await task == 1')
+        self.assertEqual(2, await load(), 'await load() == 2')
+
+    @pytest.mark.asyncio
+    async def test_only_if(self):
+        @memoize_for(minutes=1, only_if=lambda result: result is not None)
+        async def find(key, calls=[]):
+            calls.append(key)
+            return None if len(calls) == 1 else len(calls)
+
+        self.assertIsNone(await find('a'), "await find('a') is None")
+        self.assertEqual(2, await find('a'), "await find('a') == 2")
+        self.assertEqual(2, await find('a'), "await find('a') == 2")
+
+    @pytest.mark.asyncio
+    async def test_only_if_evaluator(self):
+        statuses = [500, 200, 404]
+
+        @memoize_for(minutes=1, only_if=ResponseIsSuccessful)
+        async def fragment():
+            return Response('', status=statuses.pop(0))
+
+        self.assertEqual(500, (await fragment()).status_code, '(await fragment()).status_code == 500')
+        self.assertEqual(200, (await fragment()).status_code, '(await fragment()).status_code == 200')
+        self.assertEqual(200, (await fragment()).status_code, '(await fragment()).status_code == 200')
+
+    @pytest.mark.asyncio
+    async def test_maxsize(self):
+        calls = []
+
+        @memoize_for(minutes=1, maxsize=2)
+        async def load(key):
+            calls.append(key)
+            return key
+
+        for key in ('a', 'b', 'a', 'c', 'a', 'b'):
+            await load(key)
+        self.assertEqual(['a', 'b', 'c', 'b'], calls, "calls == ['a', 'b', 'c', 'b']")
+        self.assertEqual(2, load.stats()['entries'], "load.stats()['entries'] == 2")
+
+    def test_sync_concurrent_calls_share_one_call(self):
+        calls = []
+
+        @memoize_for(seconds=30)
+        def aggregate(name):
+            calls.append(name)
+            time.sleep(0.05)
+            return name.upper()
+
+        results = []
+        threads = [threading.Thread(target=lambda: results.append(aggregate('a'))) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(['A'] * 4, results, "results == ['A'] * 4")
+        self.assertEqual(['a'], calls, "calls == ['a']")
+        self.assertEqual('A', aggregate('a'), "aggregate('a') == 'A'")
+        self.assertEqual(1, len(calls), 'len(calls) == 1')
+
+    def test_sync_errors_are_not_kept(self):
+        @memoize_for(seconds=30)
+        def fails():
+            raise KeyError()
+
+        with self.assertRaises(KeyError):
+            fails()
+        self.assertEqual(0, fails.stats()['in_flight'], "fails.stats()['in_flight'] == 0")
+
+    def test_unhashable_arguments(self):
+        @memoize_for(seconds=30)
+        def count(items):
+            return len(items)
+
+        with self.assertRaises(TypeError):
+            count([1, 2])
+
+    def test_needs_positive_duration(self):
+        with self.assertRaises(CacheControlPolicyInvalidError):
+            memoize_for()
@@ -0,0 +1,99 @@
+import unittest
+
+import pytest
+from quart import Quart, Response
+from quart_cachecontrol import CacheControl, CacheMetrics, MemoryStore, cache_for, dont_cache, Always
+
+CACHE_SECONDS = 300
+
+metrics = CacheMetrics()
+app = Quart(__name__)
+
+
+@app.route('/cache_for/<int:status_code>')
+@cache_for(seconds=CACHE_SECONDS)
+async def view_cache_for(status_code):
+    return Response('body', status=status_code)
+
+
+@app.route('/store')
+@cache_for(seconds=CACHE_SECONDS, store=True)
+async def view_store():
+    return Response('body', status=200)
+
+
+@app.route('/dont_cache')
+@dont_cache(only_if=Always)
+async def view_dont_cache():
+    return Response(status=200)
+
+
+CacheControl(app, store=MemoryStore(), metrics=metrics)
+metrics.add_url_rule(app)
+
+
+def metrics_of(endpoint):
+    return next(item for item in metrics.snapshot() if item['endpoint'] == endpoint)
+
+
+class TestCacheMetrics(unittest.IsolatedAsyncioTestCase):
+    @pytest.mark.asyncio
+    async def test_qualified_and_skipped(self):
+        async with app.test_client() as client:
+            await client.get('/cache_for/200')
+            await client.get('/cache_for/200')
+            await client.get('/cache_for/404')
+            await client.get('/cache_for/503')
+        item = metrics_of('view_cache_for')
+        self.assertEqual('cache_for', item['decorator'], "'cache_for' == item['decorator']")
+        self.assertGreaterEqual(item['qualified'], 2, "item['qualified'] >= 2")
+        self.assertGreaterEqual(item['skipped']['4xx'], 1, "item['skipped']['4xx'] >= 1")
+        self.assertGreaterEqual(item['skipped']['5xx'], 1, "item['skipped']['5xx'] >= 1")
+        self.assertGreater(item['callback_seconds'], 0, "item['callback_seconds'] > 0")
+
+    @pytest.mark.asyncio
+    async def test_store_results(self):
+        async with app.test_app() as test_app:
+            client = test_app.test_client()
+            await client.get('/store')
+            await client.get('/store')
+        item = metrics_of('view_store')
+        self.assertGreaterEqual(item['stored'], 1, "item['stored'] >= 1")
+        self.assertGreaterEqual(item['hits'], 1, "item['hits'] >= 1")
+
+    @pytest.mark.asyncio
+    async def test_dont_cache(self):
+        async with app.test_client() as client:
+            await client.get('/dont_cache')
+        item = metrics_of('view_dont_cache')
+        self.assertEqual('dont_cache', item['decorator'], "'dont_cache' == item['decorator']")
+        self.assertGreaterEqual(item['qualified'], 1, "item['qualified'] >= 1")
+
+    @pytest.mark.asyncio
+    async def test_prometheus_text(self):
+        async with app.test_client() as client:
+            await client.get('/cache_for/200')
+            rv = await client.get('/metrics')
+        text = await rv.get_data(as_text=True)
+        self.assertIn('# TYPE quart_cachecontrol_responses_total counter', text, "'# TYPE quart_cachecontrol_responses_total counter' in text")
+        self.assertIn('quart_cachecontrol_responses_total{endpoint="view_cache_for",decorator="cache_for",outcome="qualified"}', text, "'quart_cachecontrol_responses_total{endpoint=\"view_cache_for\",...' in text")
+        self.assertNotIn('endpoint="cache_control_metrics"', text, "'endpoint=\"cache_control_metrics\"' not in text")
+
+    def test_escape_labels(self):
+        escaped = CacheMetrics()
+        escaped.slot('a"b\\c', 'cache')
+        self.assertIn('endpoint="a\\"b\\\\c"', escaped.prometheus_text(), "'endpoint=\"a\\\\\"b\\\\\\\\c\"' in escaped.prometheus_text()")
+
+
+class TestWithoutMetrics(unittest.IsolatedAsyncioTestCase):
+    @pytest.mark.asyncio
+    async def test_policy_not_instrumented(self):
+        plain = Quart(__name__)
+
+        @plain.route('/')
+        @cache_for(seconds=CACHE_SECONDS)
+        async def view():
+            return Response(status=200)
+
+        state = CacheControl().init_app(plain)
+        self.assertIs(view.cache_control_policy, state.policy_for('view'), "view.cache_control_policy is state.policy_for('view')")
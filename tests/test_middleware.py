@@ -0,0 +1,105 @@
+import unittest
+
+import pytest
+import quart
+from quart import Quart, Response
+from quart_cachecontrol import CacheControlMiddleware, CacheRule, CacheControlPolicyInvalidError, Always, \
+    ResponseStatusIn, ResponseMimetypeIn, ResponseIsSuccessful, RequestMethodIn, RequestHasHeader, \
+    ResponseContentLengthAtMost, cache, cache_for, dont_cache
+from quart_cachecontrol.evaluator import OnlyIfEvaluatorBase
+
+
+class RequestIsSecure(OnlyIfEvaluatorBase):
+    def _response_qualifies(self, response):
+        return quart.request.is_secure
+
+app = Quart(__name__)
+
+
+@app.route('/assets/<path:name>')
+async def view_static(name):
+    return Response('static', mimetype='text/css')
+
+
+@app.route('/api/<int:status_code>', methods=['GET', 'POST'])
+async def view_api(status_code):
+    return Response('{}', status=status_code, mimetype='application/json', headers={'Vary': 'Cookie'})
+
+
+@app.route('/stream')
+async def view_stream():
+    async def chunks():
+        yield b'a'
+        yield b'b'
+    return Response(chunks(), mimetype='text/plain')
+
+
+@app.route('/own')
+async def view_own():
+    return Response('own', headers={'Cache-Control': 'public'})
+
+
+@app.route('/admin')
+async def view_admin():
+    return Response('admin')
+
+
+app.asgi_app = CacheControlMiddleware(app.asgi_app, [
+    CacheRule(cache_for(hours=1, tags=['static']), prefix='/assets/'),
+    CacheRule(cache_for(minutes=5, vary=['Accept-Language'], only_if=ResponseStatusIn(200, 404)), glob='/api/*',
+              methods=['GET']),
+    CacheRule(cache(max_age=60, only_if=Always & ResponseMimetypeIn('text/plain')), prefix='/stream'),
+    CacheRule(cache(max_age=60), prefix='/own'),
+    CacheRule(dont_cache(), prefix='/admin'),
+])
+
+
+class TestCacheControlMiddleware(unittest.IsolatedAsyncioTestCase):
+    @pytest.mark.asyncio
+    async def test_cache_for(self):
+        async with app.test_client() as client:
+            rv = await client.get('/assets/site.css')
+        self.assertEqual('max-age=3600', rv.headers.get('Cache-Control'), "'max-age=3600' == rv.headers.get('Cache-Control')")
+        self.assertIn('Expires', rv.headers, "'Expires' in rv.headers")
+        self.assertEqual('static', rv.headers.get('Surrogate-Key'), "'static' == rv.headers.get('Surrogate-Key')")
+
+    @pytest.mark.asyncio
+    async def test_status_and_method(self):
+        async with app.test_client() as client:
+            rv = await client.get('/api/404')
+            self.assertEqual('max-age=300', rv.headers.get('Cache-Control'), "'max-age=300' == rv.headers.get('Cache-Control')")
+            self.assertEqual('Accept-Language', rv.headers.get('Vary'), "'Accept-Language' == rv.headers.get('Vary')")
+            rv = await client.get('/api/500')
+            self.assertNotIn('Cache-Control', rv.headers, "'Cache-Control' not in rv.headers")
+            self.assertEqual('Accept-Language', rv.headers.get('Vary'), "'Accept-Language' == rv.headers.get('Vary')")
+            rv = await client.post('/api/200')
+            self.assertNotIn('Cache-Control', rv.headers, "'Cache-Control' not in rv.headers")
+
+    @pytest.mark.asyncio
+    async def test_streamed_body_untouched(self):
+        async with app.test_client() as client:
+            rv = await client.get('/stream')
+        self.assertEqual(b'ab', await rv.get_data(), "b'ab' == await rv.get_data()")
+        self.assertEqual('max-age=60', rv.headers.get('Cache-Control'), "'max-age=60' == rv.headers.get('Cache-Control')")
+
+    @pytest.mark.asyncio
+    async def test_merge_and_dont_cache(self):
+        async with app.test_client() as client:
+            rv = await client.get('/own')
+            self.assertEqual('public, max-age=60', rv.headers.get('Cache-Control'), "'public, max-age=60' == rv.headers.get('Cache-Control')")
+            rv = await client.get('/admin')
+            self.assertIn('no-store', rv.headers.get('Cache-Control'), "'no-store' in rv.headers.get('Cache-Control')")
+
+    def test_unsupported_policies(self):
+        for rule in (CacheRule(cache_for(minutes=5, etag=True), prefix='/'),
+                     CacheRule(cache_for(minutes=5, tags=lambda: ['tag']), prefix='/'),
+                     CacheRule(dont_cache(), endpoint='view_admin'),
+                     CacheRule(cache_for(minutes=1, only_if=ResponseIsSuccessful & RequestMethodIn('GET')), prefix='/'),
+                     CacheRule(cache_for(minutes=1, only_if=~RequestHasHeader('Cookie')), prefix='/'),
+                     CacheRule(cache_for(minutes=1, only_if=RequestIsSecure), prefix='/')):
+            with self.assertRaises(CacheControlPolicyInvalidError):
+                CacheControlMiddleware(app.asgi_app, [rule])
+
+    def test_response_only_conditions(self):
+        only_if = (ResponseIsSuccessful | ResponseStatusIn(404)) & ~ResponseContentLengthAtMost(10)
+        CacheControlMiddleware(app.asgi_app, [CacheRule(cache_for(minutes=1, only_if=only_if), prefix='/')])
@@ -0,0 +1,73 @@
+import unittest
+
+import pytest
+from quart import Quart, Response
+from quart_cachecontrol import CacheControl, MemoryStore, Normalizer, AcceptLanguage, accept_encoding, device_class, \
+    normalized_header, cache_for
+
+app = Quart(__name__)
+calls = []
+
+
+@app.route('/localized')
+@cache_for(minutes=5, vary=['Accept-Language', 'Cookie'], store=True, normalize={
+    'Accept-Language': AcceptLanguage(['en', 'de']),
+    'User-Agent': Normalizer(device_class, header='X-Device'),
+})
+async def view_localized():
+    calls.append(1)
+    return Response(f"{normalized_header('Accept-Language')} {normalized_header('User-Agent')}")
+
+
+CacheControl(app, store=MemoryStore())
+
+
+class TestNormalizers(unittest.TestCase):
+    def test_accept_encoding(self):
+        self.assertEqual('br', accept_encoding('gzip, deflate, br'), "'br' == accept_encoding('gzip, deflate, br')")
+        self.assertEqual('gzip', accept_encoding('gzip;q=0.8, br;q=0'), "'gzip' == accept_encoding('gzip;q=0.8, br;q=0')")
+        self.assertEqual('identity', accept_encoding(None), "'identity' == accept_encoding(None)")
+        self.assertEqual('identity', accept_encoding('deflate'), "'identity' == accept_encoding('deflate')")
+
+    def test_accept_language(self):
+        accept_language = AcceptLanguage(['en', 'de'])
+        self.assertEqual('de', accept_language('de-AT,de;q=0.9,en;q=0.5'), "'de' == accept_language('de-AT,de;q=0.9,en;q=0.5')")
+        self.assertEqual('en', accept_language('fr'), "'en' == accept_language('fr')")
+        self.assertEqual('en', accept_language(None), "'en' == accept_language(None)")
+
+    def test_device_class(self):
+        self.assertEqual('mobile', device_class('Mozilla/5.0 (iPhone; CPU iPhone OS 17_0)'), "'mobile' == device_class(iPhone)")
+        self.assertEqual('desktop', device_class('Mozilla/5.0 (X11; Linux x86_64)'), "'desktop' == device_class(Linux)")
+        self.assertEqual('desktop', device_class(None), "'desktop' == device_class(None)")
+
+    def test_memoized(self):
+        normalizer = Normalizer(device_class, maxsize=2)
+        for _ in range(3):
+            normalizer.bucket('Mozilla/5.0 (X11; Linux x86_64)')
+        self.assertEqual(2, normalizer.bucket.cache_info().hits, "2 == normalizer.bucket.cache_info().hits")
+        self.assertEqual('X-User-Agent-Bucket', normalizer.header_for('User-Agent'), "'X-User-Agent-Bucket' == normalizer.header_for('User-Agent')")
+
+
+class TestNormalizeDecorator(unittest.IsolatedAsyncioTestCase):
+    @pytest.mark.asyncio
+    async def test_buckets(self):
+        async with app.test_app() as test_app:
+            client = test_app.test_client()
+            rv = await client.get('/localized', headers={'Accept-Language': 'de-AT,de;q=0.9', 'User-Agent': 'Android'})
+            self.assertEqual('de mobile', await rv.get_data(as_text=True), "'de mobile' == await rv.get_data(as_text=True)")
+            self.assertEqual('Cookie,X-Accept-Language-Bucket,X-Device', rv.headers.get('Vary'), "'Cookie,X-Accept-Language-Bucket,X-Device' == rv.headers.get('Vary')")
+            self.assertEqual('de', rv.headers.get('X-Accept-Language-Bucket'), "'de' == rv.headers.get('X-Accept-Language-Bucket')")
+            self.assertEqual('mobile', rv.headers.get('X-Device'), "'mobile' == rv.headers.get('X-Device')")
+
+    @pytest.mark.asyncio
+    async def test_store_keyed_by_bucket(self):
+        calls.clear()
+        async with app.test_app() as test_app:
+            client = test_app.test_client()
+            await client.get('/localized', headers={'Accept-Language': 'de-DE'})
+            rv = await client.get('/localized', headers={'Accept-Language': 'de-CH,de;q=0.8'})
+            self.assertEqual('de desktop', await rv.get_data(as_text=True), "'de desktop' == await rv.get_data(as_text=True)")
+            self.assertEqual(1, len(calls), "1 == len(calls)")
+            rv = await client.get('/localized', headers={'Accept-Language': 'en-US'})
+            self.assertEqual('en desktop', await rv.get_data(as_text=True), "'en desktop' == await rv.get_data(as_text=True)")
+            self.assertEqual(2, len(calls), "2 == len(calls)")
@@ -0,0 +1,208 @@
+import asyncio
+import unittest
+
+import pytest
+from quart import Quart
+from quart_cachecontrol import HTTPPurgeTransport, PurgeDispatcher, PurgeError
+
+
+class PurgeServer(object):
+    """
+    Stand-in reverse proxy recording the purge requests it gets.
+    """
+    def __init__(self, statuses=()):
+        self.requests = []
+        self.connections = 0
+        self.statuses = list(statuses)
+
+    async def start(self):
+        self.server = await asyncio.start_server(self.handle, '127.0.0.1', 0)
+        port = self.server.sockets[0].getsockname()[1]
+        self.url = f'http://127.0.0.1:{port}/'
+
+    async def stop(self):
+        self.server.close()
+        await self.server.wait_closed()
+
+    async def handle(self, reader, writer):
+        self.connections += 1
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b'\r\n', b''):
+                        break
+                    name, _, value = line.decode().partition(':')
+                    headers[name.strip()] = value.strip()
+                method, path, _ = request_line.decode().split()
+                self.requests.append((method, path, headers))
+                status = self.statuses.pop(0) if self.statuses else 200
+                if status is None:
+                    writer.write(b'garbage\r\n\r\n')
+                    await writer.drain()
+                    continue
+                if 100 <= status < 200:
+                    writer.write(f'HTTP/1.1 {status} X\r\n\r\n'.encode())
+                    status = 200
+                if status in (204, 304):
+                    writer.write(f'HTTP/1.1 {status} X\r\n\r\n'.encode())
+                else:
+                    writer.write(f'HTTP/1.1 {status} X\r\nContent-Length: 2\r\n\r\nok'.encode())
+                await writer.drain()
+        finally:
+            writer.close()
+
+
+class TestPurgeDispatcher(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.server = PurgeServer()
+        await self.server.start()
+
+    async def asyncTearDown(self):
+        await self.server.stop()
+
+    def dispatcher(self, **kw):
+        return PurgeDispatcher(HTTPPurgeTransport(self.server.url, pool_size=1), **kw)
+
+    @pytest.mark.asyncio
+    async def test_batches_deduplicated_purges(self):
+        dispatcher = self.dispatcher(window=0.01)
+        dispatcher.purge_keys('user:1', 'user:2')
+        dispatcher.purge_keys('user:1')
+        dispatcher.purge_urls('/users/1', '/users/1')
+        self.assertEqual([], self.server.requests, 'self.server.requests == []')
+        await asyncio.sleep(0.1)
+        self.assertEqual([
+            ('PURGE', '/users/1', {'Host': self.server.url[7:-1], 'Content-Length': '0'}),
+            ('PURGE', '/', {'Host': self.server.url[7:-1], 'Surrogate-Key': 'user:1 user:2', 'Content-Length': '0'}),
+        ], self.server.requests, 'self.server.requests')
+        self.assertEqual(1, self.server.connections, 'self.server.connections == 1')
+        stats = dispatcher.stats()
+        self.assertEqual(5, stats['requested'], "stats['requested'] == 5")
+        self.assertEqual(3, stats['sent'], "stats['sent'] == 3")
+        self.assertEqual(0.4, stats['dedupe_ratio'], "stats['dedupe_ratio'] == 0.4")
+        self.assertEqual(1, stats['batches'], "stats['batches'] == 1")
+        self.assertIsNotNone(stats['last_batch_seconds'], "stats['last_batch_seconds'] is not None")
+        await dispatcher.close()
+
+    @pytest.mark.asyncio
+    async def test_splits_keys_by_max_batch(self):
+        dispatcher = self.dispatcher(max_batch=2)
+        dispatcher.purge_keys('a', 'b', 'c')
+        await dispatcher.flush()
+        keys = [headers['Surrogate-Key'] for _, _, headers in self.server.requests]
+        self.assertEqual(['a b', 'c'], keys, "keys == ['a b', 'c']")
+        await dispatcher.close()
+
+    @pytest.mark.asyncio
+    async def test_absolute_urls_keep_their_host(self):
+        dispatcher = self.dispatcher()
+        dispatcher.purge_urls('https://example.com/a?page=2')
+        await dispatcher.flush()
+        method, path, headers = self.server.requests[0]
+        self.assertEqual('/a?page=2', path, "path == '/a?page=2'")
+        self.assertEqual('example.com', headers['Host'], "headers['Host'] == 'example.com'")
+        await dispatcher.close()
+
+    @pytest.mark.asyncio
+    async def test_retries_failed_purges(self):
+        self.server.statuses = [503, 500]
+        dispatcher = self.dispatcher(retries=2, backoff=0.001)
+        dispatcher.purge_urls('/a')
+        await dispatcher.flush()
+        self.assertEqual(3, len(self.server.requests), 'len(self.server.requests) == 3')
+        stats = dispatcher.stats()
+        self.assertEqual(1, stats['sent'], "stats['sent'] == 1")
+        self.assertEqual(2, stats['retried'], "stats['retried'] == 2")
+        await dispatcher.close()
+
+    @pytest.mark.asyncio
+    async def test_counts_purges_failing_every_retry(self):
+        self.server.statuses = [500] * 3
+        dispatcher = self.dispatcher(retries=1, backoff=0.001)
+        dispatcher.purge_keys('a', 'b')
+        with self.assertLogs('quart_cachecontrol.purge', 'ERROR'):
+            await dispatcher.flush()
+        stats = dispatcher.stats()
+        self.assertEqual(2, stats['failed'], "stats['failed'] == 2")
+        self.assertEqual(0, stats['sent'], "stats['sent'] == 0")
+        await dispatcher.close()
+
+    @pytest.mark.asyncio
+    async def test_retries_malformed_responses(self):
+        self.server.statuses = [None, None]
+        dispatcher = self.dispatcher(retries=1, backoff=0.001)
+        dispatcher.purge_urls('/a')
+        with self.assertLogs('quart_cachecontrol.purge', 'ERROR'):
+            await dispatcher.flush()
+        stats = dispatcher.stats()
+        self.assertEqual(1, stats['failed'], "stats['failed'] == 1")
+        self.assertEqual(1, stats['retried'], "stats['retried'] == 1")
+        self.assertEqual(1, stats['batches'], "stats['batches'] == 1")
+        await dispatcher.close()
+
+    @pytest.mark.asyncio
+    async def test_counts_purges_of_failing_transports(self):
+        class FailingTransport(object):
+            async def purge_url(self, url):
+                raise RuntimeError('broken')
+
+            async def purge_keys(self, keys):
+                return None
+
+            async def close(self):
+                return None
+
+        dispatcher = PurgeDispatcher(FailingTransport())
+        dispatcher.purge_urls('/a', '/b')
+        dispatcher.purge_keys('c')
+        with self.assertLogs('quart_cachecontrol.purge', 'ERROR'):
+            await dispatcher.flush()
+        stats = dispatcher.stats()
+        self.assertEqual(2, stats['failed'], "stats['failed'] == 2")
+        self.assertEqual(1, stats['sent'], "stats['sent'] == 1")
+        self.assertEqual(0.0, stats['dedupe_ratio'], "stats['dedupe_ratio'] == 0.0")
+        self.assertEqual(1, stats['batches'], "stats['batches'] == 1")
+        await dispatcher.close()
+
+    @pytest.mark.asyncio
+    async def test_flushes_when_app_stops_serving(self):
+        app = Quart(__name__)
+        dispatcher = self.dispatcher(window=60)
+        dispatcher.init_app(app)
+        async with app.test_app():
+            dispatcher.purge_urls('/a')
+        self.assertEqual(1, len(self.server.requests), 'len(self.server.requests) == 1')
+
+
+class TestHTTPPurgeTransport(unittest.IsolatedAsyncioTestCase):
+    @pytest.mark.asyncio
+    async def test_raises_on_error_status(self):
+        server = PurgeServer(statuses=[404])
+        await server.start()
+        transport = HTTPPurgeTransport(server.url, method='BAN')
+        with self.assertRaises(PurgeError) as context:
+            await transport.purge_url('/missing')
+        self.assertEqual(404, context.exception.status, 'context.exception.status == 404')
+        self.assertEqual('BAN', server.requests[0][0], "server.requests[0][0] == 'BAN'")
+        await transport.close()
+        await server.stop()
+
+    @pytest.mark.asyncio
+    async def test_keeps_connection_of_bodiless_responses(self):
+        server = PurgeServer(statuses=[204, 100, 304])
+        await server.start()
+        transport = HTTPPurgeTransport(server.url, pool_size=1, timeout=1)
+        self.assertEqual(204, await transport.request('/a', {}), "await transport.request('/a', {}) == 204")
+        self.assertEqual(200, await transport.request('/b', {}), "await transport.request('/b', {}) == 200")
+        with self.assertRaises(PurgeError) as context:
+            await transport.request('/c', {})
+        self.assertEqual(304, context.exception.status, 'context.exception.status == 304')
+        self.assertEqual(200, await transport.request('/d', {}), "await transport.request('/d', {}) == 200")
+        self.assertEqual(1, server.connections, 'server.connections == 1')
+        await transport.close()
+        await server.stop()
@@ -0,0 +1,115 @@
+import unittest
+
+import pytest
+from quart import Blueprint, Quart, Response
+from quart_cachecontrol import CacheControl, CacheRule, CacheRules, CacheControlPolicyInvalidError, cache, \
+    cache_for, dont_cache
+
+app = Quart(__name__)
+admin = Blueprint('admin', __name__)
+
+
+@app.route('/docs/<path:page>')
+async def view_docs(page):
+    return Response('docs', mimetype='text/html')
+
+
+@app.route('/api/v1/items', methods=['GET', 'POST'])
+async def view_api_items():
+    return Response('{}', mimetype='application/json')
+
+
+@app.route('/api/v1/export')
+async def view_api_export():
+    return Response('a,b', mimetype='text/csv')
+
+
+@app.route('/index')
+async def view_index():
+    return Response('index')
+
+
+@app.route('/decorated')
+@cache(max_age=1, public=True)
+async def view_decorated():
+    return Response('decorated')
+
+
+@app.route('/unmatched')
+async def view_unmatched():
+    return Response('unmatched')
+
+
+@admin.route('/admin/panel')
+async def view_panel():
+    return Response('panel')
+
+
+app.register_blueprint(admin)
+
+rules = CacheRules([
+    CacheRule(dont_cache(), blueprint='admin'),
+    CacheRule(cache(max_age=60, public=True), endpoint='view_index'),
+    CacheRule(cache_for(hours=1), glob='/docs/*'),
+    CacheRule(cache_for(minutes=5), regex=r'/api/v\d+/', methods=['GET'], mimetypes=['application/json']),
+    CacheRule(cache(max_age=10), prefix='/api/'),
+])
+CacheControl(app, rules=rules)
+
+
+class TestCacheRules(unittest.IsolatedAsyncioTestCase):
+    @pytest.mark.asyncio
+    async def test_glob(self):
+        async with app.test_client() as client:
+            rv = await client.get('/docs/intro')
+        self.assertEqual('max-age=3600', rv.headers.get('Cache-Control'), "'max-age=3600' == rv.headers.get('Cache-Control')")
+
+    @pytest.mark.asyncio
+    async def test_first_matching_rule(self):
+        async with app.test_client() as client:
+            rv = await client.get('/api/v1/items')
+            self.assertEqual('max-age=300', rv.headers.get('Cache-Control'), "'max-age=300' == rv.headers.get('Cache-Control')")
+            rv = await client.post('/api/v1/items')
+            self.assertEqual('max-age=10', rv.headers.get('Cache-Control'), "'max-age=10' == rv.headers.get('Cache-Control')")
+            rv = await client.get('/api/v1/export')
+            self.assertEqual('max-age=10', rv.headers.get('Cache-Control'), "'max-age=10' == rv.headers.get('Cache-Control')")
+
+    @pytest.mark.asyncio
+    async def test_endpoint_and_blueprint(self):
+        async with app.test_client() as client:
+            rv = await client.get('/index')
+            self.assertEqual('max-age=60, public', rv.headers.get('Cache-Control'), "'max-age=60, public' == rv.headers.get('Cache-Control')")
+            rv = await client.get('/admin/panel')
+            self.assertIn('no-store', rv.headers.get('Cache-Control'), "'no-store' in rv.headers.get('Cache-Control')")
+
+    @pytest.mark.asyncio
+    async def test_decorated_views_keep_their_policy(self):
+        async with app.test_client() as client:
+            rv = await client.get('/decorated')
+        self.assertEqual('max-age=1, public', rv.headers.get('Cache-Control'), "'max-age=1, public' == rv.headers.get('Cache-Control')")
+
+    @pytest.mark.asyncio
+    async def test_unmatched(self):
+        async with app.test_client() as client:
+            rv = await client.get('/unmatched')
+        self.assertNotIn('Cache-Control', rv.headers, "'Cache-Control' not in rv.headers")
+        self.assertIsNone(rules.policy_for(app, 'view_unmatched'), "rules.policy_for(app, 'view_unmatched') is None")
+
+    def test_candidates(self):
+        candidates = rules.candidates('view_api_items', '/api/v1/items')
+        self.assertEqual([rules.rules[3], rules.rules[4]], list(candidates), "[rules.rules[3], rules.rules[4]] == list(candidates)")
+
+    def test_store_policy_invalid(self):
+        with self.assertRaises(CacheControlPolicyInvalidError):
+            CacheRule(cache_for(minutes=5, store=True), prefix='/')
+
+    def test_several_patterns_invalid(self):
+        with self.assertRaises(CacheControlPolicyInvalidError):
+            CacheRule(cache_for(minutes=5), prefix='/', glob='/*')
+
+    def test_named_groups_in_several_patterns(self):
+        table = CacheRules([
+            CacheRule(dont_cache(), regex=r'/(?P<version>v1)/'),
+            CacheRule(dont_cache(), regex=r'/(?P<version>v\d)/'),
+        ])
+        self.assertEqual(2, len(table.candidates('view', '/v1/items')), "2 == len(table.candidates('view', '/v1/items'))")
@@ -0,0 +1,131 @@
+import multiprocessing
+import os
+import tempfile
+import unittest
+
+import pytest
+from quart import Quart, Response
+from quart_cachecontrol import CacheControl, SharedMemoryStore, cache_for
+from quart_cachecontrol.store import StoredResponse
+
+NOW = 1000.0
+
+
+def entry(body, expires_at=NOW + 60, tags=(), encodings=None):
+    return StoredResponse(200, [('Content-Type', 'text/plain')], body, NOW, expires_at, tags=tags, encodings=encodings)
+
+
+def write_entries(path, count):
+    store = SharedMemoryStore(path, data_bytes=64 * 1024, slots=64)
+    for index in range(count):
+        store.set(('GET', '/shared', index % 8), entry(bytes([index % 8]) * 4000))
+    store.close()
+
+
+class TestSharedMemoryStore(unittest.TestCase):
+    def setUp(self):
+        directory = tempfile.mkdtemp()
+        self.path = os.path.join(directory, 'store')
+        self.store = SharedMemoryStore(self.path, data_bytes=64 * 1024, slots=64)
+
+    def tearDown(self):
+        self.store.close()
+        os.unlink(self.path)
+
+    def test_set_get(self):
+        self.store.set(('GET', '/'), entry(b'body', encodings={'gzip': b'gz'}))
+        stored = self.store.get(('GET', '/'), NOW)
+        self.assertEqual(b'body', stored.body, "b'body' == stored.body")
+        self.assertEqual({'gzip': b'gz'}, stored.encodings, "{'gzip': b'gz'} == stored.encodings")
+        self.assertEqual([('Content-Type', 'text/plain')], stored.headers, "[('Content-Type', 'text/plain')] == stored.headers")
+        self.assertIsNone(self.store.get(('GET', '/other'), NOW), "self.store.get(('GET', '/other'), NOW) is None")
+        self.assertEqual(1, self.store.hits, "1 == self.store.hits")
+        self.assertEqual(1, self.store.misses, "1 == self.store.misses")
+
+    def test_expired(self):
+        self.store.set(('GET', '/'), entry(b'body', expires_at=NOW + 1))
+        self.assertIsNone(self.store.get(('GET', '/'), NOW + 1), "self.store.get(('GET', '/'), NOW + 1) is None")
+
+    def test_shared_between_instances(self):
+        self.store.set(('GET', '/'), entry(b'body'))
+        other = SharedMemoryStore(self.path, data_bytes=64 * 1024, slots=64)
+        try:
+            self.assertEqual(b'body', other.get(('GET', '/'), NOW).body, "b'body' == other.get(('GET', '/'), NOW).body")
+            other.delete(('GET', '/'))
+        finally:
+            other.close()
+        self.assertIsNone(self.store.get(('GET', '/'), NOW), "self.store.get(('GET', '/'), NOW) is None")
+
+    def test_ring_overwrites_oldest(self):
+        for index in range(20):
+            self.store.set(('GET', index), entry(b'x' * 10000))
+        self.assertIsNone(self.store.get(('GET', 0), NOW), "self.store.get(('GET', 0), NOW) is None")
+        self.assertIsNotNone(self.store.get(('GET', 19), NOW), "self.store.get(('GET', 19), NOW) is not None")
+        self.assertLessEqual(self.store.stats()['bytes'], 64 * 1024, "self.store.stats()['bytes'] <= 64 * 1024")
+
+    def test_ring_drops_only_overwritten(self):
+        latest = {}
+        for index in range(300):
+            key = ('GET', index % 37)
+            body = bytes([index % 256]) * (500 + index * 97 % 7000)
+            self.store.set(key, entry(body))
+            latest[key] = body
+            stored = {stored_key: self.store.get(stored_key, NOW) for stored_key in latest}
+            for stored_key, found in stored.items():
+                if found is not None:
+                    self.assertEqual(latest[stored_key], found.body, "latest[stored_key] == found.body")
+            self.assertIsNotNone(stored[key], "stored[key] is not None")
+        live = sorted((slot[2], slot[2] + slot[3]) for _, slot in self.store._live_slots())
+        for (_, end), (start, _) in zip(live, live[1:]):
+            self.assertLessEqual(end, start, "live records do not overlap")
+        self.assertGreater(len(live), 5, "len(live) > 5")
+
+    def test_oversized(self):
+        self.store.set(('GET', '/'), entry(b'x' * 100000))
+        self.assertEqual(0, len(self.store), "0 == len(self.store)")
+
+    def test_invalidate_tags_and_clear(self):
+        self.store.set(('GET', 1), entry(b'a', tags=['user:1']))
+        self.store.set(('GET', 2), entry(b'b', tags=['user:2']))
+        self.assertEqual(1, self.store.invalidate_tags('user:1'), "1 == self.store.invalidate_tags('user:1')")
+        self.assertEqual(1, len(self.store), "1 == len(self.store)")
+        self.store.clear()
+        self.assertEqual(0, len(self.store), "0 == len(self.store)")
+
+    def test_concurrent_writer_process(self):
+        process = multiprocessing.get_context('fork').Process(target=write_entries, args=(self.path, 2000))
+        process.start()
+        while process.is_alive():
+            for index in range(8):
+                stored = self.store.get(('GET', '/shared', index), NOW)
+                if stored is not None:
+                    self.assertEqual(bytes([index]) * 4000, stored.body, "bytes([index]) * 4000 == stored.body")
+        process.join()
+        self.assertEqual(0, process.exitcode, "0 == process.exitcode")
+
+
+class TestSharedMemoryStoreApp(unittest.IsolatedAsyncioTestCase):
+    @pytest.mark.asyncio
+    async def test_served_from_shared_store(self):
+        path = os.path.join(tempfile.mkdtemp(), 'store')
+        calls = []
+        app = Quart(__name__)
+
+        @app.route('/')
+        @cache_for(minutes=5, store=True)
+        async def view():
+            calls.append(1)
+            return Response('body')
+
+        store = SharedMemoryStore(path, data_bytes=64 * 1024, slots=64)
+        CacheControl(app, store=store)
+        try:
+            async with app.test_app() as test_app:
+                client = test_app.test_client()
+                await client.get('/')
+                rv = await client.get('/')
+            self.assertEqual('body', await rv.get_data(as_text=True), "'body' == await rv.get_data(as_text=True)")
+            self.assertEqual(1, len(calls), "1 == len(calls)")
+        finally:
+            store.close()
+            os.unlink(path)
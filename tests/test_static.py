@@ -0,0 +1,97 @@
+import os
+import tempfile
+import unittest
+
+import pytest
+from quart import Quart, render_template_string
+from quart_cachecontrol import CacheControl, StaticAssets
+
+
+class TestStaticAssets(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.static = os.path.join(self.tmp.name, 'static')
+        os.makedirs(os.path.join(self.static, 'css'))
+        self.write('css/app.css', 'body {}')
+        self.write('logo.svg', '<svg/>')
+        self.cache_file = os.path.join(self.tmp.name, 'fingerprints.json')
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def write(self, filename, content):
+        with open(os.path.join(self.static, filename), 'w') as f:
+            f.write(content)
+
+    def create_app(self):
+        app = Quart(__name__, static_folder=self.static)
+        assets = StaticAssets(app, max_workers=2, cache_file=self.cache_file)
+
+        @app.route('/')
+        async def view_index():
+            return await render_template_string("{{ static_url('css/app.css') }}")
+        return app, assets
+
+    @pytest.mark.asyncio
+    async def test_serves_fingerprinted_urls_as_immutable(self):
+        app, assets = self.create_app()
+        async with app.test_app() as test_app:
+            client = test_app.test_client()
+            url = await (await client.get('/')).get_data(as_text=True)
+            self.assertRegex(url, r'^/static/css/app\.[0-9a-f]{8}\.css$', 'url is fingerprinted')
+            response = await client.get(url)
+            self.assertEqual(200, response.status_code, 'response.status_code == 200')
+            self.assertEqual('body {}', await response.get_data(as_text=True), "response.get_data() == 'body {}'")
+            self.assertEqual('public, max-age=31536000, immutable', response.headers['Cache-Control'],
+                             "response.headers['Cache-Control'] == 'public, max-age=31536000, immutable'")
+            self.assertNotIn('Expires', response.headers, "'Expires' not in response.headers")
+
+            response = await client.get(url, headers={'If-Modified-Since': response.headers['Last-Modified']})
+            self.assertEqual(304, response.status_code, 'response.status_code == 304')
+            self.assertEqual('public, max-age=31536000, immutable', response.headers['Cache-Control'],
+                             "response.headers['Cache-Control'] == 'public, max-age=31536000, immutable'")
+            self.assertNotIn('Expires', response.headers, "'Expires' not in response.headers")
+
+            response = await client.get('/static/css/app.css')
+            self.assertEqual(200, response.status_code, 'response.status_code == 200')
+            self.assertNotIn('immutable', response.headers.get('Cache-Control', ''),
+                             "'immutable' not in response.headers['Cache-Control']")
+
+    @pytest.mark.asyncio
+    async def test_unknown_fingerprints_are_not_found(self):
+        app, assets = self.create_app()
+        async with app.test_app() as test_app:
+            response = await test_app.test_client().get('/static/css/app.00000000.css')
+            self.assertEqual(404, response.status_code, 'response.status_code == 404')
+
+    @pytest.mark.asyncio
+    async def test_url_for_unhashed_files(self):
+        app, assets = self.create_app()
+        async with app.test_request_context('/'):
+            self.assertEqual('/static/missing.js', assets.url_for('missing.js'),
+                             "assets.url_for('missing.js') == '/static/missing.js'")
+
+    def test_rehashes_only_changed_files(self):
+        app, assets = self.create_app()
+        self.assertEqual(2, assets.scan(), 'assets.scan() == 2')
+        logo = assets.fingerprint('logo.svg')
+        css = assets.fingerprint('css/app.css')
+        self.assertRegex(logo, r'^logo\.[0-9a-f]{8}\.svg$', 'logo is fingerprinted')
+
+        app, assets = self.create_app()
+        self.assertEqual(0, assets.scan(), 'assets.scan() == 0')
+        self.assertEqual(logo, assets.fingerprint('logo.svg'), "assets.fingerprint('logo.svg') == logo")
+
+        self.write('css/app.css', 'body { color: red }')
+        self.assertEqual(1, assets.scan(), 'assets.scan() == 1')
+        self.assertNotEqual(css, assets.fingerprint('css/app.css'), "assets.fingerprint('css/app.css') != css")
+        self.assertEqual(logo, assets.fingerprint('logo.svg'), "assets.fingerprint('logo.svg') == logo")
+
+    @pytest.mark.asyncio
+    async def test_with_extension(self):
+        app, assets = self.create_app()
+        CacheControl(app)
+        async with app.test_app() as test_app:
+            response = await test_app.test_client().get('/static/' + assets.fingerprint('logo.svg'))
+            self.assertEqual('public, max-age=31536000, immutable', response.headers['Cache-Control'],
+                             "response.headers['Cache-Control'] == 'public, max-age=31536000, immutable'")
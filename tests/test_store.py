@@ -0,0 +1,357 @@
+import asyncio
+import unittest
+from datetime import timedelta
+
+import pytest
+from quart import Quart, Response
+from quart_cachecontrol import cache_for, cache, MemoryStore, CacheControlPolicyInvalidError, CacheControl, \
+    invalidate_tags
+
+CACHE_SECONDS = 300
+
+
+class FakeClock(object):
+    def __init__(self, now):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+app = Quart(__name__)
+clock = FakeClock(1000.0)
+store = MemoryStore(clock=clock)
+calls = []
+
+
+@app.route('/cache_for/<int:status_code>', methods=['GET', 'POST'])
+@cache_for(seconds=CACHE_SECONDS, store=store)
+async def view_cache_for(status_code):
+    calls.append(status_code)
+    return Response(str(len(calls)), status=status_code)
+
+
+@app.route('/cache_for/vary')
+@cache_for(seconds=CACHE_SECONDS, vary=['Accept-Language'], store=store)
+async def view_cache_for_vary():
+    calls.append('vary')
+    return Response(str(len(calls)))
+
+
+@app.route('/cache_for/cookie')
+@cache_for(seconds=CACHE_SECONDS, store=store)
+async def view_cache_for_cookie():
+    calls.append('cookie')
+    response = Response(str(len(calls)))
+    response.set_cookie('name', 'value')
+    return response
+
+
+@app.route('/cache_for/private')
+@cache_for(seconds=CACHE_SECONDS, store=store)
+async def view_cache_for_private():
+    calls.append('private')
+    return Response(str(len(calls)), headers={'Cache-Control': 'private'})
+
+
+@app.route('/cache')
+@cache(max_age=CACHE_SECONDS, public=True, store=store)
+async def view_cache():
+    calls.append('cache')
+    return Response(str(len(calls)))
+
+
+@app.route('/cache_for/stale')
+@cache_for(seconds=CACHE_SECONDS, stale_while_revalidate=60, stale_if_error=timedelta(minutes=10), store=store)
+async def view_cache_for_stale():
+    calls.append('stale')
+    if failing:
+        raise RuntimeError('backend down')
+    return Response(str(len(calls)))
+
+
+failing = False
+
+
+@app.route('/cache_for/users/<int:user_id>')
+@cache_for(seconds=CACHE_SECONDS, tags=lambda user_id: [f'user:{user_id}', 'users'], store=store)
+async def view_cache_for_user(user_id):
+    calls.append(user_id)
+    return Response(str(len(calls)))
+
+
+@app.route('/cache/static_tags')
+@cache(max_age=CACHE_SECONDS, tags=['static', 'users'], store=store)
+async def view_cache_static_tags():
+    calls.append('static')
+    return Response(str(len(calls)))
+
+
+tags_app = Quart(__name__)
+
+
+@tags_app.route('/users/<int:user_id>')
+@cache_for(seconds=CACHE_SECONDS, tags=lambda user_id: [f'user:{user_id}'], store=True)
+async def view_tags_app_user(user_id):
+    calls.append(user_id)
+    return Response(str(len(calls)))
+
+
+CacheControl(tags_app)
+
+
+class StoreTestCase(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        global failing
+        store.clear()
+        calls.clear()
+        clock.now = 1000.0
+        failing = False
+
+    async def get_twice(self, path, **kwargs):
+        async with app.test_client() as client:
+            first = await client.get(path, **kwargs)
+            clock.now += 10
+            second = await client.get(path, **kwargs)
+        return first, second
+
+
+class TestStore(StoreTestCase):
+    @pytest.mark.asyncio
+    async def test_serves_stored_response(self):
+        first, second = await self.get_twice('/cache_for/200')
+        self.assertEqual([200], calls, "[200] == calls")
+        self.assertEqual(await first.get_data(), await second.get_data(), "await first.get_data() == await second.get_data()")
+        self.assertEqual('10', second.headers.get('Age'), "'10' == second.headers.get('Age')")
+        self.assertEqual(f'max-age={CACHE_SECONDS}', second.headers.get('Cache-Control'), "f'max-age={CACHE_SECONDS}' == second.headers.get('Cache-Control')")
+
+    @pytest.mark.asyncio
+    async def test_expires(self):
+        async with app.test_client() as client:
+            await client.get('/cache_for/200')
+            clock.now += CACHE_SECONDS
+            await client.get('/cache_for/200')
+        self.assertEqual([200, 200], calls, "[200, 200] == calls")
+
+    @pytest.mark.asyncio
+    async def test_skips_not_qualifying(self):
+        await self.get_twice('/cache_for/404')
+        self.assertEqual([404, 404], calls, "[404, 404] == calls")
+
+    @pytest.mark.asyncio
+    async def test_skips_unsafe_methods(self):
+        async with app.test_client() as client:
+            await client.post('/cache_for/200')
+            await client.post('/cache_for/200')
+        self.assertEqual([200, 200], calls, "[200, 200] == calls")
+
+    @pytest.mark.asyncio
+    async def test_keys_query_string(self):
+        async with app.test_client() as client:
+            await client.get('/cache_for/200', query_string={'page': 1})
+            await client.get('/cache_for/200', query_string={'page': 2})
+            await client.get('/cache_for/200', query_string={'page': 1})
+        self.assertEqual([200, 200], calls, "[200, 200] == calls")
+
+    @pytest.mark.asyncio
+    async def test_keys_vary_headers(self):
+        async with app.test_client() as client:
+            await client.get('/cache_for/vary', headers={'Accept-Language': 'de'})
+            await client.get('/cache_for/vary', headers={'Accept-Language': 'en'})
+            await client.get('/cache_for/vary', headers={'Accept-Language': 'de'})
+        self.assertEqual(['vary', 'vary'], calls, "['vary', 'vary'] == calls")
+
+    @pytest.mark.asyncio
+    async def test_skips_cookies(self):
+        await self.get_twice('/cache_for/cookie')
+        self.assertEqual(['cookie', 'cookie'], calls, "['cookie', 'cookie'] == calls")
+
+    @pytest.mark.asyncio
+    async def test_skips_private(self):
+        await self.get_twice('/cache_for/private')
+        self.assertEqual(['private', 'private'], calls, "['private', 'private'] == calls")
+
+    @pytest.mark.asyncio
+    async def test_skips_authorized(self):
+        async with app.test_client() as client:
+            await client.get('/cache_for/200', headers={'Authorization': 'alice'})
+            await client.get('/cache_for/200', headers={'Authorization': 'bob'})
+            rv = await client.get('/cache_for/200')
+        self.assertEqual([200, 200, 200], calls, "[200, 200, 200] == calls")
+        self.assertEqual(b'3', await rv.get_data(), "b'3' == await rv.get_data()")
+
+    @pytest.mark.asyncio
+    async def test_public_stores_authorized(self):
+        await self.get_twice('/cache', headers={'Authorization': 'alice'})
+        self.assertEqual(['cache'], calls, "['cache'] == calls")
+
+    @pytest.mark.asyncio
+    async def test_cache(self):
+        first, second = await self.get_twice('/cache')
+        self.assertEqual(['cache'], calls, "['cache'] == calls")
+        self.assertEqual(f'max-age={CACHE_SECONDS}, public', second.headers.get('Cache-Control'), "f'max-age={CACHE_SECONDS}, public' == second.headers.get('Cache-Control')")
+
+
+class TestStoreStale(StoreTestCase):
+    @pytest.mark.asyncio
+    async def test_directives(self):
+        async with app.test_client() as client:
+            rv = await client.get('/cache_for/stale')
+        self.assertEqual(f'max-age={CACHE_SECONDS}, stale-while-revalidate=60, stale-if-error=600', rv.headers.get('Cache-Control'), "f'max-age={CACHE_SECONDS}, stale-while-revalidate=60, stale-if-error=600' == rv.headers.get('Cache-Control')")
+
+    @pytest.mark.asyncio
+    async def test_stale_while_revalidate(self):
+        async with app.test_client() as client:
+            await client.get('/cache_for/stale')
+            clock.now += CACHE_SECONDS + 30
+            stale = await client.get('/cache_for/stale')
+            await asyncio.sleep(0.01)
+            refreshed = await client.get('/cache_for/stale')
+        self.assertEqual(b'1', await stale.get_data(), "b'1' == await stale.get_data()")
+        self.assertEqual(b'2', await refreshed.get_data(), "b'2' == await refreshed.get_data()")
+        self.assertEqual(['stale', 'stale'], calls, "['stale', 'stale'] == calls")
+
+    @pytest.mark.asyncio
+    async def test_stale_if_error(self):
+        global failing
+        async with app.test_client() as client:
+            await client.get('/cache_for/stale')
+            clock.now += CACHE_SECONDS + 300
+            failing = True
+            with self.assertLogs(app.logger, 'ERROR') as logs:
+                rv = await client.get('/cache_for/stale')
+        self.assertEqual(200, rv.status_code, "200 == rv.status_code")
+        self.assertEqual(b'1', await rv.get_data(), "b'1' == await rv.get_data()")
+        self.assertIn('backend down', logs.output[0], "'backend down' in logs.output[0]")
+
+    @pytest.mark.asyncio
+    async def test_error_after_stale_if_error(self):
+        global failing
+        async with app.test_client() as client:
+            await client.get('/cache_for/stale')
+            clock.now += CACHE_SECONDS + 600
+            failing = True
+            rv = await client.get('/cache_for/stale')
+        self.assertEqual(500, rv.status_code, "500 == rv.status_code")
+
+
+class TestStoreTags(StoreTestCase):
+    @pytest.mark.asyncio
+    async def test_headers(self):
+        async with app.test_client() as client:
+            rv = await client.get('/cache_for/users/1')
+        self.assertEqual('user:1 users', rv.headers.get('Surrogate-Key'), "'user:1 users' == rv.headers.get('Surrogate-Key')")
+        self.assertEqual('user:1,users', rv.headers.get('Cache-Tag'), "'user:1,users' == rv.headers.get('Cache-Tag')")
+
+    @pytest.mark.asyncio
+    async def test_static_headers(self):
+        async with app.test_client() as client:
+            rv = await client.get('/cache/static_tags')
+        self.assertEqual('static users', rv.headers.get('Surrogate-Key'), "'static users' == rv.headers.get('Surrogate-Key')")
+
+    @pytest.mark.asyncio
+    async def test_invalidate(self):
+        async with app.test_client() as client:
+            await client.get('/cache_for/users/1')
+            await client.get('/cache_for/users/2')
+            self.assertEqual(1, store.invalidate_tags('user:1'), "1 == store.invalidate_tags('user:1')")
+            await client.get('/cache_for/users/1')
+            await client.get('/cache_for/users/2')
+        self.assertEqual([1, 2, 1], calls, "[1, 2, 1] == calls")
+
+    @pytest.mark.asyncio
+    async def test_invalidate_shared_tag(self):
+        async with app.test_client() as client:
+            await client.get('/cache_for/users/1')
+            await client.get('/cache/static_tags')
+        self.assertEqual(2, store.invalidate_tags('users'), "2 == store.invalidate_tags('users')")
+        self.assertEqual(0, len(store), "0 == len(store)")
+
+    @pytest.mark.asyncio
+    async def test_invalidate_app_store(self):
+        async with tags_app.test_app() as test_app:
+            client = test_app.test_client()
+            await client.get('/users/1')
+            async with tags_app.app_context():
+                self.assertEqual(1, invalidate_tags('user:1'), "1 == invalidate_tags('user:1')")
+            await client.get('/users/1')
+        self.assertEqual([1, 1], calls, "[1, 1] == calls")
+
+
+class TestStorePolicyInvalid(unittest.TestCase):
+    def test_no_store(self):
+        with self.assertRaises(CacheControlPolicyInvalidError):
+            cache(max_age=CACHE_SECONDS, no_store=True, store=True)
+
+    def test_private(self):
+        with self.assertRaises(CacheControlPolicyInvalidError):
+            cache(max_age=CACHE_SECONDS, private=True, store=True)
+
+    def test_without_max_age(self):
+        with self.assertRaises(CacheControlPolicyInvalidError):
+            cache(public=True, store=True)
+
+
+extension_app = Quart(__name__)
+extension_calls = []
+
+
+@extension_app.route('/stored')
+@cache_for(seconds=CACHE_SECONDS, store=True)
+async def view_extension_stored():
+    extension_calls.append('stored')
+    return Response(str(len(extension_calls)))
+
+
+CacheControl(extension_app)
+
+
+class TestExtensionStore(unittest.IsolatedAsyncioTestCase):
+    @pytest.mark.asyncio
+    async def test_serves_from_app_store(self):
+        async with extension_app.test_app() as test_app:
+            client = test_app.test_client()
+            first = await client.get('/stored')
+            second = await client.get('/stored')
+        self.assertEqual(200, second.status_code, "200 == second.status_code")
+        self.assertEqual(['stored'], extension_calls, "['stored'] == extension_calls")
+        self.assertEqual(await first.get_data(), await second.get_data(), "await first.get_data() == await second.get_data()")
+
+
+host_app = Quart(__name__, host_matching=True, static_folder=None)
+other_app = Quart('other_app')
+
+
+@host_app.route('/', host='one.example')
+@cache_for(seconds=CACHE_SECONDS, store=True)
+async def view_host_one():
+    return Response('one')
+
+
+@host_app.route('/', host='two.example')
+@cache_for(seconds=CACHE_SECONDS, store=True)
+async def view_host_two():
+    return Response('two')
+
+
+@other_app.route('/')
+@cache_for(seconds=CACHE_SECONDS, store=True)
+async def view_other_app():
+    return Response('other')
+
+
+class TestStoreKeys(unittest.IsolatedAsyncioTestCase):
+    @pytest.mark.asyncio
+    async def test_keys_by_host(self):
+        client = host_app.test_client()
+        one = await client.get('/', headers={'Host': 'one.example'})
+        two = await client.get('/', headers={'Host': 'two.example'})
+        self.assertEqual(b'one', await one.get_data(), "b'one' == await one.get_data()")
+        self.assertEqual(b'two', await two.get_data(), "b'two' == await two.get_data()")
+
+    @pytest.mark.asyncio
+    async def test_keys_by_app(self):
+        app_rv = await host_app.test_client().get('/', headers={'Host': 'one.example'})
+        other_rv = await other_app.test_client().get('/', headers={'Host': 'one.example'})
+        self.assertEqual(b'one', await app_rv.get_data(), "b'one' == await app_rv.get_data()")
+        self.assertEqual(b'other', await other_rv.get_data(), "b'other' == await other_rv.get_data()")
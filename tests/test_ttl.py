@@ -0,0 +1,84 @@
+import unittest
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from quart import Quart, Response, request
+from quart_cachecontrol import CacheControl, CacheControlPolicyInvalidError, MemoryStore, cache_for
+from quart_cachecontrol.ttl import resolve_ttl
+
+app = Quart(__name__)
+calls = []
+
+
+def seconds_from_view_args(response):
+    return request.view_args['seconds']
+
+
+async def until_valid_until(response):
+    return datetime.fromtimestamp(int(response.headers['X-Valid-Until']), timezone.utc)
+
+
+@app.route('/seconds/<int:seconds>')
+@cache_for(ttl=seconds_from_view_args, stale_if_error=60)
+async def view_seconds(seconds):
+    return Response('body')
+
+
+@app.route('/valid_until')
+@cache_for(ttl=until_valid_until, store=True, expires=False)
+async def view_valid_until():
+    calls.append(1)
+    valid_until = datetime.now(timezone.utc) + timedelta(minutes=10)
+    return Response('body', headers={'X-Valid-Until': str(int(valid_until.timestamp()))})
+
+
+@app.route('/not_found')
+@cache_for(ttl=lambda response: timedelta(minutes=5))
+async def view_not_found():
+    return Response(status=404)
+
+
+CacheControl(app, store=MemoryStore())
+
+
+class TestResolveTtl(unittest.IsolatedAsyncioTestCase):
+    @pytest.mark.asyncio
+    async def test_values(self):
+        self.assertEqual(300, await resolve_ttl(lambda response: timedelta(minutes=5), None), "300 == resolve_ttl(timedelta)")
+        self.assertEqual(10, await resolve_ttl(lambda response: 10.7, None), "10 == resolve_ttl(10.7)")
+        past = datetime.now(timezone.utc) - timedelta(minutes=5)
+        self.assertEqual(0, await resolve_ttl(lambda response: past, None), "0 == resolve_ttl(past)")
+        naive = datetime.now(timezone.utc).replace(tzinfo=None) + timedelta(seconds=100)
+        self.assertAlmostEqual(100, await resolve_ttl(lambda response: naive, None), delta=1, msg="100 ~= resolve_ttl(naive)")
+
+    def test_ttl_and_timedelta_invalid(self):
+        with self.assertRaises(CacheControlPolicyInvalidError):
+            cache_for(ttl=lambda response: 10, minutes=5)
+
+
+class TestDynamicTtl(unittest.IsolatedAsyncioTestCase):
+    @pytest.mark.asyncio
+    async def test_view_args(self):
+        async with app.test_client() as client:
+            for seconds in (30, 60, 30):
+                rv = await client.get(f'/seconds/{seconds}')
+                self.assertEqual(f'max-age={seconds}, stale-if-error=60', rv.headers.get('Cache-Control'), "f'max-age={seconds}, stale-if-error=60' == rv.headers.get('Cache-Control')")
+                self.assertIn('Expires', rv.headers, "'Expires' in rv.headers")
+
+    @pytest.mark.asyncio
+    async def test_absolute_expiry_stored(self):
+        calls.clear()
+        async with app.test_app() as test_app:
+            client = test_app.test_client()
+            rv = await client.get('/valid_until')
+            max_age = rv.cache_control.max_age
+            self.assertAlmostEqual(600, max_age, delta=2, msg="600 ~= max_age")
+            self.assertNotIn('Expires', rv.headers, "'Expires' not in rv.headers")
+            await client.get('/valid_until')
+        self.assertEqual(1, len(calls), "1 == len(calls)")
+
+    @pytest.mark.asyncio
+    async def test_not_qualifying(self):
+        async with app.test_client() as client:
+            rv = await client.get('/not_found')
+        self.assertNotIn('Cache-Control', rv.headers, "'Cache-Control' not in rv.headers")
@@ -0,0 +1,107 @@
+import asyncio
+import unittest
+
+import pytest
+from quart import Quart, Response
+from quart_cachecontrol import CacheControl, CacheWarmer, MemoryStore, WarmTarget, cache, cache_for, dont_cache
+
+calls = []
+
+
+def create_app():
+    app = Quart(__name__)
+
+    @app.route('/index')
+    @cache_for(minutes=5, store=True)
+    async def view_index():
+        calls.append('index')
+        return Response('index')
+
+    @app.route('/users/<int:user_id>')
+    @cache(max_age=60, store=True)
+    async def view_user(user_id):
+        calls.append(f'user:{user_id}')
+        return Response('user')
+
+    @app.route('/short')
+    @cache_for(seconds=0.05, store=True)
+    async def view_short():
+        calls.append('short')
+        return Response('short')
+
+    @app.route('/private')
+    @dont_cache()
+    async def view_private():
+        calls.append('private')
+        return Response('private')
+
+    @app.route('/not_stored')
+    @cache_for(minutes=5)
+    async def view_not_stored():
+        calls.append('not_stored')
+        return Response('not stored')
+
+    @app.route('/post', methods=['POST'])
+    @cache_for(minutes=5)
+    async def view_post():
+        return Response('post')
+
+    CacheControl(app, store=MemoryStore())
+    return app
+
+
+class TestCacheWarmer(unittest.IsolatedAsyncioTestCase):
+    def test_discover_targets(self):
+        app = create_app()
+        endpoints = {target.endpoint for target in CacheWarmer().discover_targets(app)}
+        self.assertEqual({'view_index', 'view_short'}, endpoints, "{'view_index', 'view_short'} == endpoints")
+
+    @pytest.mark.asyncio
+    async def test_warm_and_serve(self):
+        calls.clear()
+        app = create_app()
+        warmer = CacheWarmer(app, targets=[WarmTarget('view_user', params=lambda: [{'user_id': 1}, {'user_id': 2}])])
+        async with app.test_app() as test_app:
+            await asyncio.sleep(0.02)
+            self.assertIn('index', calls, "'index' in calls")
+            self.assertIn('user:1', calls, "'user:1' in calls")
+            self.assertIn('user:2', calls, "'user:2' in calls")
+            self.assertNotIn('private', calls, "'private' not in calls")
+            count = len(calls)
+            rv = await test_app.test_client().get('/users/1')
+            self.assertEqual('user', await rv.get_data(as_text=True), "'user' == await rv.get_data(as_text=True)")
+            self.assertEqual(count, len(calls), "count == len(calls)")
+            await asyncio.sleep(0.1)
+            self.assertGreaterEqual(calls.count('short'), 2, "calls.count('short') >= 2")
+        report = {item['path']: item for item in warmer.report()}
+        self.assertEqual(200, report['/users/2']['status'], "200 == report['/users/2']['status']")
+        self.assertGreaterEqual(report['/short']['count'], 2, "report['/short']['count'] >= 2")
+        self.assertGreater(report['/index']['seconds'], 0, "report['/index']['seconds'] > 0")
+
+    @pytest.mark.asyncio
+    async def test_rate(self):
+        app = create_app()
+        warmer = CacheWarmer(targets=[WarmTarget('view_user', params=[{'user_id': index} for index in range(5)], ttl=0)],
+                             discover=False, rate=100)
+        loop = asyncio.get_running_loop()
+        started = loop.time()
+        async with app.test_app():
+            await warmer.run(app)
+        self.assertGreaterEqual(loop.time() - started, 0.04, "loop.time() - started >= 0.04")
+        self.assertEqual(5, len(warmer.report()), "5 == len(warmer.report())")
+
+    @pytest.mark.asyncio
+    async def test_failing_target(self):
+        calls.clear()
+        app = create_app()
+        warmer = CacheWarmer(app, targets=[WarmTarget('view_user', params=[{'wrong': 1}], ttl=0.01)])
+        with self.assertLogs(app.logger, 'ERROR'):
+            async with app.test_app():
+                await asyncio.sleep(0.1)
+                self.assertGreaterEqual(calls.count('short'), 2, "calls.count('short') >= 2")
+        count = len(calls)
+        await asyncio.sleep(0.1)
+        self.assertEqual(count, len(calls), "count == len(calls)")
+        failures = [item for item in warmer.report() if item['path'] is None]
+        self.assertEqual('view_user', failures[0]['endpoint'], "'view_user' == failures[0]['endpoint']")
+        self.assertIn('BuildError', failures[0]['error'], "'BuildError' in failures[0]['error']")